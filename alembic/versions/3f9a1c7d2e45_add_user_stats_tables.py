@@ -0,0 +1,61 @@
+"""Add user_stats, user_product_stats and purchase_count_histogram tables
+
+Revision ID: 3f9a1c7d2e45
+Revises: cb49c76f3303
+Create Date: 2026-10-19 09:12:41.518204
+
+The tables start empty. Populate them for an existing database with
+`python -m shared.database.jobs.rebuild_user_stats`.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9a1c7d2e45'
+down_revision: Union[str, Sequence[str], None] = 'cb49c76f3303'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('user_stats',
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('purchase_count', sa.Integer(), nullable=False),
+    sa.Column('total_spent', sa.NUMERIC(), nullable=False),
+    sa.Column('first_purchase_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('last_purchase_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('favorite_product_id', sa.UUID(), nullable=True),
+    sa.Column('favorite_product_count', sa.Integer(), nullable=False),
+    sa.CheckConstraint('purchase_count >= 0', name='non_negative_purchase_count'),
+    sa.ForeignKeyConstraint(['favorite_product_id'], ['products.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_index(op.f('ix_user_stats_purchase_count'), 'user_stats', ['purchase_count'], unique=False)
+    op.create_table('user_product_stats',
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('product_id', sa.UUID(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'product_id')
+    )
+    op.create_table('purchase_count_histogram',
+    sa.Column('purchase_count', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('customers', sa.Integer(), nullable=False),
+    sa.CheckConstraint('customers >= 0', name='non_negative_customers'),
+    sa.CheckConstraint('purchase_count > 0', name='positive_purchase_count'),
+    sa.PrimaryKeyConstraint('purchase_count')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('purchase_count_histogram')
+    op.drop_table('user_product_stats')
+    op.drop_index(op.f('ix_user_stats_purchase_count'), table_name='user_stats')
+    op.drop_table('user_stats')
@@ -0,0 +1,66 @@
+"""Add analytics indexes and drop indexes duplicating primary keys
+
+Revision ID: 5b7d3e9c2a64
+Revises: 8d2e6b4a1f90
+Create Date: 2026-10-19 14:05:12.640318
+
+Adds the indexes the analytics and history queries read through:
+
+    ix_purchase_items_product_id            product totals, without visiting the heap for quantity
+    ix_purchases_timestamp                  sales summary time ranges, engine tail, parquet export
+    ix_purchases_supermarket_id_timestamp   per-branch time ranges (replaces ix_purchases_supermarket_id)
+
+and drops ix_branches_id, ix_products_id and ix_users_id, which duplicate the
+primary key indexes and only add work to every insert.
+
+Indexes are built and dropped CONCURRENTLY, outside the migration transaction,
+so purchases keep being written while this runs. If a build fails it leaves an
+INVALID index behind; drop it and run the migration again.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b7d3e9c2a64'
+down_revision: Union[str, Sequence[str], None] = '8d2e6b4a1f90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index('ix_purchase_items_product_id', 'purchase_items', ['product_id'], unique=False,
+                        postgresql_include=['quantity'], postgresql_concurrently=True, if_not_exists=True)
+        op.create_index(op.f('ix_purchases_timestamp'), 'purchases', ['timestamp'], unique=False,
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_purchases_supermarket_id_timestamp', 'purchases', ['supermarket_id', 'timestamp'],
+                        unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+        op.drop_index(op.f('ix_purchases_supermarket_id'), table_name='purchases',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index(op.f('ix_branches_id'), table_name='branches', postgresql_concurrently=True, if_exists=True)
+        op.drop_index(op.f('ix_products_id'), table_name='products', postgresql_concurrently=True, if_exists=True)
+        op.drop_index(op.f('ix_users_id'), table_name='users', postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('ix_users_id'), 'users', ['id'], unique=False,
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index(op.f('ix_products_id'), 'products', ['id'], unique=False,
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index(op.f('ix_branches_id'), 'branches', ['id'], unique=False,
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index(op.f('ix_purchases_supermarket_id'), 'purchases', ['supermarket_id'], unique=False,
+                        postgresql_concurrently=True, if_not_exists=True)
+
+        op.drop_index('ix_purchases_supermarket_id_timestamp', table_name='purchases',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index(op.f('ix_purchases_timestamp'), table_name='purchases',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_purchase_items_product_id', table_name='purchase_items',
+                      postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,37 @@
+"""Add ingest_watermarks table
+
+Revision ID: 8d2e6b4a1f90
+Revises: 3f9a1c7d2e45
+Create Date: 2026-10-19 11:40:27.903518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d2e6b4a1f90'
+down_revision: Union[str, Sequence[str], None] = '3f9a1c7d2e45'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('ingest_watermarks',
+    sa.Column('source', sa.String(), nullable=False),
+    sa.Column('byte_offset', sa.BigInteger(), nullable=False),
+    sa.Column('rows_processed', sa.BigInteger(), nullable=False),
+    sa.Column('head_sha256', sa.String(length=64), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.CheckConstraint('byte_offset >= 0', name='non_negative_byte_offset'),
+    sa.CheckConstraint('rows_processed >= 0', name='non_negative_rows_processed'),
+    sa.PrimaryKeyConstraint('source')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('ingest_watermarks')
@@ -0,0 +1,60 @@
+"""Store money as integer cents
+
+Revision ID: 9e4a7c1d5b38
+Revises: 5b7d3e9c2a64
+Create Date: 2026-10-19 16:22:48.173590
+
+Converts every money column from NUMERIC to BIGINT cents and renames it to say
+so, backfilling the values in the same statement:
+
+    products.unit_price         -> products.unit_price_cents
+    purchase_items.unit_price   -> purchase_items.unit_price_cents
+    purchases.total_amount      -> purchases.total_amount_cents
+    user_stats.total_spent      -> user_stats.total_spent_cents
+
+Amounts with fractions of a cent are rounded half away from zero. Each ALTER
+rewrites its table under an exclusive lock, so stop both services for the
+migration; the code from this revision on only knows the new columns anyway.
+The non-negative price constraints follow the renamed columns.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e4a7c1d5b38'
+down_revision: Union[str, Sequence[str], None] = '5b7d3e9c2a64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, decimal column, cents column)
+MONEY_COLUMNS = (
+    ('products', 'unit_price', 'unit_price_cents'),
+    ('purchase_items', 'unit_price', 'unit_price_cents'),
+    ('purchases', 'total_amount', 'total_amount_cents'),
+    ('user_stats', 'total_spent', 'total_spent_cents'),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, decimal_column, cents_column in MONEY_COLUMNS:
+        op.alter_column(table, decimal_column,
+                        existing_type=sa.NUMERIC(),
+                        type_=sa.BigInteger(),
+                        existing_nullable=False,
+                        postgresql_using=f'round({decimal_column} * 100)::bigint')
+        op.alter_column(table, decimal_column, new_column_name=cents_column)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, decimal_column, cents_column in reversed(MONEY_COLUMNS):
+        op.alter_column(table, cents_column, new_column_name=decimal_column)
+        op.alter_column(table, decimal_column,
+                        existing_type=sa.BigInteger(),
+                        type_=sa.NUMERIC(),
+                        existing_nullable=False,
+                        postgresql_using=f'{decimal_column} / 100.0')
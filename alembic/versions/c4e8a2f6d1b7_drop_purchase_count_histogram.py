@@ -0,0 +1,42 @@
+"""Drop purchase_count_histogram table
+
+Revision ID: c4e8a2f6d1b7
+Revises: 9e4a7c1d5b38
+Create Date: 2026-10-19 18:40:27.905113
+
+Loyal customers are counted from ix_user_stats_purchase_count instead, so a
+purchase no longer updates the few shared histogram rows that every checkout
+with the same purchase count had to wait on. Downgrading recreates the table
+and fills it from user_stats.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e8a2f6d1b7'
+down_revision: Union[str, Sequence[str], None] = '9e4a7c1d5b38'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_table('purchase_count_histogram')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_table('purchase_count_histogram',
+    sa.Column('purchase_count', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('customers', sa.Integer(), nullable=False),
+    sa.CheckConstraint('customers >= 0', name='non_negative_customers'),
+    sa.CheckConstraint('purchase_count > 0', name='positive_purchase_count'),
+    sa.PrimaryKeyConstraint('purchase_count')
+    )
+    op.execute(
+        "INSERT INTO purchase_count_histogram (purchase_count, customers) "
+        "SELECT purchase_count, count(*) FROM user_stats WHERE purchase_count > 0 GROUP BY purchase_count"
+    )
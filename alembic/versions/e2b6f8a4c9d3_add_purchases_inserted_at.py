@@ -0,0 +1,39 @@
+"""Add purchases.inserted_at
+
+Revision ID: e2b6f8a4c9d3
+Revises: c4e8a2f6d1b7
+Create Date: 2026-10-19 19:02:15.336840
+
+The Parquet export's watermark moves from purchases.timestamp, which the register
+supplies, to the time each row is written, so purchases posted late or bulk-loaded
+with an older timestamp are still exported by the next run.
+
+Existing rows are backfilled with their timestamp, which keeps the watermarks of
+existing snapshots meaningful. The backfill rewrites purchases under an exclusive
+lock, so stop both services for the migration.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b6f8a4c9d3'
+down_revision: Union[str, Sequence[str], None] = 'c4e8a2f6d1b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('purchases', sa.Column('inserted_at', sa.DateTime(timezone=True), nullable=True))
+    op.execute('UPDATE purchases SET inserted_at = "timestamp"')
+    op.alter_column('purchases', 'inserted_at', nullable=False, server_default=sa.text('clock_timestamp()'))
+    op.create_index(op.f('ix_purchases_inserted_at'), 'purchases', ['inserted_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_purchases_inserted_at'), table_name='purchases')
+    op.drop_column('purchases', 'inserted_at')
@@ -4,20 +4,35 @@ Main application file for the iCash cash_register service.
 This module contains the FastAPI application setup and configuration.
 """
 
+import asyncio
 from contextlib import asynccontextmanager
 from datetime import datetime, UTC
 from typing import AsyncGenerator
 
 from fastapi import FastAPI, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
 
 from cash_register.app.logger import logger
 from cash_register.app.routers.api import api_router
+from cash_register.app.services.branch_service import BranchService
+from cash_register.app.services.product_service import ProductService
 from cash_register.core.config import settings
 from shared.database import SessionLocal
+from shared.database.core.config import settings as db_settings
+from shared.database.instrumentation import query_stats_middleware, recent_request_stats
+from shared.database.warmup import warm_up
+from shared.metrics import CONTENT_TYPE, REGISTRY, metrics_middleware
+from shared.startup import StartupTimer
+from shared.tracing import recent_traces, tracing_middleware
+
+# Read paths run by the opt-in warm-up (DB_WARMUP_CONNECTIONS)
+WARMUP_QUERIES = (
+    lambda db: BranchService(db).list_branches(),
+    lambda db: ProductService(db).list_products(),
+)
 
 
 @asynccontextmanager
@@ -33,6 +48,7 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     Yields:
         None: Application context
     """
+    startup = StartupTimer()
     logger.info("🚀 Starting iCash cash_register...")
     try:
         db = SessionLocal()
@@ -40,15 +56,21 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
             db.execute(text("SELECT 1"))
             logger.info("✅ Database connection established")
         except Exception as e:
-            logger.error(f"❌ Database connection failed: {str(e)}")
+            logger.error("❌ Database connection failed: %s", e)
             raise
         finally:
             db.close()
+        startup.mark("database")
+
+        if db_settings.DB_WARMUP_CONNECTIONS:
+            await asyncio.to_thread(warm_up, db_settings.DB_WARMUP_CONNECTIONS, WARMUP_QUERIES)
+            startup.mark("warmup")
 
         logger.info("🎮 iCash cash_register started successfully!")
+        startup.report(logger)
 
     except Exception as e:
-        logger.error(f"❌ Failed to start application: {str(e)}")
+        logger.error("❌ Failed to start application: %s", e)
         raise
 
     yield
@@ -72,6 +94,9 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.middleware("http")(metrics_middleware)
+app.middleware("http")(query_stats_middleware)
+app.middleware("http")(tracing_middleware)
 
 
 @app.exception_handler(SQLAlchemyError)
@@ -86,7 +111,7 @@ async def sqlalchemy_exception_handler(request, exc):
     Returns:
         JSONResponse: Error response
     """
-    logger.error(f"Database error: {str(exc)}")
+    logger.error("Database error: %s", exc)
     return JSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         content={"message": "Database error occurred"}
@@ -105,10 +130,11 @@ async def http_exception_handler(request, exc):
     Returns:
         JSONResponse: Error response
     """
-    logger.error(f"HTTP error: {str(exc)}")
+    logger.error("HTTP error: %s", exc)
     return JSONResponse(
         status_code=exc.status_code,
-        content={"message": exc.detail}
+        content={"message": exc.detail},
+        headers=exc.headers
     )
 
 
@@ -124,7 +150,7 @@ async def general_exception_handler(request, exc):
     Returns:
         JSONResponse: Error response
     """
-    logger.error(f"Unexpected error: {str(exc)}")
+    logger.error("Unexpected error: %s", exc)
     return JSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         content={"message": "Internal server error"}
@@ -148,7 +174,7 @@ async def health_check():
             db.execute(text("SELECT 1"))
             db_status = "healthy"
         except Exception as e:
-            logger.error(f"Database health check failed: {str(e)}")
+            logger.error("Database health check failed: %s", e)
             db_status = "unhealthy"
         finally:
             db.close()
@@ -164,7 +190,7 @@ async def health_check():
         }
 
     except Exception as e:
-        logger.error(f"Health check failed: {str(e)}")
+        logger.error("Health check failed: %s", e)
         return JSONResponse(
             status_code=503,
             content={
@@ -175,6 +201,43 @@ async def health_check():
         )
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Prometheus metrics for this process.
+
+    Returns:
+        PlainTextResponse: Metrics in the Prometheus text exposition format
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
+@app.get("/debug/queries", include_in_schema=False)
+async def debug_queries():
+    """
+    Query count and database time of recent requests; only available with DEBUG.
+
+    Returns:
+        dict: Recent requests, newest first
+    """
+    if not settings.DEBUG:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    return {"requests": recent_request_stats()}
+
+
+@app.get("/debug/traces", include_in_schema=False)
+async def debug_traces():
+    """
+    Recently sampled request traces; only available with DEBUG.
+
+    Returns:
+        dict: Recent traces, newest first
+    """
+    if not settings.DEBUG:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    return {"traces": recent_traces()}
+
+
 @app.get("/")
 async def root():
     """
@@ -190,6 +253,7 @@ async def root():
         "documentation": "/docs",
         "endpoints": {
             "health": "/health",
+            "metrics": "/metrics",
             "docs": "/docs" if settings.DEBUG else "disabled",
             "api": "/api/analytics"
         },
@@ -209,14 +273,14 @@ async def log_requests(request, call_next):
     start_time = __import__('time').time()
 
     logger.info(
-        f"📨 {request.method} {request.url.path} - Client: {request.client.host if request.client else 'unknown'}")
+        "📨 %s %s - Client: %s", request.method, request.url.path, request.client.host if request.client else 'unknown')
 
     try:
         response = await call_next(request)
 
         process_time = __import__('time').time() - start_time
         logger.info(
-            f"📤 {request.method} {request.url.path} - Status: {response.status_code} - Time: {process_time:.3f}s")
+            "📤 %s %s - Status: %s - Time: %.3fs", request.method, request.url.path, response.status_code, process_time)
 
         response.headers["X-Process-Time"] = str(process_time)
 
@@ -224,20 +288,19 @@ async def log_requests(request, call_next):
 
     except Exception as e:
         process_time = __import__('time').time() - start_time
-        logger.error(f"💥 {request.method} {request.url.path} - Error: {str(e)} - Time: {process_time:.3f}s")
+        logger.error("💥 %s %s - Error: %s - Time: %.3fs", request.method, request.url.path, e, process_time)
         raise
 
 
 if __name__ == "__main__":
-    import uvicorn
+    from shared.serving import serve
 
     logger.info("🚀 Starting cash-register application...")
 
-    uvicorn.run(
+    serve(
         settings.CASH_REGISTER_PATH,
         host=settings.CASH_REGISTER_HOST,
         port=settings.CASH_REGISTER_PORT,
         reload=settings.DEBUG,
-        log_level="info",
-        access_log=True,
+        logger=logger,
     )
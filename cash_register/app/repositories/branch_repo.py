@@ -7,8 +7,10 @@ from sqlalchemy.orm import Session
 from shared.database.exceptions import DatabaseError
 from shared.database.logger import logger
 from shared.database.models import Branch
+from shared.metrics import instrument_repository
 
 
+@instrument_repository("branch_repo")
 class BranchRepository:
     """
     Repository for managing supermarket branch data.
@@ -37,10 +39,10 @@ class BranchRepository:
             stmt = select(Branch)
             result = self.db.execute(stmt)
             branches = result.scalars().all()
-            logger.info(f"Retrieved {len(branches)} branches")
+            logger.debug("Retrieved %s branches", len(branches))
             return branches
         except SQLAlchemyError as e:
-            logger.error(f"Error retrieving branches: {e}")
+            logger.error("Error retrieving branches: %s", e)
             raise DatabaseError(f"Failed to retrieve branches: {e}")
 
     def get_branch_by_id(self, branch_id: str) -> Optional[Branch]:
@@ -59,11 +61,11 @@ class BranchRepository:
         try:
             branch = self.db.get(Branch, branch_id)
             if not branch:
-                logger.warning(f"Branch not found: {branch_id}")
+                logger.warning("Branch not found: %s", branch_id)
                 return None
             return branch
         except SQLAlchemyError as e:
-            logger.error(f"Error retrieving branch {branch_id}: {e}")
+            logger.error("Error retrieving branch %s: %s", branch_id, e)
             raise DatabaseError(f"Failed to retrieve branch: {e}")
 
     def get_or_create_branch(self, branch_id: str) -> Branch:
@@ -87,9 +89,9 @@ class BranchRepository:
             branch = Branch(id=branch_id)
             self.db.add(branch)
             self.db.commit()
-            logger.info(f"Created new branch: {branch_id}")
+            logger.info("Created new branch: %s", branch_id)
             return branch
         except SQLAlchemyError as e:
             self.db.rollback()
-            logger.error(f"Error creating branch {branch_id}: {e}")
+            logger.error("Error creating branch %s: %s", branch_id, e)
             raise DatabaseError(f"Failed to create branch: {e}")
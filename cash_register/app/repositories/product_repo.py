@@ -8,8 +8,10 @@ from cash_register.app.exceptions import ProductNotFoundError
 from shared.database.exceptions import DatabaseError
 from shared.database.logger import logger
 from shared.database.models import Product
+from shared.metrics import instrument_repository
 
 
+@instrument_repository("product_repo")
 class ProductRepository:
     """
     Repository for managing product data.
@@ -38,10 +40,10 @@ class ProductRepository:
             stmt = select(Product)
             result = self.db.execute(stmt)
             products = result.scalars().all()
-            logger.info(f"Retrieved {len(products)} products")
+            logger.debug("Retrieved %s products", len(products))
             return products
         except SQLAlchemyError as e:
-            logger.error(f"Error retrieving products: {e}")
+            logger.error("Error retrieving products: %s", e)
             raise DatabaseError(f"Failed to retrieve products: {e}")
 
     def get_product_by_name(self, product_name: str) -> Optional[Product]:
@@ -62,11 +64,11 @@ class ProductRepository:
             result = self.db.execute(stmt)
             product = result.scalars().first()
             if not product:
-                logger.warning(f"Product not found: {product_name}")
+                logger.warning("Product not found: %s", product_name)
                 return None
             return product
         except SQLAlchemyError as e:
-            logger.error(f"Error retrieving product {product_name}: {e}")
+            logger.error("Error retrieving product %s: %s", product_name, e)
             raise DatabaseError(f"Failed to retrieve product: {e}")
 
     def get_products_by_names(self, product_names: List[str]) -> List[Product]:
@@ -93,25 +95,25 @@ class ProductRepository:
             found_names = {p.product_name for p in products}
             missing_names = set(product_names) - found_names
             if missing_names:
-                logger.error(f"Products not found: {missing_names}")
+                logger.error("Products not found: %s", missing_names)
                 raise ProductNotFoundError(f"Products not found: {', '.join(missing_names)}")
 
-            logger.info(f"Retrieved {len(products)} products by names")
+            logger.debug("Retrieved %s products by names", len(products))
             return products
         except ProductNotFoundError:
             # re-raise domain exception
             raise
         except SQLAlchemyError as e:
-            logger.error(f"Error retrieving products by names: {e}")
+            logger.error("Error retrieving products by names: %s", e)
             raise DatabaseError(f"Failed to retrieve products: {e}")
 
-    def get_or_create_product(self, product_name: str, unit_price: float) -> Product:
+    def get_or_create_product(self, product_name: str, unit_price_cents: int) -> Product:
         """
         Get an existing product or create a new one if it doesn't exist.
 
         Args:
             product_name: Name of the product
-            unit_price: Price per unit of the product
+            unit_price_cents: Price per unit of the product, in cents
 
         Returns:
             Product: The existing or newly created product
@@ -124,12 +126,12 @@ class ProductRepository:
             if existing:
                 return existing
 
-            product = Product(product_name=product_name, unit_price=unit_price)
+            product = Product(product_name=product_name, unit_price_cents=unit_price_cents)
             self.db.add(product)
             self.db.commit()
-            logger.info(f"Created new product: {product_name}")
+            logger.info("Created new product: %s", product_name)
             return product
         except SQLAlchemyError as e:
             self.db.rollback()
-            logger.error(f"Error creating product {product_name}: {e}")
+            logger.error("Error creating product %s: %s", product_name, e)
             raise DatabaseError(f"Failed to create product: {e}")
@@ -7,11 +7,16 @@ from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session, selectinload
 
 from cash_register.app.exceptions import BranchNotFoundError, UserNotFoundError, PurchaseCreationError
+from cash_register.app.repositories.user_stats_repo import UserStatsRepository
 from shared.database.exceptions import DatabaseError
+from shared.database.ids import uuid7
 from shared.database.logger import logger
 from shared.database.models import Product, Purchase, PurchaseItem
+from shared.metrics import PURCHASES, instrument_repository
+from shared.tracing import span
 
 
+@instrument_repository("purchase_repo")
 class PurchaseRepository:
     """
     Repository for managing purchase transactions.
@@ -21,17 +26,19 @@ class PurchaseRepository:
 
     Attributes:
         db: SQLAlchemy session for database operations
+        stats_repo: Repository for per-customer purchase summaries
     """
 
     def __init__(self, db: Session):
         self.db = db
+        self.stats_repo = UserStatsRepository(db)
 
     def create_purchase(
             self,
             supermarket_id: str,
             user_id: UUID,
             products: List[Product],
-            total_amount: float,
+            total_amount_cents: int,
             timestamp: datetime = None,
     ) -> Purchase:
         """
@@ -41,7 +48,7 @@ class PurchaseRepository:
             supermarket_id: ID of the branch where the purchase occurred
             user_id: ID of the customer making the purchase
             products: List of products being purchased
-            total_amount: Total amount of the purchase
+            total_amount_cents: Total amount of the purchase, in cents
             timestamp: Optional timestamp for the purchase (defaults to current time)
 
         Returns:
@@ -54,40 +61,47 @@ class PurchaseRepository:
             DatabaseError: If there's a database error
         """
         try:
-            # Create the purchase record
+            timestamp = timestamp or datetime.utcnow()
+
+            # The id is generated here (time-ordered), so items can reference it without a flush
             purchase = Purchase(
+                id=uuid7(),
                 supermarket_id=supermarket_id,
                 user_id=user_id,
-                timestamp=timestamp or datetime.utcnow(),
+                timestamp=timestamp,
                 items_list=", ".join(p.product_name for p in products),
-                total_amount=total_amount
+                total_amount_cents=total_amount_cents
             )
             self.db.add(purchase)
-            self.db.flush()  # Flush to get the purchase ID
 
             # Create purchase items for each product
             for product in products:
                 purchase_item = PurchaseItem(
                     purchase_id=purchase.id,
                     product_id=product.id,
-                    unit_price=product.unit_price,
+                    unit_price_cents=product.unit_price_cents,
                     quantity=1
                 )
                 self.db.add(purchase_item)
 
+            # Keep the customer summary in the same transaction as the purchase
+            self.stats_repo.record_purchase(user_id, products, total_amount_cents, timestamp)
+
             # Commit the transaction
-            self.db.commit()
-            logger.info(f"Created purchase {purchase.id} with {len(products)} items")
+            with span("db.commit"):
+                self.db.commit()
+            PURCHASES.inc(supermarket_id)
+            logger.debug("Created purchase %s with %s items", purchase.id, len(products))
             return purchase
 
-        except (BranchNotFoundError, UserNotFoundError):
+        except (BranchNotFoundError, UserNotFoundError, DatabaseError):
             # Rollback on domain errors
             self.db.rollback()
             raise
         except SQLAlchemyError as e:
             # Rollback on database errors
             self.db.rollback()
-            logger.error(f"Error creating purchase: {e}")
+            logger.error("Error creating purchase: %s", e)
             raise PurchaseCreationError(f"Failed to create purchase: {e}")
 
     def get_purchase_by_id(self, purchase_id: UUID) -> Optional[Purchase]:
@@ -115,10 +129,10 @@ class PurchaseRepository:
             purchase = result.scalars().first()
 
             if not purchase:
-                logger.warning(f"Purchase not found: {purchase_id}")
+                logger.warning("Purchase not found: %s", purchase_id)
                 return None
 
             return purchase
         except SQLAlchemyError as e:
-            logger.error(f"Error retrieving purchase {purchase_id}: {e}")
+            logger.error("Error retrieving purchase %s: %s", purchase_id, e)
             raise DatabaseError(f"Failed to retrieve purchase: {e}")
@@ -0,0 +1,113 @@
+from datetime import datetime
+from typing import List
+from uuid import UUID
+
+from sqlalchemy import func, case
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from shared.database.exceptions import DatabaseError
+from shared.database.logger import logger
+from shared.database.models import Product, UserStats, UserProductStats
+from shared.metrics import instrument_repository
+
+
+@instrument_repository("user_stats_repo")
+class UserStatsRepository:
+    """
+    Repository for maintaining per-customer purchase summaries.
+
+    Keeps the user_stats and user_product_stats tables in sync with the purchases
+    table. Methods only flush; the caller owns the
+    transaction so the summary is committed atomically with the purchase.
+
+    Attributes:
+        db: SQLAlchemy session for database operations
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def record_purchase(
+            self,
+            user_id: UUID,
+            products: List[Product],
+            total_amount_cents: int,
+            timestamp: datetime,
+    ) -> None:
+        """
+        Apply a single purchase to the customer's summary.
+
+        Runs two statements regardless of how many purchases the customer already
+        has: one upsert for the purchased products and one for the customer row.
+        Both only lock rows of this customer, so purchases of different customers
+        do not wait on each other.
+
+        Args:
+            user_id: ID of the customer making the purchase
+            products: Products included in the purchase
+            total_amount_cents: Total amount of the purchase, in cents
+            timestamp: When the purchase was made
+
+        Raises:
+            DatabaseError: If there's an error updating the summary
+        """
+        try:
+            favorite_id, favorite_count = self._add_product_quantities(user_id, products)
+
+            stmt = insert(UserStats).values(
+                user_id=user_id,
+                purchase_count=1,
+                total_spent_cents=total_amount_cents,
+                first_purchase_at=timestamp,
+                last_purchase_at=timestamp,
+                favorite_product_id=favorite_id,
+                favorite_product_count=favorite_count,
+            )
+            overtakes = stmt.excluded.favorite_product_count > UserStats.favorite_product_count
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[UserStats.user_id],
+                set_={
+                    "purchase_count": UserStats.purchase_count + 1,
+                    "total_spent_cents": UserStats.total_spent_cents + stmt.excluded.total_spent_cents,
+                    "first_purchase_at": func.least(UserStats.first_purchase_at, stmt.excluded.first_purchase_at),
+                    "last_purchase_at": func.greatest(UserStats.last_purchase_at, stmt.excluded.last_purchase_at),
+                    "favorite_product_id": case(
+                        (overtakes, stmt.excluded.favorite_product_id),
+                        else_=UserStats.favorite_product_id
+                    ),
+                    "favorite_product_count": func.greatest(
+                        UserStats.favorite_product_count, stmt.excluded.favorite_product_count
+                    ),
+                },
+            )
+            self.db.execute(stmt)
+            self.db.flush()
+        except SQLAlchemyError as e:
+            logger.error("Error updating stats for user %s: %s", user_id, e)
+            raise DatabaseError(f"Failed to update user stats: {e}")
+
+    def _add_product_quantities(self, user_id: UUID, products: List[Product]) -> tuple[UUID | None, int]:
+        """
+        Add one unit of each purchased product to the customer's per-product totals.
+
+        Returns:
+            The purchased product with the highest running total and that total
+        """
+        if not products:
+            return None, 0
+
+        # Upsert in key order, so concurrent purchases of the same customer lock rows in the same order
+        stmt = insert(UserProductStats).values([
+            {"user_id": user_id, "product_id": product_id, "quantity": 1}
+            for product_id in sorted(product.id for product in products)
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[UserProductStats.user_id, UserProductStats.product_id],
+            set_={"quantity": UserProductStats.quantity + stmt.excluded.quantity},
+        ).returning(UserProductStats.product_id, UserProductStats.quantity)
+        rows = self.db.execute(stmt).all()
+
+        product_id, quantity = max(rows, key=lambda row: row.quantity)
+        return product_id, quantity
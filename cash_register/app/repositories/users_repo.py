@@ -1,14 +1,18 @@
 from typing import Optional
-from uuid import UUID, uuid4
+from uuid import UUID
 
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
 from shared.database.exceptions import DatabaseError
+from shared.database.ids import uuid7
 from shared.database.logger import logger
 from shared.database.models import User
+from shared.metrics import instrument_repository
+from shared.tracing import span
 
 
+@instrument_repository("users_repo")
 class UsersRepository:
     """
     Repository for managing user data.
@@ -40,7 +44,7 @@ class UsersRepository:
             user = self.db.get(User, user_id)
             return user
         except SQLAlchemyError as e:
-            logger.error(f"Error retrieving user {user_id}: {e}")
+            logger.error("Error retrieving user %s: %s", user_id, e)
             raise DatabaseError(f"Failed to retrieve user: {e}")
 
     def create_user(self) -> User:
@@ -53,16 +57,17 @@ class UsersRepository:
         Raises:
             DatabaseError: If there's an error creating the user
         """
-        user_id = uuid4()
+        user_id = uuid7()
         try:
             user = User(id=user_id)
             self.db.add(user)
-            self.db.commit()
-            logger.info(f"Created new user: {user_id}")
+            with span("db.commit"):
+                self.db.commit()
+            logger.info("Created new user: %s", user_id)
             return user
         except SQLAlchemyError as e:
             self.db.rollback()
-            logger.error(f"Error creating user {user_id}: {e}")
+            logger.error("Error creating user %s: %s", user_id, e)
             raise DatabaseError(f"Failed to create user: {e}")
 
     def get_or_create_user(self, user_id: UUID = None) -> User:
@@ -84,14 +89,15 @@ class UsersRepository:
                 if user:
                     return user
             else:
-                user_id = uuid4()
+                user_id = uuid7()
 
             user = User(id=user_id)
             self.db.add(user)
-            self.db.commit()
-            logger.info(f"Created new user: {user_id}")
+            with span("db.commit"):
+                self.db.commit()
+            logger.info("Created new user: %s", user_id)
             return user
         except SQLAlchemyError as e:
             self.db.rollback()
-            logger.error(f"Error creating user {user_id}: {e}")
+            logger.error("Error creating user %s: %s", user_id, e)
             raise DatabaseError(f"Failed to create user: {e}")
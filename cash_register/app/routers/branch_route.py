@@ -12,13 +12,15 @@ from cash_register.app.dependencies import get_branch_service
 from cash_register.app.logger import logger
 from cash_register.app.schemas.branch import BranchResponse
 from cash_register.app.services.branch_service import BranchService
+from shared.admission import Priority, admit
 from shared.database.exceptions import DatabaseError
+from shared.tracing import TracedRoute
 
-router = APIRouter()
+router = APIRouter(route_class=TracedRoute, dependencies=[Depends(admit(Priority.NORMAL))])
 
 
 @router.get("/", response_model=List[BranchResponse], summary="List all branches")
-async def get_branches(
+def get_branches(
         branch_service: BranchService = Depends(get_branch_service)
 ) -> List[BranchResponse]:
     """
@@ -32,16 +34,16 @@ async def get_branches(
     """
     try:
         branches = branch_service.list_branches()
-        logger.info(f"Retrieved {len(branches)} branches")
+        logger.debug("Retrieved %s branches", len(branches))
         return branches
     except DatabaseError as e:
-        logger.error(f"Database error retrieving branches: {str(e)}")
+        logger.error("Database error retrieving branches: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to retrieve branches"
         )
     except Exception as e:
-        logger.error(f"Unexpected error retrieving branches: {str(e)}")
+        logger.error("Unexpected error retrieving branches: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error"
@@ -12,13 +12,15 @@ from cash_register.app.dependencies import get_product_service
 from cash_register.app.logger import logger
 from cash_register.app.schemas.product import ProductResponse
 from cash_register.app.services.product_service import ProductService
+from shared.admission import Priority, admit
 from shared.database.exceptions import DatabaseError
+from shared.tracing import TracedRoute
 
-router = APIRouter()
+router = APIRouter(route_class=TracedRoute, dependencies=[Depends(admit(Priority.NORMAL))])
 
 
 @router.get("/", response_model=List[ProductResponse], summary="List all products")
-async def get_products(
+def get_products(
         product_service: ProductService = Depends(get_product_service)
 ) -> List[ProductResponse]:
     """
@@ -32,16 +34,16 @@ async def get_products(
     """
     try:
         products = product_service.list_products()
-        logger.info(f"Retrieved {len(products)} products")
+        logger.debug("Retrieved %s products", len(products))
         return products
     except DatabaseError as e:
-        logger.error(f"Database error retrieving products: {str(e)}")
+        logger.error("Database error retrieving products: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to retrieve products"
         )
     except Exception as e:
-        logger.error(f"Unexpected error retrieving products: {str(e)}")
+        logger.error("Unexpected error retrieving products: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error"
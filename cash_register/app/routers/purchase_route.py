@@ -12,9 +12,11 @@ from cash_register.app.exceptions import InvalidPurchaseDataError, ProductNotFou
 from cash_register.app.logger import logger
 from cash_register.app.schemas.purchase import PurchaseResponse, PurchaseCreate
 from cash_register.app.services.register_service import RegisterService
+from shared.admission import Priority, admit
 from shared.database.exceptions import DatabaseError
+from shared.tracing import TracedRoute
 
-router = APIRouter()
+router = APIRouter(route_class=TracedRoute, dependencies=[Depends(admit(Priority.CRITICAL))])
 
 
 @router.post(
@@ -23,7 +25,7 @@ router = APIRouter()
     status_code=status.HTTP_201_CREATED,
     summary="Create a new purchase"
 )
-async def create_purchase(
+def create_purchase(
         purchase_data: PurchaseCreate,
         register_service: RegisterService = Depends(get_purchase_service)
 ) -> PurchaseResponse:
@@ -42,7 +44,7 @@ async def create_purchase(
     """
     try:
         purchase = register_service.create_purchase(purchase_data)
-        logger.info(f"Created purchase {purchase.id} for supermarket {purchase.supermarket_id}")
+        logger.debug("Created purchase %s for supermarket %s", purchase.id, purchase.supermarket_id)
         return purchase
     except (BranchNotFoundError, PurchaseCreationError, InvalidPurchaseDataError) as err:
         raise HTTPException(
@@ -50,19 +52,19 @@ async def create_purchase(
             detail=err.message
         )
     except ProductNotFoundError as e:
-        logger.warning(f"Product not found: {str(e)}")
+        logger.warning("Product not found: %s", e)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Product not found"
         )
     except DatabaseError as e:
-        logger.error(f"Database error creating purchase: {str(e)}")
+        logger.error("Database error creating purchase: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to create purchase"
         )
     except Exception as e:
-        logger.error(f"Unexpected error creating purchase: {str(e)}")
+        logger.error("Unexpected error creating purchase: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error"
@@ -7,8 +7,10 @@ from cash_register.app.logger import logger
 from cash_register.app.repositories.branch_repo import BranchRepository
 from cash_register.app.schemas.branch import BranchResponse
 from shared.database.exceptions import DatabaseError
+from shared.tracing import trace_methods
 
 
+@trace_methods("BranchService")
 class BranchService:
     """
     Service for managing supermarket branches.
@@ -36,9 +38,9 @@ class BranchService:
         """
         try:
             branches = self.repo.get_branches()
-            logger.info(f"Retrieved {len(branches)} branches")
+            logger.info("Retrieved %s branches", len(branches))
 
             return [BranchResponse(id=branch.id) for branch in branches]
         except SQLAlchemyError as e:
-            logger.error(f"Error retrieving branches: {e}")
+            logger.error("Error retrieving branches: %s", e)
             raise DatabaseError(f"Failed to retrieve branches: {e}")
@@ -7,8 +7,11 @@ from cash_register.app.logger import logger
 from cash_register.app.repositories.product_repo import ProductRepository
 from cash_register.app.schemas.product import ProductResponse
 from shared.database.exceptions import DatabaseError
+from shared.money import from_cents
+from shared.tracing import trace_methods
 
 
+@trace_methods("ProductService")
 class ProductService:
     """
     Service for managing supermarket products.
@@ -36,16 +39,16 @@ class ProductService:
         """
         try:
             products = self.repo.get_products()
-            logger.info(f"Retrieved {len(products)} products")
+            logger.info("Retrieved %s products", len(products))
 
             return [
                 ProductResponse(
                     id=product.id,
                     product_name=product.product_name,
-                    unit_price=float(product.unit_price)
+                    unit_price=from_cents(product.unit_price_cents)
                 )
                 for product in products
             ]
         except SQLAlchemyError as e:
-            logger.error(f"Error retrieving products: {e}")
+            logger.error("Error retrieving products: %s", e)
             raise DatabaseError(f"Failed to retrieve products: {e}")
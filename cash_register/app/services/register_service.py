@@ -11,11 +11,14 @@ from cash_register.app.schemas.purchase import PurchaseCreate, PurchaseResponse
 from cash_register.app.schemas.purchase_item import PurchaseItemResponse
 from shared.database.exceptions import DatabaseError
 from shared.database.logger import logger
+from shared.money import from_cents
+from shared.tracing import trace_methods
 from ..repositories.branch_repo import BranchRepository
 from ..repositories.product_repo import ProductRepository
 from ..repositories.users_repo import UsersRepository
 
 
+@trace_methods("RegisterService")
 class RegisterService:
     """
     Service for managing purchase transactions.
@@ -62,7 +65,7 @@ class RegisterService:
         if not items:
             raise InvalidPurchaseDataError("No items provided in purchase")
 
-        logger.info(f"Starting purchase creation for branch {supermarket_id}")
+        logger.debug("Starting purchase creation for branch %s", supermarket_id)
 
         branch = self.branch_repo.get_branch_by_id(supermarket_id)
         if not branch:
@@ -83,39 +86,39 @@ class RegisterService:
             missing = set(product_names) - {p.product_name for p in products}
             raise ProductNotFoundError(f"Products not found: {', '.join(missing)}")
 
-        total_calc = sum(float(p.unit_price) for p in products)
+        total_cents = sum(p.unit_price_cents for p in products)
         try:
             purchase = self.purchase_repo.create_purchase(
                 supermarket_id=branch.id,
                 user_id=user.id,
                 products=products,
-                total_amount=total_calc,
+                total_amount_cents=total_cents,
                 timestamp=purchase_data.timestamp or datetime.utcnow()
             )
         except SQLAlchemyError as e:
-            logger.error(f"Database error during purchase creation: {e}")
+            logger.error("Database error during purchase creation: %s", e)
             raise PurchaseCreationError(f"Failed to create purchase: {e}")
         except Exception as e:
-            logger.error(f"Unexpected error during purchase creation: {e}")
+            logger.error("Unexpected error during purchase creation: %s", e)
             raise PurchaseCreationError(f"Failed to create purchase: {e}")
 
         created = self.purchase_repo.get_purchase_by_id(purchase.id)
         if not created:
             raise PurchaseCreationError("Purchase created but cannot retrieve it")
 
-        logger.info(f"Purchase created successfully: {purchase.id}")
+        logger.info("Purchase created successfully: %s", purchase.id)
 
         return PurchaseResponse(
             id=created.id,
             supermarket_id=created.supermarket_id,
             user_id=created.user_id,
             timestamp=created.timestamp,
-            total_amount=float(created.total_amount),
+            total_amount=from_cents(created.total_amount_cents),
             items=[
                 PurchaseItemResponse(
                     product_id=pi.product.id,
                     product_name=pi.product.product_name,
-                    unit_price=float(pi.unit_price),
+                    unit_price=from_cents(pi.unit_price_cents),
                     quantity=pi.quantity
                 ) for pi in created.purchase_items
             ]
@@ -1,12 +1,25 @@
+import argparse
+import hashlib
+import io
 import logging
+import multiprocessing
 import os
 import sys
-import uuid
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+from typing import Iterator, Optional
 
+import numpy as np
 import pandas as pd
+from sqlalchemy import func, table, column
+from sqlalchemy.dialects.postgresql import insert
 
 from shared.database import SessionLocal
-from shared.database.models import Product, Branch, User, Purchase, PurchaseItem
+from shared.database.jobs.rebuild_user_stats import add_purchases_to_user_stats, rebuild_user_stats
+from shared.database.models import Product, Branch, User, Purchase, PurchaseItem, IngestWatermark
+from shared.money import CENTS_PER_UNIT
 
 # Configure logging
 logging.basicConfig(
@@ -18,6 +31,26 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+UUID_PATTERN = r"[0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{12}"
+CHUNK_ROWS = 200_000
+PARSE_WORKERS = os.cpu_count() or 1
+LOADER_CONNECTIONS = 3
+# BLAKE2b personalization of the purchase id hash; changing it changes every derived purchase id
+PURCHASE_ID_PERSON = b"icash-purchase"
+PURCHASE_ID_HASH_BYTES = 10
+PURCHASE_KEY_SEPARATOR = "\x1f"
+HEAD_FINGERPRINT_BYTES = 4096
+EPOCH = pd.Timestamp(0, tz="UTC")
+
+
+class SourceReplacedError(Exception):
+    """A source file no longer matches the watermark of its previous load."""
+
+
+def amounts_to_cents(amount: pd.Series) -> pd.Series:
+    """Convert finite amounts in currency units to integer cents, rounding to the nearest cent."""
+    return pd.Series(np.rint(amount.to_numpy(dtype=float) * CENTS_PER_UNIT).astype(np.int64), index=amount.index)
+
 
 def load_products_bulk(session, csv_path: str) -> None:
     """
@@ -46,6 +79,7 @@ def load_products_bulk(session, csv_path: str) -> None:
         df["unit_price"] = pd.to_numeric(df["unit_price"], errors="coerce")
         df = df.dropna(subset=["unit_price"])
         df = df[df["unit_price"] >= 0]
+        df["unit_price_cents"] = amounts_to_cents(df["unit_price"])
 
         # Remove duplicates
         df = df.drop_duplicates(subset=["product_name"])
@@ -67,13 +101,7 @@ def load_products_bulk(session, csv_path: str) -> None:
             return
 
         # Prepare bulk insert data
-        products_data = [
-            {
-                "product_name": row["product_name"],
-                "unit_price": row["unit_price"]
-            }
-            for _, row in new_products_df.iterrows()
-        ]
+        products_data = new_products_df[["product_name", "unit_price_cents"]].to_dict("records")
 
         # Bulk insert using SQLAlchemy bulk_insert_mappings
         session.bulk_insert_mappings(Product, products_data)
@@ -87,9 +115,321 @@ def load_products_bulk(session, csv_path: str) -> None:
         raise
 
 
-def load_purchases_bulk(session, csv_path: str) -> None:
+class LoadReport:
+    """Accumulates row counts and timings per loading phase for the final throughput report."""
+
+    def __init__(self):
+        self.rows = {}
+        self.seconds = {}
+
+    def add(self, phase: str, rows: int, seconds: float) -> None:
+        self.rows[phase] = self.rows.get(phase, 0) + rows
+        self.seconds[phase] = self.seconds.get(phase, 0.0) + seconds
+
+    def log(self, wall_seconds: float) -> None:
+        """Log busy time per phase (summed over workers) and overall wall-clock throughput."""
+        for phase, rows in self.rows.items():
+            seconds = self.seconds[phase]
+            rate = rows / seconds if seconds > 0 else float("inf")
+            logger.info(f"{phase:<10} {rows:>12,} rows in {seconds:8.2f}s busy ({rate:,.0f} rows/s)")
+        source_rows = self.rows.get("read", 0)
+        logger.info(f"{'total':<10} {source_rows:>12,} rows in {wall_seconds:8.2f}s wall "
+                    f"({source_rows / max(wall_seconds, 1e-9):,.0f} rows/s)")
+
+
+def purchase_uuid_hex(key: pd.DataFrame, unix_ms: np.ndarray) -> np.ndarray:
+    """
+    Derive a deterministic, time-ordered purchase id from the identifying columns of each row.
+
+    The ids have the UUIDv7 layout (see shared.database.ids): the purchase time in
+    milliseconds comes first, so purchases are indexed in time order, and the
+    remaining bytes come from a BLAKE2b hash (10-byte digest, personalization
+    PURCHASE_ID_PERSON) of the row's key columns as strings, joined with U+001F
+    and encoded as UTF-8. They are returned as 32-character hex strings. The hash
+    does not depend on the pandas or NumPy version, so the same purchase gets the
+    same id on every run, and loading it again is a primary key conflict rather
+    than a duplicate.
+
+    Args:
+        key: Identifying columns as strings, one row per purchase
+        unix_ms: Purchase time in milliseconds since the Unix epoch, per row
+    """
+    count = len(key)
+    rows = key.iloc[:, 0].str.cat(key.iloc[:, 1:], sep=PURCHASE_KEY_SEPARATOR)
+    digests = b"".join(
+        hashlib.blake2b(row.encode(), digest_size=PURCHASE_ID_HASH_BYTES, person=PURCHASE_ID_PERSON).digest()
+        for row in rows
+    )
+    raw = np.zeros((count, 16), dtype=np.uint8)
+    raw[:, 16 - PURCHASE_ID_HASH_BYTES:] = np.frombuffer(digests, np.uint8).reshape(count, PURCHASE_ID_HASH_BYTES)
+    timestamp = np.clip(np.asarray(unix_ms, dtype=np.int64), 0, None).astype(">u8")
+    raw[:, :6] = timestamp.view(np.uint8).reshape(count, 8)[:, 2:]
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x70
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80
+    return np.frombuffer(raw.tobytes().hex().encode(), dtype="S32").astype(str)
+
+
+def prepare_purchases(df: pd.DataFrame, products: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Validate raw purchase rows and explode them into purchase and purchase item frames.
+
+    All checks run column-wise; rows failing any of them are dropped and counted.
+
+    Args:
+        df: Raw purchases CSV rows (all columns as strings)
+        products: Product id and unit price in cents indexed by product name
+
+    Returns:
+        Purchases frame (id, supermarket_id, user_id, timestamp, items_list, total_amount_cents)
+        and purchase items frame (purchase_id, product_id, quantity, unit_price_cents), both
+        indexed by the source row
+    """
+    received = len(df)
+    df = df.dropna(subset=["supermarket_id", "timestamp", "user_id", "items_list", "total_amount"])
+
+    supermarket_id = df["supermarket_id"].str.strip()
+    user_id = df["user_id"].str.strip().str.lower()
+    timestamp = df["timestamp"].str.strip()
+    amount = pd.to_numeric(df["total_amount"].str.strip(), errors="coerce")
+    # Naive timestamps are taken as UTC
+    parsed_timestamp = pd.to_datetime(timestamp, errors="coerce", format="ISO8601", utc=True)
+
+    valid = (
+        (supermarket_id != "")
+        & user_id.str.fullmatch(UUID_PATTERN)
+        & parsed_timestamp.notna()
+        & np.isfinite(amount) & (amount >= 0)
+    )
+
+    # One row per (purchase row, product name), indexed by the purchase row label
+    names = df["items_list"].str.split(",").explode().str.strip()
+    # Few distinct product names: categorical lookups only touch each name once
+    names = names[names.notna() & (names != "")].astype("category")
+    known = names.isin(products.index)
+    repeated = pd.DataFrame({"row": names.index, "name": names.cat.codes.to_numpy()}).duplicated().to_numpy()
+    per_row = pd.Series(known.to_numpy() & ~repeated, index=names.index).groupby(level=0).all()
+    valid &= per_row.reindex(df.index, fill_value=False)
+
+    rejected = received - int(valid.sum())
+    df = df[valid]
+    names = names[names.index.isin(df.index)]
+    logger.info(f"Validated {len(df)} of {received} purchase rows ({rejected} rejected)")
+
+    # Canonical hyphenated form, so ids compare equal to the ones already stored
+    hex_id = user_id[valid].str.replace("-", "", regex=False)
+    purchases = pd.DataFrame({
+        "supermarket_id": supermarket_id[valid],
+        "user_id": (hex_id.str[:8] + "-" + hex_id.str[8:12] + "-" + hex_id.str[12:16] + "-"
+                    + hex_id.str[16:20] + "-" + hex_id.str[20:]),
+        "timestamp": timestamp[valid],
+        "items_list": df["items_list"].str.replace(r"[\s,]*,[\s,]*", ", ", regex=True).str.strip(" ,"),
+        "total_amount_cents": amounts_to_cents(amount[valid]),
+    })
+    unix_us = (parsed_timestamp[valid] - EPOCH) // pd.Timedelta(microseconds=1)
+    # Branch, canonical user id, the instant in microseconds (not its spelling) and normalized items
+    key = purchases[["supermarket_id", "user_id"]].assign(
+        timestamp=unix_us.astype(str), items_list=purchases["items_list"]
+    )
+    purchase_ids = pd.Series(purchase_uuid_hex(key, (unix_us // 1000).to_numpy()), index=purchases.index)
+    purchases.insert(0, "id", purchase_ids)
+
+    items = pd.DataFrame({
+        "purchase_id": purchase_ids.reindex(names.index),
+        "product_id": names.map(products["id"]).astype(str),
+        "quantity": 1,
+        "unit_price_cents": names.map(products["unit_price_cents"]).astype(np.int64),
+    })
+    return purchases, items
+
+
+def copy_dataframe(cursor, table: str, df: pd.DataFrame) -> None:
+    """
+    Stream a DataFrame into a table with COPY FROM STDIN (CSV format).
+
+    Columns are matched by name, so the frame must only contain table columns.
+    """
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY {table} ({', '.join(df.columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+
+def read_csv_chunks(csv_path: str, chunk_rows: int, start_offset: int = 0) -> Iterator[tuple[pd.DataFrame, int]]:
+    """
+    Read a CSV file in chunks of whole lines, starting at a byte offset.
+
+    Yields each chunk as a DataFrame of strings together with the byte offset just
+    past its last line, which is where a later run can resume. Fields must not
+    contain embedded newlines.
+    """
+    with open(csv_path, "rb") as f:
+        header = f.readline()
+        columns = pd.read_csv(io.BytesIO(header), dtype=str, nrows=0, encoding="utf-8-sig").columns
+        offset = max(start_offset, f.tell())
+        f.seek(offset)
+        while lines := list(islice(f, chunk_rows)):
+            offset += sum(map(len, lines))
+            chunk = pd.read_csv(io.BytesIO(b"".join(lines)), names=columns, header=None, dtype=str)
+            yield chunk, offset
+
+
+def _head_sha256(csv_path: str, length: int) -> str:
+    """Fingerprint the first `length` bytes of a file."""
+    with open(csv_path, "rb") as f:
+        return hashlib.sha256(f.read(length)).hexdigest()
+
+
+def read_watermark(session, source: str, csv_path: str, force: bool = False) -> tuple[int, int]:
+    """
+    Return the byte offset and row count to resume loading a source file from.
+
+    A new file starts from the beginning. A file that is shorter than the
+    watermark or no longer begins with the bytes it had when the watermark was
+    written is only read again from the beginning with `force`: purchase ids
+    depend on how the loader derived them, so rows loaded by an earlier version
+    may be inserted a second time.
+
+    Raises:
+        SourceReplacedError: If the file changed since the last run and `force` is not set
+    """
+    watermark = session.get(IngestWatermark, source)
+    if watermark is None:
+        return 0, 0
+
+    length = min(watermark.byte_offset, HEAD_FINGERPRINT_BYTES)
+    if (os.path.getsize(csv_path) < watermark.byte_offset
+            or _head_sha256(csv_path, length) != watermark.head_sha256):
+        if not force:
+            raise SourceReplacedError(
+                f"{source} changed since {watermark.rows_processed} rows of it were loaded; "
+                f"pass --force to read it from the beginning"
+            )
+        logger.warning(f"{source} was replaced since the last run, reading it from the beginning")
+        return 0, 0
+    return watermark.byte_offset, watermark.rows_processed
+
+
+def save_watermark(session, source: str, csv_path: str, byte_offset: int, rows_processed: int) -> None:
+    """Persist how far a source file has been loaded."""
+    stmt = insert(IngestWatermark).values(
+        source=source,
+        byte_offset=byte_offset,
+        rows_processed=rows_processed,
+        head_sha256=_head_sha256(csv_path, min(byte_offset, HEAD_FINGERPRINT_BYTES)),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[IngestWatermark.source],
+        set_={
+            "byte_offset": stmt.excluded.byte_offset,
+            "rows_processed": stmt.excluded.rows_processed,
+            "head_sha256": stmt.excluded.head_sha256,
+            "updated_at": func.now(),
+        },
+    )
+    session.execute(stmt)
+    session.commit()
+
+
+def _parse_chunk(chunk: pd.DataFrame, products: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame, float]:
+    """Parse one CSV chunk in a worker process, returning its frames and the time spent."""
+    started = time.perf_counter()
+    purchases, items = prepare_purchases(chunk, products)
+    return purchases, items, time.perf_counter() - started
+
+
+def _copy_ignoring_existing(cursor, table: str, df: pd.DataFrame, returning: Optional[str] = None) -> int:
+    """
+    COPY a frame into a transaction-scoped staging table, then move only rows whose
+    key is not in `table` yet. Returns the number of rows inserted.
+
+    With `returning`, that column of the inserted rows is also kept in the
+    transaction-scoped table `{table}_inserted`.
+    """
+    staging = f"{table}_staging"
+    cursor.execute(f"CREATE TEMP TABLE {staging} (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP")
+    copy_dataframe(cursor, staging, df)
+    columns = ", ".join(df.columns)
+    stmt = f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {staging} ON CONFLICT DO NOTHING"
+    if returning:
+        inserted = f"{table}_inserted"
+        cursor.execute(f"CREATE TEMP TABLE {inserted} ON COMMIT DROP AS SELECT {returning} FROM {table} WITH NO DATA")
+        stmt = f"WITH new_rows AS ({stmt} RETURNING {returning}) INSERT INTO {inserted} SELECT {returning} FROM new_rows"
+    cursor.execute(stmt)
+    return cursor.rowcount
+
+
+def _copy_chunk(purchases: pd.DataFrame, items: pd.DataFrame) -> tuple[float, int, int]:
+    """
+    Copy one parsed chunk over a dedicated connection, add the purchases that were
+    new to the customer summaries and commit it.
+
+    Returns the time spent and how many purchases and items were new.
+    """
+    started = time.perf_counter()
+    session = SessionLocal()
+    try:
+        cursor = session.connection().connection.cursor()
+        new_purchases = _copy_ignoring_existing(cursor, Purchase.__tablename__, purchases, returning="id")
+        new_items = _copy_ignoring_existing(cursor, PurchaseItem.__tablename__, items)
+        cursor.close()
+        if new_purchases:
+            add_purchases_to_user_stats(session, table(f"{Purchase.__tablename__}_inserted", column("id")))
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+    return time.perf_counter() - started, new_purchases, new_items
+
+
+def _copy_new_dimensions(session, purchases: pd.DataFrame) -> int:
+    """
+    Insert branches and users a chunk references that are not in the database yet.
+
+    Only the chunk's distinct ids are sent; Postgres resolves which of them are new,
+    so the cost does not grow with the number of customers already stored.
+    """
+    cursor = session.connection().connection.cursor()
+    try:
+        inserted = _copy_ignoring_existing(
+            cursor, Branch.__tablename__, pd.DataFrame({"id": purchases["supermarket_id"].unique()})
+        )
+        inserted += _copy_ignoring_existing(
+            cursor, User.__tablename__, pd.DataFrame({"id": purchases["user_id"].unique()})
+        )
+    finally:
+        cursor.close()
+    session.commit()
+    return inserted
+
+
+def load_purchases_bulk(
+        session,
+        csv_path: str,
+        chunk_rows: int = CHUNK_ROWS,
+        parse_workers: int = PARSE_WORKERS,
+        loader_connections: int = LOADER_CONNECTIONS,
+        force: bool = False,
+) -> None:
     """
-    Load purchases from CSV file into the database using bulk operations.
+    Load purchases from CSV file into the database using COPY.
+
+    The file is read in chunks of `chunk_rows`. Chunks are validated and exploded
+    into purchase items in a process pool, and their purchases are copied by a small
+    pool of loader connections, each chunk in its own transaction. At most
+    `parse_workers + loader_connections` chunks are held in memory at once.
+
+    New branches and users are inserted from this process, in file order, before
+    their chunk is handed to a loader, so purchases never reference a missing row.
+
+    Loading is incremental and idempotent. Purchase ids are derived from the row
+    contents and rows whose id already exists are skipped. The purchases a chunk
+    did insert are added to the customer summaries in the same transaction. After
+    every chunk the leading committed part of the file is recorded in
+    ingest_watermarks, and the next run over the same file starts reading after it.
+    A file that changed otherwise is only read again from the beginning with `force`
+    (see read_watermark).
     """
     logger.info(f"Attempting to load purchases from: {csv_path}")
 
@@ -97,153 +437,101 @@ def load_purchases_bulk(session, csv_path: str) -> None:
         logger.error(f"Purchases CSV not found at {csv_path}")
         return
 
-    df = pd.read_csv(csv_path, dtype=str)
-    logger.info(f"Loaded purchases CSV with {len(df)} rows")
-
     required_columns = {"supermarket_id", "timestamp", "user_id", "items_list", "total_amount"}
-    if not required_columns.issubset(df.columns):
-        logger.error(f"Missing required columns: {required_columns - set(df.columns)}")
+    columns = set(pd.read_csv(csv_path, dtype=str, nrows=0, encoding="utf-8-sig").columns)
+    if not required_columns.issubset(columns):
+        logger.error(f"Missing required columns: {required_columns - columns}")
         return
 
-    # Clean and validate data upfront
-    df = df.dropna(subset=list(required_columns))
-    df = df[df["supermarket_id"].str.strip() != ""]
-    df = df[df["items_list"].str.strip() != ""]
-
-    logger.info(f"After initial cleaning: {len(df)} valid purchase records")
+    source = os.path.basename(csv_path)
+    start_offset, checkpoint = read_watermark(session, source, csv_path, force)
+    if checkpoint:
+        logger.info(f"Resuming {source} after {checkpoint} rows (byte {start_offset})")
+
+    products = pd.DataFrame(
+        session.query(Product.product_name, Product.id, Product.unit_price_cents).all(),
+        columns=["product_name", "id", "unit_price_cents"]
+    ).set_index("product_name")
+    products["id"] = products["id"].astype(str)
+
+    report = LoadReport()
+    started = time.perf_counter()
+    max_in_flight = parse_workers + loader_connections
+    parsing = deque()  # (source rows in chunk, end offset, parse future), in file order
+    loading = deque()  # (source rows in chunk, end offset, rows copied, copy future), in file order
+    totals = {"purchases": 0, "items": 0, "skipped": 0}
+
+    def hand_off_oldest_parsed() -> None:
+        rows, end_offset, future = parsing.popleft()
+        purchases, items, seconds = future.result()
+        report.add("validate", rows, seconds)
+
+        dimension_started = time.perf_counter()
+        inserted = _copy_new_dimensions(session, purchases)
+        report.add("dimensions", inserted, time.perf_counter() - dimension_started)
+
+        copy = loaders.submit(_copy_chunk, purchases, items)
+        loading.append((rows, end_offset, len(purchases) + len(items), copy))
+
+    def record_oldest_loaded() -> None:
+        nonlocal checkpoint
+        rows, end_offset, copied, future = loading.popleft()
+        seconds, new_purchases, new_items = future.result()
+        report.add("copy", copied, seconds)
+        checkpoint += rows
+        save_watermark(session, source, csv_path, end_offset, checkpoint)
+        totals["purchases"] += new_purchases
+        totals["items"] += new_items
+        totals["skipped"] += copied - new_purchases - new_items
+        logger.info(f"Checkpoint: first {checkpoint} source rows committed "
+                    f"({totals['purchases']} new purchases, {totals['items']} new items)")
 
-    # Parse timestamps
     try:
-        df["parsed_timestamp"] = pd.to_datetime(df["timestamp"])
+        # Parsers never touch the database; spawning keeps them from inheriting open connections
+        with ProcessPoolExecutor(max_workers=parse_workers, mp_context=multiprocessing.get_context("spawn")) as parsers, \
+                ThreadPoolExecutor(max_workers=loader_connections) as loaders:
+            read_started = time.perf_counter()
+            for chunk, end_offset in read_csv_chunks(csv_path, chunk_rows, start_offset):
+                report.add("read", len(chunk), time.perf_counter() - read_started)
+                parsing.append((len(chunk), end_offset, parsers.submit(_parse_chunk, chunk, products)))
+
+                while parsing and parsing[0][2].done():
+                    hand_off_oldest_parsed()
+                while loading and loading[0][3].done():
+                    record_oldest_loaded()
+                # Bound memory: block on the oldest chunk before reading another
+                while len(parsing) + len(loading) >= max_in_flight:
+                    if loading:
+                        record_oldest_loaded()
+                    else:
+                        hand_off_oldest_parsed()
+                read_started = time.perf_counter()
+
+            while parsing:
+                hand_off_oldest_parsed()
+            while loading:
+                record_oldest_loaded()
     except Exception as e:
-        logger.error(f"Error parsing timestamps: {e}")
-        return
-
-    # Validate UUIDs
-    valid_uuids = []
-    for idx, user_id_str in enumerate(df["user_id"]):
-        try:
-            uuid.UUID(user_id_str)
-            valid_uuids.append(True)
-        except:
-            valid_uuids.append(False)
-            logger.warning(f"Invalid UUID at row {idx}: {user_id_str}")
-
-    df = df[valid_uuids]
-    logger.info(f"After UUID validation: {len(df)} valid records")
-
-    # Validate total_amount
-    df["total_amount"] = pd.to_numeric(df["total_amount"], errors="coerce")
-    df = df.dropna(subset=["total_amount"])
-    df = df[df["total_amount"] >= 0]
-
-    logger.info(f"After amount validation: {len(df)} valid records")
-
-    # Bulk create branches
-    unique_branches = set(df["supermarket_id"].str.strip())
-    existing_branches = set(
-        branch[0] for branch in session.query(Branch.id).all()
-    )
-    new_branches = unique_branches - existing_branches
+        session.rollback()
+        logger.error(f"Error loading purchases after checkpoint {checkpoint}: {e}")
+        raise
 
-    if new_branches:
-        branch_data = [{"id": branch_id} for branch_id in new_branches]
-        session.bulk_insert_mappings(Branch, branch_data)
-        logger.info(f"Bulk inserted {len(new_branches)} new branches")
-
-    # Bulk create users
-    unique_users = set(df["user_id"].str.strip())
-    existing_users = set(
-        str(user[0]) for user in session.query(User.id).all()
-    )
-    new_users = unique_users - existing_users
-
-    if new_users:
-        user_data = [{"id": uuid.UUID(user_id)} for user_id in new_users]
-        session.bulk_insert_mappings(User, user_data)
-        logger.info(f"Bulk inserted {len(new_users)} new users")
-
-    # Get all products for mapping
-    all_products = session.query(Product).all()
-    product_name_to_id = {p.product_name: p.id for p in all_products}
-    product_name_to_price = {p.product_name: p.unit_price for p in all_products}
-
-    # Process purchases in batches
-    BATCH_SIZE = 1000
-    total_purchases = 0
-    total_items = 0
-
-    for batch_start in range(0, len(df), BATCH_SIZE):
-        batch_end = min(batch_start + BATCH_SIZE, len(df))
-        batch_df = df.iloc[batch_start:batch_end]
-
-        logger.info(f"Processing batch {batch_start + 1}-{batch_end} of {len(df)}")
-
-        # Prepare purchase data
-        purchase_data = []
-        purchase_items_data = []
-
-        for idx, row in batch_df.iterrows():
-            try:
-                # Parse items
-                product_names = [p.strip() for p in row["items_list"].split(",") if p.strip()]
-
-                # Check if all products exist
-                missing_products = [name for name in product_names if name not in product_name_to_id]
-                if missing_products:
-                    logger.warning(f"Row {idx}: Missing products {missing_products}, skipping")
-                    continue
-
-                # Create purchase record
-                purchase_id = str(uuid.uuid4())  # Generate UUID for purchase
-                purchase_record = {
-                    "id": purchase_id,
-                    "supermarket_id": row["supermarket_id"].strip(),
-                    "user_id": uuid.UUID(row["user_id"]),
-                    "items_list": ", ".join(product_names),
-                    "timestamp": row["parsed_timestamp"],
-                    "total_amount": float(row["total_amount"])
-                }
-                purchase_data.append(purchase_record)
-
-                # Create purchase items
-                for product_name in product_names:
-                    item_record = {
-                        "id": str(uuid.uuid4()),  # Generate UUID for item
-                        "purchase_id": purchase_id,
-                        "product_id": product_name_to_id[product_name],
-                        "quantity": 1,
-                        "unit_price": product_name_to_price[product_name]
-                    }
-                    purchase_items_data.append(item_record)
-
-            except Exception as e:
-                logger.error(f"Error processing row {idx}: {e}")
-                continue
-
-        # Bulk insert batch
-        if purchase_data:
-            try:
-                session.bulk_insert_mappings(Purchase, purchase_data)
-                session.bulk_insert_mappings(PurchaseItem, purchase_items_data)
-                session.commit()
-
-                total_purchases += len(purchase_data)
-                total_items += len(purchase_items_data)
-                logger.info(f"Batch completed: {len(purchase_data)} purchases, {len(purchase_items_data)} items")
-
-            except Exception as e:
-                session.rollback()
-                logger.error(f"Error inserting batch: {e}")
-                continue
-
-    logger.info(f"Purchases loading completed. Added {total_purchases} purchases with {total_items} items")
+    report.log(time.perf_counter() - started)
+    logger.info(f"Purchases loading completed. Added {totals['purchases']} purchases with {totals['items']} items, "
+                f"skipped {totals['skipped']} rows already loaded")
 
 
 def main() -> None:
     """
     Main entry point for bulk data loading.
     """
+    parser = argparse.ArgumentParser(description="Bulk load products and purchases")
+    parser.add_argument("--rebuild-stats", action="store_true",
+                        help="Recompute all customer summaries from scratch after loading")
+    parser.add_argument("--force", action="store_true",
+                        help="Read source files that changed since the last run from the beginning")
+    args = parser.parse_args()
+
     logger.info("Starting bulk data loading process")
 
     # Use the correct paths based on volume mounts
@@ -263,7 +551,9 @@ def main() -> None:
     session = SessionLocal()
     try:
         load_products_bulk(session, products_path)
-        load_purchases_bulk(session, purchases_path)
+        load_purchases_bulk(session, purchases_path, force=args.force)
+        if args.rebuild_stats:
+            rebuild_user_stats(session)
         logger.info("Bulk data loading completed successfully")
     except Exception as e:
         logger.error(f"Bulk data loading failed: {e}")
@@ -0,0 +1,259 @@
+"""
+Generate synthetic products_list.csv and purchases.csv files for scale testing.
+
+The output has the same format as database/data and can be fed straight to
+database/init/load_init_data.py. Purchases are written day by day in timestamp
+order, so memory depends on the busiest day rather than on the total row count.
+The same arguments and seed always produce byte-identical files.
+
+Distributions:
+    - Product popularity is Zipfian (a few staples appear in most baskets)
+    - Customer visit counts are heavy tailed (Pareto weights); most customers
+      shop rarely, a few shop several times a week
+    - Each customer has a home branch they use for most purchases; branch sizes
+      are skewed
+    - Daily volume follows a weekly pattern with a slow upward trend, and times
+      of day follow an opening-hours curve with lunch and evening peaks
+
+Usage:
+    python -m database.tools.generate_dataset --purchases 1000000 --out /tmp/icash-1m
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+logger = logging.getLogger(__name__)
+
+SAMPLE_PRODUCTS = [
+    "milk", "bread", "eggs", "chicken", "apples",
+    "toilet paper", "cereal", "cheese", "yogurt", "orange juice",
+]
+
+# Relative volume Monday..Sunday
+WEEKDAY_WEIGHTS = np.array([0.90, 0.85, 0.90, 1.00, 1.25, 1.35, 0.75])
+
+# Relative volume per hour of day, closed overnight
+HOURLY_WEIGHTS = np.array([
+    0, 0, 0, 0, 0, 0, 0.2, 0.6,
+    1.0, 1.2, 1.3, 1.6, 2.0, 1.8, 1.3, 1.2,
+    1.4, 1.9, 2.3, 2.1, 1.5, 0.9, 0.4, 0,
+])
+
+HOME_BRANCH_SHARE = 0.8
+BASKET_SPARE_DRAWS = 2
+# Caps the Pareto visit-rate weight so the busiest customers visit about daily, not hourly
+MAX_CUSTOMER_WEIGHT = 200.0
+US_PER_HOUR = 3_600_000_000
+
+
+def _mix64(values: np.ndarray, salt: int) -> np.ndarray:
+    """SplitMix64 finalizer: a cheap, well-distributed hash of uint64 values."""
+    z = values.astype(np.uint64) + np.uint64((0x9E3779B97F4A7C15 * (salt + 1)) % 2 ** 64)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def customer_uuids(customers: np.ndarray, seed: int) -> np.ndarray:
+    """
+    Map customer indices to stable version 4 UUID strings.
+
+    Ids are computed from (seed, index) on demand, so no table of customer ids is kept.
+    """
+    count = len(customers)
+    halves = np.empty((count, 2), dtype=">u8")
+    halves[:, 0] = _mix64(customers, 2 * seed)
+    halves[:, 1] = _mix64(customers, 2 * seed + 1)
+    raw = halves.view(np.uint8).reshape(count, 16)
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80
+
+    hex_chars = np.frombuffer(raw.tobytes().hex().encode(), dtype=np.uint8).reshape(count, 32)
+    text = np.full((count, 36), ord("-"), dtype=np.uint8)
+    for start, end, offset in ((0, 8, 0), (8, 12, 1), (12, 16, 2), (16, 20, 3), (20, 32, 4)):
+        text[:, start + offset:end + offset] = hex_chars[:, start:end]
+    return text.view("S36").ravel().astype(str)
+
+
+def _cdf(weights: np.ndarray) -> np.ndarray:
+    """Normalized cumulative distribution for sampling with searchsorted."""
+    cdf = np.cumsum(weights, dtype=np.float64)
+    return cdf / cdf[-1]
+
+
+def generate_products(rng: np.random.Generator, count: int) -> pd.DataFrame:
+    """Product names and unit prices; prices are log-normal around 3.00, rounded to 0.05."""
+    names = SAMPLE_PRODUCTS[:count] + [f"product {i:05d}" for i in range(len(SAMPLE_PRODUCTS), count)]
+    cents = np.maximum(10, np.round(rng.lognormal(np.log(300), 0.7, count) / 5) * 5).astype(np.int64)
+    return pd.DataFrame({"product_name": names, "unit_price_cents": cents})
+
+
+def generate_day(
+        rng: np.random.Generator,
+        day: np.datetime64,
+        count: int,
+        seed: int,
+        customer_cdf: np.ndarray,
+        branch_cdf: np.ndarray,
+        branch_ids: np.ndarray,
+        product_cdf: np.ndarray,
+        product_names: pd.Series,
+        product_cents: np.ndarray,
+        max_items: int,
+) -> pd.DataFrame:
+    """Generate one day of purchases in timestamp order."""
+    customers = np.searchsorted(customer_cdf, rng.random(count))
+
+    # Most visits are to the customer's home branch, derived from a hash of the customer
+    home = np.searchsorted(branch_cdf, _mix64(customers, seed + 7) / np.float64(2 ** 64))
+    elsewhere = np.searchsorted(branch_cdf, rng.random(count))
+    branches = np.where(rng.random(count) < HOME_BRANCH_SHARE, home, elsewhere)
+    branches = np.minimum(branches, len(branch_ids) - 1)
+
+    hours = np.searchsorted(_cdf(HOURLY_WEIGHTS), rng.random(count))
+    offsets = hours * US_PER_HOUR + rng.integers(0, US_PER_HOUR, count)
+    order = np.argsort(offsets, kind="stable")
+    timestamps = day.astype("datetime64[us]") + offsets[order].astype("timedelta64[us]")
+    customers, branches = customers[order], branches[order]
+
+    # Baskets: draw a few spare candidates per purchase and keep the first k distinct
+    # ones in draw order; a repeat is only detectable next to its twin after sorting
+    sizes = np.clip(1 + rng.poisson(1.7, count), 1, max_items)
+    candidates = np.searchsorted(product_cdf, rng.random((count, max_items + BASKET_SPARE_DRAWS)))
+    order = np.argsort(candidates, axis=1, kind="stable")
+    ordered = np.take_along_axis(candidates, order, axis=1)
+    first_in_sorted = np.ones(ordered.shape, dtype=bool)
+    first_in_sorted[:, 1:] = ordered[:, 1:] != ordered[:, :-1]
+    distinct = np.empty_like(first_in_sorted)
+    np.put_along_axis(distinct, order, first_in_sorted, axis=1)
+    keep = distinct & (np.cumsum(distinct, axis=1) <= sizes[:, None])
+
+    items_list = product_names.iloc[candidates[:, 0]].reset_index(drop=True)
+    for column in range(1, candidates.shape[1]):
+        names = product_names.iloc[candidates[:, column]].reset_index(drop=True)
+        items_list = items_list.where(~keep[:, column], items_list + "," + names)
+    total_cents = np.where(keep, product_cents[candidates], 0).sum(axis=1)
+
+    return pd.DataFrame({
+        "supermarket_id": branch_ids[branches],
+        "timestamp": np.datetime_as_string(timestamps, unit="us"),
+        "user_id": customer_uuids(customers, seed),
+        "items_list": items_list,
+        "total_amount": (pd.Series(total_cents // 100).astype(str) + "."
+                         + pd.Series(total_cents % 100).astype(str).str.zfill(2)),
+    })
+
+
+def generate_dataset(
+        out_dir: str,
+        purchases: int,
+        products: int = 200,
+        customers: int = 0,
+        branches: int = 3,
+        start: str = "2025-01-01",
+        days: int = 365,
+        max_items: int = 8,
+        product_skew: float = 1.1,
+        customer_tail: float = 1.5,
+        branch_skew: float = 0.8,
+        seed: int = 42,
+) -> None:
+    """
+    Write products_list.csv and purchases.csv into `out_dir`.
+
+    Args:
+        out_dir: Output directory (created if missing)
+        purchases: Number of purchases to generate
+        products: Number of products
+        customers: Number of distinct customers (default: purchases / 4)
+        branches: Number of branches, named SMKT001, SMKT002, ...
+        start: First day of the generated period (YYYY-MM-DD)
+        days: Length of the period in days
+        max_items: Maximum distinct products per purchase
+        product_skew: Zipf exponent of product popularity
+        customer_tail: Pareto shape of customer visit rates (lower is heavier)
+        branch_skew: Zipf exponent of branch sizes
+        seed: Random seed
+    """
+    rng = np.random.default_rng(seed)
+    customers = customers or max(1, purchases // 4)
+    max_items = min(max_items, products)
+    os.makedirs(out_dir, exist_ok=True)
+
+    catalog = generate_products(rng, products)
+    catalog.assign(unit_price=catalog["unit_price_cents"] / 100)[["product_name", "unit_price"]].to_csv(
+        os.path.join(out_dir, "products_list.csv"), index=False
+    )
+
+    # Popularity ranks are shuffled so the most popular products are not simply the first names
+    product_cdf = _cdf(1.0 / rng.permutation(np.arange(1, products + 1)) ** product_skew)
+    branch_cdf = _cdf(1.0 / np.arange(1, branches + 1) ** branch_skew)
+    branch_ids = np.array([f"SMKT{i:03d}" for i in range(1, branches + 1)])
+    customer_cdf = _cdf(np.minimum(rng.pareto(customer_tail, customers) + 1.0, MAX_CUSTOMER_WEIGHT))
+
+    day_starts = np.datetime64(start, "D") + np.arange(days)
+    weekdays = (day_starts.astype(np.int64) + 3) % 7  # 1970-01-01 was a Thursday
+    trend = np.linspace(1.0, 1.2, days)
+    day_weights = WEEKDAY_WEIGHTS[weekdays] * trend
+    per_day = rng.multinomial(purchases, day_weights / day_weights.sum())
+
+    path = os.path.join(out_dir, "purchases.csv")
+    written = 0
+    started = time.perf_counter()
+    with open(path, "w", newline="") as f:
+        f.write("supermarket_id,timestamp,user_id,items_list,total_amount\n")
+        for day, count in zip(day_starts, per_day):
+            if count == 0:
+                continue
+            frame = generate_day(
+                rng, day, int(count), seed, customer_cdf, branch_cdf, branch_ids,
+                product_cdf, catalog["product_name"], catalog["unit_price_cents"].to_numpy(), max_items,
+            )
+            frame.to_csv(f, header=False, index=False)
+            written += count
+            if written // 1_000_000 != (written - count) // 1_000_000:
+                logger.info(f"Written {written:,} of {purchases:,} purchases")
+
+    elapsed = time.perf_counter() - started
+    logger.info(f"Generated {written:,} purchases and {products} products in {out_dir} "
+                f"in {elapsed:.1f}s ({written / max(elapsed, 1e-9):,.0f} rows/s)")
+
+
+def main() -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Generate a synthetic iCash dataset")
+    parser.add_argument("--out", required=True, help="Output directory")
+    parser.add_argument("--purchases", type=int, required=True, help="Number of purchases")
+    parser.add_argument("--products", type=int, default=200, help="Number of products")
+    parser.add_argument("--customers", type=int, default=0, help="Number of customers (default: purchases / 4)")
+    parser.add_argument("--branches", type=int, default=3, help="Number of branches")
+    parser.add_argument("--start", default="2025-01-01", help="First day (YYYY-MM-DD)")
+    parser.add_argument("--days", type=int, default=365, help="Number of days")
+    parser.add_argument("--max-items", type=int, default=8, help="Maximum distinct products per purchase")
+    parser.add_argument("--product-skew", type=float, default=1.1, help="Zipf exponent of product popularity")
+    parser.add_argument("--customer-tail", type=float, default=1.5, help="Pareto shape of customer visit rates")
+    parser.add_argument("--branch-skew", type=float, default=0.8, help="Zipf exponent of branch sizes")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    args = parser.parse_args()
+
+    generate_dataset(
+        args.out, args.purchases, args.products, args.customers, args.branches, args.start, args.days,
+        args.max_items, args.product_skew, args.customer_tail, args.branch_skew, args.seed,
+    )
+
+
+if __name__ == "__main__":
+    main()
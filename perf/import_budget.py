@@ -0,0 +1,110 @@
+"""
+Import-time budget check.
+
+Imports each module in a fresh interpreter under `python -X importtime` and
+fails when its cumulative import time exceeds the budget, or when it pulls in a
+module it should not (e.g. importing a model must not create the engine or
+import FastAPI). Each module is imported --runs times and the fastest run is
+compared, which filters out most scheduling noise.
+
+The same checks run as tests/test_import_budget.py. For a report with the
+measured times:
+
+    python -m perf.import_budget [--runs 5] [--scale 1.0]
+
+--scale multiplies every budget, for slower machines (CI runners, laptops on battery).
+The environment must hold the services' settings (see .env.example). Exits with
+status 1 when any check fails.
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from typing import Optional
+
+# module: (budget in milliseconds, modules that must not be imported along with it)
+BUDGETS = {
+    "shared.database.models": (800, ("fastapi", "shared.database.instrumentation", "shared.database.profiles")),
+    "shared.database.jobs.rebuild_user_stats": (1000, ("fastapi",)),
+    "cash_register.app.main": (1500, ()),
+    "store_analytics.app.main": (1500, ()),
+}
+
+EXCEPTION_LINE = re.compile(r"^[\w.]+(Error|Exception)\b")
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$")
+
+
+def measure(module: str, env: Optional[dict[str, str]] = None) -> tuple[float, set[str]]:
+    """
+    Import `module` in a fresh interpreter.
+
+    Args:
+        module: Module to import
+        env: Environment of the interpreter; defaults to this process's
+
+    Returns:
+        tuple[float, set[str]]: Cumulative import time in milliseconds and every module imported
+
+    Raises:
+        RuntimeError: If the import fails
+    """
+    env = dict(os.environ if env is None else env)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.getcwd(), env.get("PYTHONPATH")]))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=env,
+    )
+    if result.returncode != 0:
+        error = "\n".join(line for line in result.stderr.splitlines() if not line.startswith("import time:"))
+        raise RuntimeError(f"importing {module} failed:\n{error[-2000:]}")
+
+    total_us = 0
+    imported = set()
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        _, cumulative, indent, name = match.groups()
+        imported.add(name)
+        # Top-level entries (one space of indentation) add up to the time of the `import` statement
+        if len(indent) == 1:
+            total_us += int(cumulative)
+    return total_us / 1000, imported
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Check module import times against their budgets")
+    parser.add_argument("--runs", type=int, default=5, help="Imports per module; the fastest counts")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every budget by this factor")
+    args = parser.parse_args()
+
+    failures = 0
+    for module, (budget_ms, forbidden) in BUDGETS.items():
+        try:
+            runs = [measure(module) for _ in range(args.runs)]
+        except RuntimeError as e:
+            failures += 1
+            lines = str(e).splitlines()
+            reason = next((line for line in reversed(lines) if EXCEPTION_LINE.match(line)), lines[-1])
+            print(f"{'FAIL':<4} {module:<45} {reason}")
+            continue
+        best_ms = min(ms for ms, _ in runs)
+        imported = runs[0][1]
+        budget = budget_ms * args.scale
+        leaked = sorted(name for name in forbidden if name in imported)
+
+        status = "ok"
+        if best_ms > budget or leaked:
+            status = "FAIL"
+            failures += 1
+        print(f"{status:<4} {module:<45} {best_ms:8.1f} ms  (budget {budget:.0f} ms)")
+        for name in leaked:
+            print(f"     imports {name}, which it must not")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
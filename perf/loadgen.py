@@ -0,0 +1,338 @@
+"""
+HTTP load generator and purchase replay harness for the iCash services.
+
+Drives POST /api/cash-register/purchase/ and the store analytics GET endpoints
+against a running stack (e.g. docker-compose on localhost) and reports
+throughput, error rate and latency percentiles per reporting interval and for
+the whole run.
+
+Modes:
+    --rate N         open loop: start N requests per second regardless of how fast
+                     responses come back; latency is measured from the scheduled
+                     start, so queueing inside the client is not hidden
+    --concurrency N  closed loop: N workers each send a request as soon as their
+                     previous one finished
+    --replay FILE    replay a purchases CSV (database/data format) in file order,
+                     keeping the gaps between timestamps divided by --speedup
+
+Usage:
+    python -m perf.loadgen --rate 200 --duration 60
+    python -m perf.loadgen --concurrency 32 --duration 60 --analytics-share 0.2
+    python -m perf.loadgen --replay database/data/purchases.csv --speedup 3600
+"""
+
+import argparse
+import asyncio
+import bisect
+import csv
+import json
+import random
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Iterator, Optional
+
+import httpx
+import numpy as np
+
+PURCHASE_PATH = "/api/cash-register/purchase/"
+PRODUCTS_PATH = "/api/cash-register/product/"
+BRANCHES_PATH = "/api/cash-register/branch/"
+ANALYTICS_PATHS = [
+    "/api/analytics/unique-buyers",
+    "/api/analytics/loyal-customers",
+    "/api/analytics/top-selling-products",
+    "/api/analytics/branches",
+    "/api/analytics/sales-summary",
+]
+
+
+@dataclass
+class Request:
+    """One request to send: which service, method, path and optional JSON body."""
+    name: str
+    base_url: str
+    method: str
+    path: str
+    body: Optional[dict] = None
+
+
+@dataclass
+class Window:
+    """Results collected during one reporting interval."""
+    latencies_ms: dict = field(default_factory=lambda: defaultdict(list))
+    errors: dict = field(default_factory=lambda: defaultdict(int))
+    dropped: int = 0
+
+    def record(self, name: str, latency_ms: float, ok: bool) -> None:
+        self.latencies_ms[name].append(latency_ms)
+        if not ok:
+            self.errors[name] += 1
+
+
+def summarize(latencies_ms: list, errors: int, seconds: float) -> dict:
+    """Throughput, error rate and latency percentiles for a set of requests."""
+    count = len(latencies_ms)
+    if count == 0:
+        return {"requests": 0, "rps": 0.0, "error_rate": 0.0}
+    p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99])
+    return {
+        "requests": count,
+        "rps": round(count / seconds, 1),
+        "error_rate": round(errors / count, 4),
+        "p50_ms": round(float(p50), 2),
+        "p95_ms": round(float(p95), 2),
+        "p99_ms": round(float(p99), 2),
+        "max_ms": round(float(max(latencies_ms)), 2),
+    }
+
+
+class Workload:
+    """
+    Builds synthetic requests from the products and branches the stack actually has.
+
+    Customers are drawn from a fixed pool with Zipf-like reuse, so repeat buyers
+    exist and the loyal-customer queries have something to find.
+    """
+
+    def __init__(self, args: argparse.Namespace, products: list[str], branches: list[str]):
+        self.args = args
+        self.products = products
+        self.branches = branches
+        self.random = random.Random(args.seed)
+        self.customers = [
+            str(uuid.UUID(int=self.random.getrandbits(128), version=4)) for _ in range(args.customers)
+        ]
+        weights = 1.0 / np.arange(1, len(self.customers) + 1)
+        self.customer_weights = np.cumsum(weights / weights.sum()).tolist()
+
+    def purchase(self) -> Request:
+        size = min(len(self.products), self.random.randint(1, 5))
+        customer = self.customers[
+            min(len(self.customers) - 1, bisect.bisect_left(self.customer_weights, self.random.random()))
+        ]
+        body = {
+            "supermarket_id": self.random.choice(self.branches),
+            "user_id": customer,
+            "items": [{"product_name": name} for name in self.random.sample(self.products, size)],
+        }
+        return Request("purchase", self.args.cash_register_url, "POST", PURCHASE_PATH, body)
+
+    def analytics(self) -> Request:
+        path = self.random.choice(ANALYTICS_PATHS)
+        return Request(path.rsplit("/", 1)[-1], self.args.analytics_url, "GET", path)
+
+    def next(self) -> Request:
+        if self.random.random() < self.args.analytics_share:
+            return self.analytics()
+        return self.purchase()
+
+
+def replay_requests(args: argparse.Namespace) -> Iterator[tuple[float, Request]]:
+    """
+    Yield (offset in seconds from the start of the run, request) for each CSV row.
+
+    Offsets are the gaps between the row timestamps divided by the speedup.
+    """
+    first = None
+    with open(args.replay, newline="", encoding="utf-8-sig") as f:
+        for row in csv.DictReader(f):
+            timestamp = datetime.fromisoformat(row["timestamp"])
+            first = first or timestamp
+            body = {
+                "supermarket_id": row["supermarket_id"],
+                "user_id": row["user_id"],
+                "items": [{"product_name": name.strip()} for name in row["items_list"].split(",") if name.strip()],
+            }
+            if args.keep_timestamps:
+                body["timestamp"] = row["timestamp"]
+            offset = (timestamp - first).total_seconds() / args.speedup
+            yield offset, Request("purchase", args.cash_register_url, "POST", PURCHASE_PATH, body)
+
+
+class LoadRunner:
+    """Sends requests, records their outcome in the current window and prints a report per interval."""
+
+    def __init__(self, args: argparse.Namespace, client: httpx.AsyncClient):
+        self.args = args
+        self.client = client
+        self.started = time.perf_counter()
+        self.window = Window()
+        self.windows: list[tuple[float, Window]] = []
+        self.in_flight: set[asyncio.Task] = set()
+        # Arrival times get their own stream, so --poisson does not change which requests are sent
+        self.random = random.Random(args.seed)
+
+    async def send(self, request: Request, scheduled: float) -> None:
+        ok = False
+        try:
+            response = await self.client.request(
+                request.method, request.base_url + request.path, json=request.body
+            )
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            pass
+        self.window.record(request.name, (time.perf_counter() - scheduled) * 1000, ok)
+
+    def launch(self, request: Request, scheduled: float) -> None:
+        """Start a request without waiting for it, unless too many are already outstanding."""
+        if len(self.in_flight) >= self.args.max_in_flight:
+            self.window.dropped += 1
+            return
+        task = asyncio.create_task(self.send(request, scheduled))
+        self.in_flight.add(task)
+        task.add_done_callback(self.in_flight.discard)
+
+    async def report_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.args.interval)
+            self.rotate()
+
+    def rotate(self) -> None:
+        window, self.window = self.window, Window()
+        elapsed = time.perf_counter() - self.started
+        self.windows.append((elapsed, window))
+        latencies = [latency for values in window.latencies_ms.values() for latency in values]
+        stats = summarize(latencies, sum(window.errors.values()), self.args.interval)
+        if stats["requests"]:
+            print(f"t={elapsed:7.1f}s  rps={stats['rps']:8.1f}  err={stats['error_rate']:6.2%}  "
+                  f"p50={stats['p50_ms']:8.2f}ms  p95={stats['p95_ms']:8.2f}ms  "
+                  f"p99={stats['p99_ms']:8.2f}ms  max={stats['max_ms']:8.2f}ms  "
+                  f"in_flight={len(self.in_flight)}  dropped={window.dropped}", flush=True)
+        else:
+            print(f"t={elapsed:7.1f}s  no completed requests  in_flight={len(self.in_flight)}", flush=True)
+
+    async def open_loop(self, next_request: Callable[[], Request]) -> None:
+        interval = 1.0 / self.args.rate
+        deadline = self.started + self.args.duration
+        scheduled = self.started
+        while scheduled < deadline:
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self.launch(next_request(), scheduled)
+            scheduled += self.random.expovariate(1.0 / interval) if self.args.poisson else interval
+
+    async def closed_loop(self, next_request: Callable[[], Request]) -> None:
+        deadline = self.started + self.args.duration
+
+        async def worker() -> None:
+            while time.perf_counter() < deadline:
+                await self.send(next_request(), time.perf_counter())
+
+        await asyncio.gather(*(worker() for _ in range(self.args.concurrency)))
+
+    async def replay(self) -> None:
+        for offset, request in replay_requests(self.args):
+            scheduled = self.started + offset
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self.launch(request, scheduled)
+            if self.args.duration and time.perf_counter() - self.started >= self.args.duration:
+                break
+
+    def results(self) -> dict:
+        elapsed = time.perf_counter() - self.started
+        by_name = defaultdict(list)
+        errors = defaultdict(int)
+        dropped = 0
+        for _, window in self.windows:
+            for name, values in window.latencies_ms.items():
+                by_name[name].extend(values)
+            for name, count in window.errors.items():
+                errors[name] += count
+            dropped += window.dropped
+        everything = [latency for values in by_name.values() for latency in values]
+        return {
+            "duration_s": round(elapsed, 2),
+            "dropped": dropped,
+            "total": summarize(everything, sum(errors.values()), elapsed),
+            "endpoints": {name: summarize(values, errors[name], elapsed) for name, values in sorted(by_name.items())},
+            "timeline": [
+                {"t": round(t, 2), **summarize(
+                    [latency for values in window.latencies_ms.values() for latency in values],
+                    sum(window.errors.values()), self.args.interval
+                ), "dropped": window.dropped}
+                for t, window in self.windows
+            ],
+        }
+
+
+async def run(args: argparse.Namespace) -> dict:
+    limits = httpx.Limits(max_connections=args.max_connections, max_keepalive_connections=args.max_connections)
+    async with httpx.AsyncClient(limits=limits, timeout=args.timeout) as client:
+        runner = LoadRunner(args, client)
+        reporter = asyncio.create_task(runner.report_periodically())
+        try:
+            if args.replay:
+                await runner.replay()
+            else:
+                products = [p["product_name"] for p in (await client.get(args.cash_register_url + PRODUCTS_PATH)).json()]
+                branches = [b["id"] for b in (await client.get(args.cash_register_url + BRANCHES_PATH)).json()]
+                workload = Workload(args, products, branches)
+                runner.started = time.perf_counter()
+                if args.rate:
+                    await runner.open_loop(workload.next)
+                else:
+                    await runner.closed_loop(workload.next)
+            if runner.in_flight:
+                await asyncio.wait(runner.in_flight)
+        finally:
+            reporter.cancel()
+        runner.rotate()
+        return runner.results()
+
+
+def print_summary(results: dict) -> None:
+    print(f"\n{'endpoint':<24}{'requests':>10}{'rps':>10}{'errors':>9}"
+          f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, stats in [*results["endpoints"].items(), ("TOTAL", results["total"])]:
+        if not stats["requests"]:
+            continue
+        print(f"{name:<24}{stats['requests']:>10}{stats['rps']:>10.1f}{stats['error_rate']:>9.2%}"
+              f"{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}{stats['p99_ms']:>10.2f}{stats['max_ms']:>10.2f}")
+    if results["dropped"]:
+        print(f"\n{results['dropped']} requests were not sent because --max-in-flight was reached")
+
+
+def main() -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Load test the iCash services")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--rate", type=float, help="Open loop: requests started per second")
+    mode.add_argument("--concurrency", type=int, help="Closed loop: number of concurrent workers")
+    mode.add_argument("--replay", help="Replay purchases from a CSV file")
+
+    parser.add_argument("--cash-register-url", default="http://localhost:8000")
+    parser.add_argument("--analytics-url", default="http://localhost:8001")
+    parser.add_argument("--duration", type=float, default=60, help="Seconds to run (replay: stop early)")
+    parser.add_argument("--analytics-share", type=float, default=0.0,
+                        help="Fraction of synthetic requests that hit analytics endpoints")
+    parser.add_argument("--customers", type=int, default=10_000, help="Size of the synthetic customer pool")
+    parser.add_argument("--poisson", action="store_true", help="Open loop: exponential inter-arrival times")
+    parser.add_argument("--speedup", type=float, default=60.0, help="Replay: divide timestamp gaps by this")
+    parser.add_argument("--keep-timestamps", action="store_true",
+                        help="Replay: send the original purchase timestamps instead of letting the server stamp them")
+    parser.add_argument("--interval", type=float, default=5.0, help="Seconds per reporting interval")
+    parser.add_argument("--max-in-flight", type=int, default=1000, help="Open loop: outstanding request cap")
+    parser.add_argument("--max-connections", type=int, default=100, help="HTTP connection pool size")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=42,
+                        help="Random seed for the synthetic workload and Poisson arrivals")
+    parser.add_argument("--json-out", help="Write the summary and timeline as JSON to this file")
+    args = parser.parse_args()
+    if args.replay and args.duration == parser.get_default("duration"):
+        args.duration = 0
+
+    results = asyncio.run(run(args))
+    print_summary(results)
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Worker scaling benchmark for the purchase endpoint.
+
+Starts the cash register with 1, 2, 4, ... worker processes (through the same
+`python -m cash_register.app.main` entry point as production, with DEBUG=false
+and WEB_CONCURRENCY set), drives POST /api/cash-register/purchase/ with a closed
+loop of --concurrency-per-worker clients per worker, and reports throughput,
+latency and scaling efficiency (throughput / (workers x single-worker throughput)).
+
+The database must already be migrated and loaded (products and branches are
+read from the running service). Run the load generator from another machine
+with `--external` when the service machine has few cores: on one host the
+client competes with the workers for CPU and flattens the curve.
+
+Usage:
+    python -m perf.scaling --workers 1,2,4,8 --duration 30 [--min-efficiency 0.8] [--json-out scaling.json]
+
+Exits with status 1 when the efficiency at the largest worker count is below
+--min-efficiency.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import httpx
+
+from perf import loadgen
+from shared.serving import worker_count
+
+
+def start_service(workers: int, port: int) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "DEBUG": "false",
+        "WEB_CONCURRENCY": str(workers),
+        "CASH_REGISTER_PORT": str(port),
+        "CASH_REGISTER_PATH": "cash_register.app.main:app",
+        "PYTHONPATH": os.getcwd(),
+    }
+    return subprocess.Popen(
+        [sys.executable, "-m", "cash_register.app.main"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+def wait_until_healthy(url: str, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url + "/health", timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"service at {url} did not become healthy within {timeout:.0f} s")
+
+
+def stop_service(process: subprocess.Popen) -> None:
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=60)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def load_args(args: argparse.Namespace, url: str, concurrency: int) -> argparse.Namespace:
+    """Closed-loop, purchase-only loadgen settings."""
+    return argparse.Namespace(
+        rate=None, concurrency=concurrency, replay=None,
+        cash_register_url=url, analytics_url=url,
+        duration=args.duration, analytics_share=0.0, customers=10_000, poisson=False,
+        speedup=1.0, keep_timestamps=False, interval=args.duration,
+        max_in_flight=concurrency, max_connections=concurrency, timeout=30.0, seed=args.seed,
+    )
+
+
+def measure(args: argparse.Namespace, workers: int) -> dict:
+    url = args.url or f"http://127.0.0.1:{args.port}"
+    process = None if args.external else start_service(workers, args.port)
+    try:
+        wait_until_healthy(url, args.startup_timeout)
+        concurrency = workers * args.concurrency_per_worker
+        results = asyncio.run(loadgen.run(load_args(args, url, concurrency)))
+    finally:
+        if process is not None:
+            stop_service(process)
+    purchases = results["endpoints"].get("purchase", {"requests": 0, "rps": 0.0, "error_rate": 0.0})
+    return {"workers": workers, "concurrency": concurrency, **purchases}
+
+
+def main() -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Measure purchase throughput against the number of workers")
+    default_workers = ",".join(str(2 ** i) for i in range(worker_count().bit_length()))
+    parser.add_argument("--workers", default=default_workers, help="Comma-separated worker counts")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds of load per worker count")
+    parser.add_argument("--concurrency-per-worker", type=int, default=16)
+    parser.add_argument("--port", type=int, default=8100, help="Port for the service under test")
+    parser.add_argument("--url", help="Base URL of the service (default: the locally started one)")
+    parser.add_argument("--external", action="store_true",
+                        help="Do not start the service; restart it with each worker count yourself when prompted")
+    parser.add_argument("--startup-timeout", type=float, default=120)
+    parser.add_argument("--min-efficiency", type=float, default=0.0,
+                        help="Fail when efficiency at the largest worker count is below this")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json-out", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    rows = []
+    for workers in [int(w) for w in args.workers.split(",")]:
+        if args.external:
+            input(f"Start the service with WEB_CONCURRENCY={workers} and press Enter...")
+        print(f"Measuring {workers} worker(s)...", flush=True)
+        rows.append(measure(args, workers))
+
+    base_rps = rows[0]["rps"] / rows[0]["workers"] if rows and rows[0]["rps"] else 0.0
+    print(f"\n{'workers':>8}{'rps':>10}{'speedup':>9}{'efficiency':>12}{'errors':>9}{'p50 ms':>10}{'p99 ms':>10}")
+    for row in rows:
+        row["speedup"] = round(row["rps"] / (base_rps or 1.0), 2)
+        row["efficiency"] = round(row["rps"] / (row["workers"] * base_rps), 3) if base_rps else 0.0
+        print(f"{row['workers']:>8}{row['rps']:>10.1f}{row['speedup']:>9.2f}{row['efficiency']:>12.1%}"
+              f"{row['error_rate']:>9.2%}{row.get('p50_ms', 0):>10.2f}{row.get('p99_ms', 0):>10.2f}")
+
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump({"cpu_count": worker_count(), "results": rows}, f, indent=2)
+
+    if rows and rows[-1]["efficiency"] < args.min_efficiency:
+        print(f"\nEfficiency at {rows[-1]['workers']} workers is below {args.min_efficiency:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""
+Admission control for database-bound routes.
+
+Each worker process runs one AdaptiveConcurrencyLimiter in front of the routes
+that use the database. A request is admitted while fewer than `limit` requests
+are in flight; otherwise it waits in a priority queue for at most its priority's
+deadline and is then rejected with 503 and Retry-After, long before it would
+have hit DB_POOL_TIMEOUT.
+
+The limit never exceeds the engine profile's capacity (pool_size + max_overflow) and adapts
+to latency in the style of Netflix's Gradient2 limiter: a long-term average of
+request latency is compared with the latest sample, and the limit shrinks when
+latency rises above `tolerance` times the long-term level (queueing inside the
+database) and grows slowly when it does not.
+
+Priorities: purchases are CRITICAL, catalog reads NORMAL, analytics LOW. Lower
+priorities may only use part of the limit, leaving headroom for higher ones in
+the same process, and give up sooner; since analytics runs in its own service,
+the shorter deadline is what makes it shed load first when the shared database
+slows down.
+
+All state is touched from the event loop only, so no locks are needed.
+"""
+
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from enum import IntEnum
+
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from pydantic_settings import BaseSettings
+
+from shared.database.profiles import active_profile
+from shared.exceptions import ServiceOverloadedError
+from shared.metrics import CallbackGauge, Counter, Histogram
+
+load_dotenv()
+
+
+class AdmissionSettings(BaseSettings):
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_MIN_LIMIT: int = 2
+    # 0 means the connection pool's capacity
+    ADMISSION_MAX_LIMIT: int = 0
+    ADMISSION_MAX_QUEUE: int = 200
+    ADMISSION_LATENCY_TOLERANCE: float = 2.0
+
+
+settings = AdmissionSettings()
+
+
+class Priority(IntEnum):
+    """Request priority; lower values are served first."""
+    CRITICAL = 0
+    NORMAL = 1
+    LOW = 2
+
+
+# How long a request may wait in the queue, in seconds
+QUEUE_DEADLINES = {Priority.CRITICAL: 2.0, Priority.NORMAL: 0.5, Priority.LOW: 0.25}
+# Share of the limit a priority may fill on its own
+LIMIT_SHARES = {Priority.CRITICAL: 1.0, Priority.NORMAL: 0.9, Priority.LOW: 0.75}
+
+LONG_WINDOW = 600
+SMOOTHING = 0.2
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Concurrency limit adapted to observed latency, with a priority queue of waiting requests.
+
+    Attributes:
+        limit: Current concurrency limit
+        in_flight: Requests currently admitted
+    """
+
+    def __init__(self, min_limit: int, max_limit: int, tolerance: float, max_queue: int):
+        self.min_limit = min_limit
+        self.max_limit = max(min_limit, max_limit)
+        self.tolerance = tolerance
+        self.max_queue = max_queue
+        self.limit = float(self.max_limit)
+        self.in_flight = 0
+        self.long_latency = None
+        self.last_latency = 0.0
+        self._waiters = []
+        # Waiters still in acquire(); the heap also holds entries that gave up
+        self._queued = 0
+        self._sequence = itertools.count()
+
+    def _has_room(self, priority: Priority) -> bool:
+        return self.in_flight < max(self.min_limit, math.floor(self.limit * LIMIT_SHARES[priority]))
+
+    def _retry_after(self) -> int:
+        """Seconds until the queue is likely to have drained."""
+        backlog = (self._queued + 1) * self.last_latency / max(1.0, self.limit)
+        return max(1, math.ceil(backlog))
+
+    async def acquire(self, priority: Priority) -> None:
+        """
+        Wait for a slot.
+
+        Raises:
+            ServiceOverloadedError: If the queue is full or the priority's deadline passes
+        """
+        # Drop waiters that timed out, so they do not hold back new requests
+        while self._waiters and self._waiters[0][2].done():
+            heapq.heappop(self._waiters)
+        waiting_ahead = self._waiters and self._waiters[0][0] <= priority
+        if not waiting_ahead and self._has_room(priority):
+            self.in_flight += 1
+            return
+        if self._queued >= self.max_queue:
+            raise ServiceOverloadedError(retry_after=self._retry_after())
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        self._queued += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(future), QUEUE_DEADLINES[priority])
+        except asyncio.TimeoutError:
+            if future.done() and not future.cancelled():
+                # Admitted just as the deadline passed
+                return
+            future.cancel()
+            raise ServiceOverloadedError(retry_after=self._retry_after())
+        except BaseException:
+            # Cancelled while queued (client disconnect, shutdown): nobody will release a slot
+            # granted in the meantime, so give it back here
+            if future.done() and not future.cancelled():
+                self._free_slot()
+            else:
+                future.cancel()
+            raise
+        finally:
+            self._queued -= 1
+
+    def release(self, latency: float, failed: bool = False) -> None:
+        """
+        Give back a slot and adapt the limit.
+
+        Args:
+            latency: Seconds the request held its slot
+            failed: Whether the request failed with a server error (treated as overload)
+        """
+        self.in_flight -= 1
+        self._adapt(latency, failed)
+        self._admit_waiters()
+
+    def _free_slot(self) -> None:
+        """Give back a slot without a latency sample."""
+        self.in_flight -= 1
+        self._admit_waiters()
+
+    def _adapt(self, latency: float, failed: bool) -> None:
+        self.last_latency = latency
+        if failed:
+            self.limit = max(self.min_limit, self.limit * 0.9)
+            return
+
+        if self.long_latency is None:
+            self.long_latency = latency
+        self.long_latency += (latency - self.long_latency) / LONG_WINDOW
+        # Recover quickly after a sustained period of high latency
+        if self.long_latency > 2 * latency:
+            self.long_latency *= 0.95
+        # Only adapt when the limit is what holds requests back
+        if self.in_flight + 1 < self.limit / 2:
+            return
+
+        gradient = max(0.5, min(1.0, self.tolerance * self.long_latency / max(latency, 1e-6)))
+        new_limit = self.limit * gradient + math.sqrt(self.limit)
+        self.limit = self.limit * (1 - SMOOTHING) + new_limit * SMOOTHING
+        self.limit = max(self.min_limit, min(self.max_limit, self.limit))
+
+    def _admit_waiters(self) -> None:
+        while self._waiters:
+            priority, _, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            if not self._has_room(priority):
+                return
+            heapq.heappop(self._waiters)
+            self.in_flight += 1
+            future.set_result(None)
+
+
+limiter = AdaptiveConcurrencyLimiter(
+    min_limit=settings.ADMISSION_MIN_LIMIT,
+    max_limit=settings.ADMISSION_MAX_LIMIT or active_profile().capacity,
+    tolerance=settings.ADMISSION_LATENCY_TOLERANCE,
+    max_queue=settings.ADMISSION_MAX_QUEUE,
+)
+
+ADMISSION_REJECTED = Counter(
+    "icash_admission_rejected_total",
+    "Requests rejected with 503 by admission control, by priority",
+    ("priority",),
+)
+ADMISSION_QUEUE_WAIT = Histogram(
+    "icash_admission_queue_wait_seconds",
+    "Time admitted requests waited for a slot, by priority",
+    ("priority",),
+)
+CallbackGauge("icash_admission_limit", "Current adaptive concurrency limit", lambda: limiter.limit)
+CallbackGauge("icash_admission_in_flight", "Requests holding an admission slot", lambda: limiter.in_flight)
+
+
+def admit(priority: Priority):
+    """
+    Build a route dependency that holds an admission slot for the duration of the request.
+
+    Use it as a router-level dependency so it runs before the database session is opened:
+
+        router = APIRouter(dependencies=[Depends(admit(Priority.CRITICAL))])
+
+    Args:
+        priority: Priority of the routes it guards
+
+    Returns:
+        An async generator dependency
+    """
+    label = priority.name.lower()
+
+    async def admission_slot():
+        if not settings.ADMISSION_ENABLED:
+            yield
+            return
+
+        queued = time.perf_counter()
+        try:
+            await limiter.acquire(priority)
+        except ServiceOverloadedError as err:
+            ADMISSION_REJECTED.inc(label)
+            raise HTTPException(
+                status_code=err.status_code,
+                detail=err.message,
+                headers={"Retry-After": str(err.retry_after)},
+            )
+
+        started = time.perf_counter()
+        ADMISSION_QUEUE_WAIT.observe(started - queued, label)
+        failed = False
+        try:
+            yield
+        except HTTPException as exc:
+            failed = exc.status_code >= 500
+            raise
+        except Exception:
+            failed = True
+            raise
+        finally:
+            limiter.release(time.perf_counter() - started, failed)
+
+    return admission_slot
@@ -1,26 +1,84 @@
-from sqlalchemy import create_engine
+"""
+Shared database package: declarative Base, engine and session factory.
+
+Importing the package only defines `Base`. The engine, together with its pool
+metrics and query instrumentation, is created on first use of `engine`,
+`get_engine()` or `SessionLocal()`, which also imports all models so their
+relationships can be configured. Tools that only need a model or two do not pay
+for the engine and its dependencies.
+
+A process forked after the engine was created gets a fresh pool: the parent's
+connections are dropped in the child without being closed, as they still belong
+to the parent.
+"""
+
+import os
+import threading
+
+from sqlalchemy import Engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 
-from shared.database.core.config import settings
+Base = declarative_base()
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def _create_engine() -> Engine:
+    import shared.database.models  # noqa: F401  (registers every model with Base)
+    from shared.database.core.config import settings
+    from shared.database.instrumentation import instrument_engine
+    from shared.database.pool import register_pool_metrics
+    from shared.database.profiles import active_profile, create_profile_engine
+
+    engine = create_profile_engine(
+        settings.DATABASE_URL,
+        active_profile(),
+        pgbouncer=settings.DB_PGBOUNCER,
+        echo=settings.DEBUG,
+    )
+    if not settings.DB_PGBOUNCER:
+        register_pool_metrics(engine)
+    instrument_engine(engine)
+    return engine
 
-engine = create_engine(
-    url=settings.DATABASE_URL,
-    pool_size=settings.DB_POOL_SIZE,
-    max_overflow=settings.DB_MAX_OVERFLOW,
-    pool_timeout=settings.DB_POOL_TIMEOUT,
-    pool_recycle=settings.DB_POOL_RECYCLE,
-    pool_pre_ping=True,
-    echo=settings.DEBUG,
-)
 
-SessionLocal = sessionmaker(
+def get_engine() -> Engine:
+    """The shared engine, created on first call."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = _create_engine()
+    return _engine
+
+
+class LazySessionmaker(sessionmaker):
+    """sessionmaker that binds to the shared engine when the first session is created."""
+
+    def __call__(self, **local_kw):
+        if self.kw.get("bind") is None:
+            self.configure(bind=get_engine())
+        return super().__call__(**local_kw)
+
+
+SessionLocal = LazySessionmaker(
     autocommit=False,
     autoflush=False,
-    bind=engine
 )
 
-Base = declarative_base()
 
-from shared.database.models import *
+def _reset_after_fork() -> None:
+    global _engine_lock
+    _engine_lock = threading.Lock()
+    if _engine is not None:
+        _engine.dispose(close=False)
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
 
-# Base.metadata.create_all(bind=engine)
+def __getattr__(name: str):
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
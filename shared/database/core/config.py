@@ -9,10 +9,18 @@ class Settings(BaseSettings):
     ENVIRONMENT: str = "development"
     DEBUG: bool = True
 
+    # Engine profile (see shared/database/profiles.py); the three settings
+    # below override the profile's values when set
+    DB_PROFILE: str = "default"
+    DB_PGBOUNCER: bool = False
     DB_POOL_SIZE: int = 20
     DB_MAX_OVERFLOW: int = 30
+    DB_STATEMENT_TIMEOUT_MS: int = 0
     DB_POOL_TIMEOUT: int = 30
     DB_POOL_RECYCLE: int = 3600
+    DB_SLOW_QUERY_MS: int = 200
+    # Pooled connections to open, and read paths to run, before serving; 0 disables warm-up
+    DB_WARMUP_CONNECTIONS: int = 0
 
     PRODUCTS_CSV_PATH: str
     PURCHASES_CSV_PATH: str
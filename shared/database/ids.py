@@ -0,0 +1,66 @@
+"""
+Time-ordered UUIDv7 primary keys (RFC 9562).
+
+A UUIDv7 starts with a 48-bit Unix timestamp in milliseconds, so keys generated
+close together in time sit next to each other in a B-tree index: inserts go to
+the right-most leaf pages instead of splitting pages across the whole index, and
+the pages written recently stay in cache. Random uuid4 keys touch a random leaf
+for every insert, which stops fitting in memory as the table grows. The ids are
+ordinary UUIDs, so column types and APIs do not change.
+
+Ids from one process are strictly increasing. The 12 `rand_a` bits hold a counter
+that starts at a random value in each new millisecond and is incremented for ids
+within the same millisecond (RFC 9562, section 6.2, method 1); when it runs out,
+the timestamp moves on by one millisecond. The remaining 62 bits are random, so
+ids from different processes or hosts do not collide.
+"""
+
+import os
+import secrets
+import threading
+import time
+from datetime import datetime, UTC
+from uuid import UUID
+
+_COUNTER_BITS = 12
+# New milliseconds start the counter in the lower half, leaving room to count up
+_COUNTER_SEED_BITS = _COUNTER_BITS - 1
+_RAND_B_MASK = (1 << 62) - 1
+
+_lock = threading.Lock()
+_last_ms = 0
+_counter = 0
+
+
+def uuid7() -> UUID:
+    """A new time-ordered UUID, greater than every id this process generated before."""
+    global _last_ms, _counter
+    now_ms = time.time_ns() // 1_000_000
+    with _lock:
+        if now_ms > _last_ms:
+            _last_ms = now_ms
+            _counter = secrets.randbits(_COUNTER_SEED_BITS)
+        else:
+            _counter += 1
+            if _counter >> _COUNTER_BITS:
+                _last_ms += 1
+                _counter = secrets.randbits(_COUNTER_SEED_BITS)
+        unix_ms, counter = _last_ms, _counter
+
+    rand_b = int.from_bytes(os.urandom(8), "big") & _RAND_B_MASK
+    return UUID(int=(unix_ms << 80) | (0x7 << 76) | (counter << 64) | (0b10 << 62) | rand_b)
+
+
+def uuid7_time(value: UUID) -> datetime:
+    """The creation time embedded in a UUIDv7, to the millisecond."""
+    if value.version != 7:
+        raise ValueError(f"{value} is not a version 7 UUID")
+    return datetime.fromtimestamp((value.int >> 80) / 1000, tz=UTC)
+
+
+def _reset_after_fork() -> None:
+    global _lock
+    _lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,202 @@
+"""
+Query timing, slow-query logging and per-request query budgets.
+
+Every statement sent through an instrumented engine is timed. Statements slower
+than DB_SLOW_QUERY_MS are logged with the request they belong to and the shape
+(not the values) of their parameters. While a request is being served, its
+query count and total database time are accumulated in a context variable,
+returned as X-DB-Query-Count / X-DB-Time response headers and kept for the
+last RECENT_REQUESTS requests for the debug endpoint. Requests are labelled
+with their route template (e.g. GET /api/analytics/customers/{user_id}), so
+slow queries group by route rather than by raw path.
+
+Starlette copies the context into the worker threads running sync endpoints
+and dependencies, so queries issued there are attributed to the right request.
+"""
+
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from sqlalchemy import Engine, event
+
+from shared.database.core.config import settings
+from shared.database.logger import logger
+from shared.routes import UNMATCHED_ROUTE, route_template
+from shared.tracing import MAX_SPAN_STATEMENT, record_span, tracing_active
+
+RECENT_REQUESTS = 200
+MAX_LOGGED_STATEMENT = 1000
+MAX_SHAPE_KEYS = 10
+
+
+class QueryStats:
+    """
+    Queries issued while serving one request or inside an `assert_max_queries` block.
+
+    For a request, pass its method as `label` and its ASGI scope as `scope`; the label
+    is completed with the route template once the request has been routed.
+
+    Attributes:
+        label: What issued the queries, e.g. "POST /api/cash-register/purchase/"
+        count: Number of statements executed
+        seconds: Total time spent executing them
+        statements: Executed SQL, kept only when `keep_statements` is set
+    """
+
+    __slots__ = ("_label", "_scope", "count", "seconds", "statements")
+
+    def __init__(self, label: str, keep_statements: bool = False, scope: Optional[dict] = None):
+        self._label = label
+        self._scope = scope
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = [] if keep_statements else None
+
+    @property
+    def label(self) -> str:
+        if self._scope is None:
+            return self._label
+        return f"{self._label} {route_template(self._scope) or UNMATCHED_ROUTE}"
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        if self.statements is not None:
+            self.statements.append(statement)
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+_recent_requests = deque(maxlen=RECENT_REQUESTS)
+
+
+def _parameters_shape(parameters) -> str:
+    """Parameter names and types, without values, e.g. {user_id_1: UUID, param_1: int}."""
+    if isinstance(parameters, dict):
+        keys = list(parameters)
+        shown = ", ".join(f"{key}: {type(parameters[key]).__name__}" for key in keys[:MAX_SHAPE_KEYS])
+        more = f", ... {len(keys) - MAX_SHAPE_KEYS} more" if len(keys) > MAX_SHAPE_KEYS else ""
+        return "{" + shown + more + "}"
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            return f"{len(parameters)} x {_parameters_shape(parameters[0])}"
+        return "(" + ", ".join(type(value).__name__ for value in parameters[:MAX_SHAPE_KEYS]) + ")"
+    return type(parameters).__name__
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    elapsed = time.perf_counter() - started
+    if tracing_active():
+        verb = statement.split(None, 1)[0].lower() if statement else "statement"
+        record_span(f"db.{verb}", started, elapsed, {"statement": statement[:MAX_SPAN_STATEMENT]})
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+
+    if elapsed * 1000 >= settings.DB_SLOW_QUERY_MS:
+        logger.warning(
+            "Slow query (%.1f ms) in %s: %s | parameters %s",
+            elapsed * 1000,
+            stats.label if stats is not None else "background",
+            statement[:MAX_LOGGED_STATEMENT],
+            _parameters_shape(parameters),
+        )
+
+
+def _handle_error(exception_context):
+    # after_cursor_execute does not run for failed statements
+    started = exception_context.connection.info.get("query_started") if exception_context.connection else None
+    if started:
+        started.pop()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """
+    Time every statement executed through `engine`.
+
+    Args:
+        engine: Engine to instrument
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+async def query_stats_middleware(request, call_next):
+    """Count the queries each request makes and report them in X-DB-Query-Count / X-DB-Time (ms)."""
+    stats = QueryStats(request.method, scope=request.scope)
+    token = _current_stats.set(stats)
+    try:
+        response = await call_next(request)
+    finally:
+        _current_stats.reset(token)
+
+    response.headers["X-DB-Query-Count"] = str(stats.count)
+    response.headers["X-DB-Time"] = f"{stats.seconds * 1000:.2f}"
+    _recent_requests.append({
+        "request": stats.label,
+        "status": response.status_code,
+        "queries": stats.count,
+        "db_ms": round(stats.seconds * 1000, 2),
+    })
+    return response
+
+
+def recent_request_stats() -> list[dict]:
+    """Query count and database time of the most recent requests, newest first."""
+    return list(reversed(_recent_requests))
+
+
+@contextmanager
+def assert_max_queries(max_queries: int, label: str = "block") -> Iterator[QueryStats]:
+    """
+    Fail if the enclosed code runs more than `max_queries` statements.
+
+    Counts statements run in the current thread (and threads that copy its context),
+    e.g. a repository or service call in a script or check:
+
+        with assert_max_queries(4):
+            RegisterService(db).create_purchase(data)
+
+    Raises:
+        AssertionError: Listing the executed statements when the budget is exceeded
+    """
+    stats = QueryStats(label, keep_statements=True)
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+    if stats.count > max_queries:
+        listing = "\n".join(f"  {i + 1}. {statement}" for i, statement in enumerate(stats.statements))
+        raise AssertionError(f"{label} ran {stats.count} queries, budget is {max_queries}:\n{listing}")
+
+
+def assert_endpoint_query_budget(client, method: str, url: str, max_queries: int, **kwargs):
+    """
+    Call an endpoint through an HTTP client (e.g. FastAPI's TestClient or httpx) and fail
+    if it ran more than `max_queries` statements, as reported in X-DB-Query-Count.
+
+    Returns:
+        The response, for further checks
+
+    Raises:
+        AssertionError: When the budget is exceeded or the header is missing
+    """
+    response = client.request(method, url, **kwargs)
+    count = response.headers.get("X-DB-Query-Count")
+    if count is None:
+        raise AssertionError(f"{method} {url} returned no X-DB-Query-Count header")
+    if int(count) > max_queries:
+        raise AssertionError(
+            f"{method} {url} ran {count} queries ({response.headers.get('X-DB-Time')} ms), budget is {max_queries}"
+        )
+    return response
@@ -0,0 +1,314 @@
+"""
+Incremental Parquet snapshot of purchases and purchase items.
+
+Writes columnar files partitioned by month and branch so analysts can scan history
+with pandas/pyarrow without querying the production database:
+
+    <root>/products.parquet
+    <root>/purchases/month=2025-06/supermarket_id=SMKT001/part-<run>-0.parquet
+    <root>/purchase_items/month=2025-06/supermarket_id=SMKT001/part-<run>-0.parquet
+    <root>/_watermark.json
+
+Each export only reads purchases written to the database (`inserted_at`) after the
+stored watermark and at least `settle` ago, so in-flight transactions have committed
+before their window is exported; `settle` must exceed the longest transaction that
+writes purchases. The watermark follows insertion order rather than the purchase
+timestamp, so purchases posted late or bulk-loaded with an older timestamp are
+exported by the next run, into the partition of their timestamp's month.
+If a run dies after writing some files but before advancing the watermark, the
+next run deletes that run's files before exporting the same window again.
+
+The snapshot can be loaded back into an empty or partially populated database
+with the `restore` command.
+
+Money columns hold integer cents. Snapshots written while amounts were stored as
+decimals (unit_price, total_amount) can still be restored; export new runs into a
+fresh root rather than appending to one of those.
+
+Usage:
+    python -m shared.database.jobs.export_parquet export --root /exports/icash
+    python -m shared.database.jobs.export_parquet restore --root /exports/icash
+"""
+
+import argparse
+import json
+import os
+from datetime import datetime, timedelta, UTC
+from pathlib import Path
+from typing import Optional
+from uuid import uuid4, UUID
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from shared.database import SessionLocal
+from shared.database.jobs.rebuild_user_stats import rebuild_user_stats
+from shared.database.logger import logger
+from shared.database.models import Branch, Product, Purchase, PurchaseItem, User
+from shared.money import to_cents
+
+WATERMARK_FILE = "_watermark.json"
+INFLIGHT_FILE = "_inflight.json"
+DATASETS = ["purchases", "purchase_items"]
+PARTITION_COLUMNS = ["month", "supermarket_id"]
+CENTS = pa.int64()
+
+PRODUCTS_SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("product_name", pa.string()),
+    ("unit_price_cents", CENTS),
+])
+
+PURCHASES_SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("supermarket_id", pa.string()),
+    ("user_id", pa.string()),
+    ("timestamp", pa.timestamp("us", tz="UTC")),
+    ("items_list", pa.string()),
+    ("total_amount_cents", CENTS),
+    ("month", pa.string()),
+])
+
+PURCHASE_ITEMS_SCHEMA = pa.schema([
+    ("purchase_id", pa.string()),
+    ("product_id", pa.string()),
+    ("quantity", pa.int32()),
+    ("unit_price_cents", CENTS),
+    ("supermarket_id", pa.string()),
+    ("timestamp", pa.timestamp("us", tz="UTC")),
+    ("month", pa.string()),
+])
+
+
+def read_watermark(root: Path) -> Optional[datetime]:
+    """Return the upper `inserted_at` bound of the last successful export, if any."""
+    path = root / WATERMARK_FILE
+    if not path.exists():
+        return None
+    return datetime.fromisoformat(json.loads(path.read_text())["exported_until"])
+
+
+def write_watermark(root: Path, exported_until: datetime) -> None:
+    """Atomically persist the watermark so a crash never leaves it half-written."""
+    tmp = root / f"{WATERMARK_FILE}.tmp"
+    tmp.write_text(json.dumps({"exported_until": exported_until.isoformat()}))
+    os.replace(tmp, root / WATERMARK_FILE)
+
+
+def discard_incomplete_run(root: Path) -> None:
+    """Delete files written by an export that did not reach its watermark update."""
+    path = root / INFLIGHT_FILE
+    if not path.exists():
+        return
+    run_id = json.loads(path.read_text())["run_id"]
+    for dataset in DATASETS:
+        for part in (root / dataset).rglob(f"part-{run_id}-*.parquet"):
+            part.unlink()
+    path.unlink()
+    logger.warning(f"Discarded files of incomplete export run {run_id}")
+
+
+def _to_table(rows: list, schema: pa.Schema) -> pa.Table:
+    """Build an Arrow table with a fixed schema, deriving the month partition from the timestamp."""
+    df = pd.DataFrame.from_records(rows, columns=[f.name for f in schema if f.name != "month"])
+    df["month"] = df["timestamp"].dt.tz_convert("UTC").dt.strftime("%Y-%m")
+    for column in ("id", "user_id", "purchase_id", "product_id"):
+        if column in df:
+            df[column] = df[column].astype(str)
+    return pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+
+
+def _write_partitioned(table: pa.Table, base_dir: Path, run_id: str, batch_no: int) -> None:
+    """Append a table to a month/branch partitioned dataset without touching existing files."""
+    pq.write_to_dataset(
+        table,
+        root_path=str(base_dir),
+        partition_cols=PARTITION_COLUMNS,
+        basename_template=f"part-{run_id}-{batch_no}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+    )
+
+
+def export_purchases(
+        session: Session,
+        root: Path,
+        settle: timedelta = timedelta(minutes=5),
+        batch_size: int = 200_000,
+) -> int:
+    """
+    Export purchases and purchase items written since the watermark.
+
+    Args:
+        session: SQLAlchemy session to read from
+        root: Snapshot root directory
+        settle: Minimum age of a purchase before it is exported
+        batch_size: Rows fetched and written per batch
+
+    Returns:
+        int: Number of purchases exported
+    """
+    root.mkdir(parents=True, exist_ok=True)
+    discard_incomplete_run(root)
+    since = read_watermark(root)
+
+    # Purchases and items must come from the same snapshot
+    session.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+    # inserted_at is set by the database, so the window is measured on its clock
+    until = session.execute(select(func.now())).scalar_one() - settle
+    run_id = f"{until.astimezone(UTC):%Y%m%dT%H%M%S}-{uuid4().hex[:8]}"
+    (root / INFLIGHT_FILE).write_text(json.dumps({"run_id": run_id}))
+
+    products = session.execute(select(Product.id, Product.product_name, Product.unit_price_cents)).all()
+    products_df = pd.DataFrame.from_records(products, columns=PRODUCTS_SCHEMA.names)
+    products_df["id"] = products_df["id"].astype(str)
+    pq.write_table(pa.Table.from_pandas(products_df, schema=PRODUCTS_SCHEMA, preserve_index=False),
+                   root / "products.parquet")
+
+    window = [Purchase.inserted_at <= until]
+    if since is not None:
+        window.append(Purchase.inserted_at > since)
+
+    purchases_stmt = (
+        select(
+            Purchase.id, Purchase.supermarket_id, Purchase.user_id, Purchase.timestamp,
+            Purchase.items_list, Purchase.total_amount_cents
+        )
+        .where(*window)
+        .execution_options(yield_per=batch_size)
+    )
+    exported = 0
+    for batch_no, rows in enumerate(session.execute(purchases_stmt).partitions()):
+        _write_partitioned(_to_table(rows, PURCHASES_SCHEMA), root / DATASETS[0], run_id, batch_no)
+        exported += len(rows)
+
+    items_stmt = (
+        select(
+            PurchaseItem.purchase_id, PurchaseItem.product_id, PurchaseItem.quantity,
+            PurchaseItem.unit_price_cents, Purchase.supermarket_id, Purchase.timestamp
+        )
+        .join(Purchase, Purchase.id == PurchaseItem.purchase_id)
+        .where(*window)
+        .execution_options(yield_per=batch_size)
+    )
+    items = 0
+    for batch_no, rows in enumerate(session.execute(items_stmt).partitions()):
+        _write_partitioned(_to_table(rows, PURCHASE_ITEMS_SCHEMA), root / DATASETS[1], run_id, batch_no)
+        items += len(rows)
+
+    session.rollback()
+    write_watermark(root, until)
+    (root / INFLIGHT_FILE).unlink()
+    logger.info(f"Exported {exported} purchases and {items} items up to {until.isoformat()} (run {run_id})")
+    return exported
+
+
+def _cents(row: dict, name: str) -> int:
+    """Amount `name` of a snapshot row in cents, also for snapshots that stored decimals."""
+    cents = row.get(f"{name}_cents")
+    return cents if cents is not None else to_cents(row[name])
+
+
+def _insert_ignore(session: Session, model, records: list[dict]) -> None:
+    """Insert records, skipping rows whose primary key already exists."""
+    if records:
+        session.execute(insert(model).on_conflict_do_nothing(), records)
+
+
+def restore_purchases(session: Session, root: Path, batch_size: int = 50_000) -> int:
+    """
+    Load a snapshot back into the database.
+
+    Rows already present are skipped, so a restore can be re-run or applied on top
+    of a partially recovered database. Customer stats are rebuilt at the end.
+
+    Args:
+        session: SQLAlchemy session to write to
+        root: Snapshot root directory
+        batch_size: Rows inserted per batch
+
+    Returns:
+        int: Number of purchase rows read from the snapshot
+    """
+    products = pq.read_table(root / "products.parquet").to_pylist()
+    _insert_ignore(session, Product, [
+        {"id": UUID(p["id"]), "product_name": p["product_name"], "unit_price_cents": _cents(p, "unit_price")}
+        for p in products
+    ])
+
+    restored = 0
+    purchases = ds.dataset(root / DATASETS[0], format="parquet", partitioning="hive")
+    for batch in purchases.to_batches(batch_size=batch_size):
+        rows = batch.to_pylist()
+        _insert_ignore(session, Branch, [{"id": b} for b in {r["supermarket_id"] for r in rows}])
+        _insert_ignore(session, User, [{"id": UUID(u)} for u in {r["user_id"] for r in rows}])
+        _insert_ignore(session, Purchase, [
+            {
+                "id": UUID(r["id"]),
+                "supermarket_id": r["supermarket_id"],
+                "user_id": UUID(r["user_id"]),
+                "timestamp": r["timestamp"],
+                "items_list": r["items_list"],
+                "total_amount_cents": _cents(r, "total_amount"),
+            }
+            for r in rows
+        ])
+        session.commit()
+        restored += len(rows)
+        logger.info(f"Restored {restored} purchases")
+
+    items = ds.dataset(root / DATASETS[1], format="parquet", partitioning="hive")
+    price_column = "unit_price_cents" if "unit_price_cents" in items.schema.names else "unit_price"
+    item_columns = ["purchase_id", "product_id", "quantity", price_column]
+    for batch in items.to_batches(columns=item_columns, batch_size=batch_size):
+        _insert_ignore(session, PurchaseItem, [
+            {
+                "purchase_id": UUID(r["purchase_id"]),
+                "product_id": UUID(r["product_id"]),
+                "quantity": r["quantity"],
+                "unit_price_cents": _cents(r, "unit_price"),
+            }
+            for r in batch.to_pylist()
+        ])
+        session.commit()
+
+    rebuild_user_stats(session)
+    logger.info(f"Restore completed: {restored} purchases read from {root}")
+    return restored
+
+
+def main() -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Export purchases to Parquet or restore them")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Append purchases written since the watermark")
+    export_parser.add_argument("--root", type=Path, required=True, help="Snapshot root directory")
+    export_parser.add_argument("--settle-seconds", type=int, default=300,
+                               help="Only export purchases written at least this long ago")
+
+    restore_parser = subparsers.add_parser("restore", help="Load a snapshot back into the database")
+    restore_parser.add_argument("--root", type=Path, required=True, help="Snapshot root directory")
+
+    args = parser.parse_args()
+
+    session = SessionLocal()
+    try:
+        if args.command == "export":
+            export_purchases(session, args.root, settle=timedelta(seconds=args.settle_seconds))
+        else:
+            restore_purchases(session, args.root)
+    except Exception as e:
+        session.rollback()
+        logger.error(f"Parquet {args.command} failed: {e}")
+        raise
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
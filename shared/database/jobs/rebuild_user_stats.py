@@ -0,0 +1,184 @@
+"""
+Rebuild the per-customer summary tables from scratch.
+
+The cash register keeps user_stats and user_product_stats up to date incrementally, and the bulk loader applies each chunk it inserts with
+`add_purchases_to_user_stats`. Anything else that writes purchases behind their
+back (manual backfills, restores) must run this job afterwards.
+
+Usage:
+    python -m shared.database.jobs.rebuild_user_stats
+"""
+
+from sqlalchemy import select, func, insert, delete, text, case, FromClause
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from shared.database import SessionLocal
+from shared.database.logger import logger
+from shared.database.models import Purchase, PurchaseItem, UserStats, UserProductStats
+
+
+def rebuild_user_stats(session: Session) -> int:
+    """
+    Recompute all customer summaries from the purchases table in one transaction.
+
+    Concurrent purchases block on the summary tables until the rebuild commits and
+    then apply their increments on top of it, so no purchase is counted twice or lost.
+
+    Args:
+        session: SQLAlchemy session to run the rebuild in
+
+    Returns:
+        int: Number of customers summarized
+    """
+    tables = [UserProductStats.__table__, UserStats.__table__]
+    # EXCLUSIVE blocks concurrent writers but still lets analytics read the old summary
+    session.execute(text(f"LOCK TABLE {', '.join(t.name for t in tables)} IN EXCLUSIVE MODE"))
+    for table in tables:
+        session.execute(delete(table))
+
+    session.execute(
+        insert(UserProductStats).from_select(
+            ["user_id", "product_id", "quantity"],
+            select(Purchase.user_id, PurchaseItem.product_id, func.sum(PurchaseItem.quantity))
+            .join(PurchaseItem, PurchaseItem.purchase_id == Purchase.id)
+            .group_by(Purchase.user_id, PurchaseItem.product_id)
+        )
+    )
+
+    favorites = (
+        select(UserProductStats.user_id, UserProductStats.product_id, UserProductStats.quantity)
+        .distinct(UserProductStats.user_id)
+        .order_by(UserProductStats.user_id, UserProductStats.quantity.desc(), UserProductStats.product_id)
+    ).subquery()
+    totals = (
+        select(
+            Purchase.user_id,
+            func.count().label("purchase_count"),
+            func.sum(Purchase.total_amount_cents).label("total_spent_cents"),
+            func.min(Purchase.timestamp).label("first_purchase_at"),
+            func.max(Purchase.timestamp).label("last_purchase_at"),
+        )
+        .group_by(Purchase.user_id)
+    ).subquery()
+    session.execute(
+        insert(UserStats).from_select(
+            [
+                "user_id", "purchase_count", "total_spent_cents", "first_purchase_at", "last_purchase_at",
+                "favorite_product_id", "favorite_product_count",
+            ],
+            select(
+                totals.c.user_id,
+                totals.c.purchase_count,
+                totals.c.total_spent_cents,
+                totals.c.first_purchase_at,
+                totals.c.last_purchase_at,
+                favorites.c.product_id,
+                func.coalesce(favorites.c.quantity, 0),
+            ).outerjoin(favorites, favorites.c.user_id == totals.c.user_id)
+        )
+    )
+
+    customers = session.execute(select(func.count()).select_from(UserStats)).scalar_one()
+    session.commit()
+    logger.info(f"Rebuilt user stats for {customers} customers")
+    return customers
+
+
+def add_purchases_to_user_stats(session: Session, new_purchases: FromClause) -> None:
+    """
+    Apply a batch of newly inserted purchases to the customer summaries.
+
+    The set-based counterpart of UserStatsRepository.record_purchase: the same
+    upserts, run once for every customer in the batch inside a single statement.
+    Summary rows are upserted in key order, so batches applied concurrently lock
+    them in the same order and do not deadlock. The caller owns the transaction,
+    which should be the one that inserted the purchases and their items.
+
+    Args:
+        session: SQLAlchemy session the purchases were inserted in
+        new_purchases: Table or subquery whose `id` column lists the purchases to apply;
+            each must be applied exactly once
+    """
+    quantities = (
+        select(Purchase.user_id, PurchaseItem.product_id, func.sum(PurchaseItem.quantity))
+        .join(new_purchases, new_purchases.c.id == Purchase.id)
+        .join(PurchaseItem, PurchaseItem.purchase_id == Purchase.id)
+        .group_by(Purchase.user_id, PurchaseItem.product_id)
+        .order_by(Purchase.user_id, PurchaseItem.product_id)
+    )
+    stmt = postgresql.insert(UserProductStats).from_select(["user_id", "product_id", "quantity"], quantities)
+    product_totals = stmt.on_conflict_do_update(
+        index_elements=[UserProductStats.user_id, UserProductStats.product_id],
+        set_={"quantity": UserProductStats.quantity + stmt.excluded.quantity},
+    ).returning(UserProductStats.user_id, UserProductStats.product_id, UserProductStats.quantity).cte("product_totals")
+
+    # Favorite among the products in the batch, with their running totals
+    favorites = (
+        select(product_totals.c.user_id, product_totals.c.product_id, product_totals.c.quantity)
+        .distinct(product_totals.c.user_id)
+        .order_by(product_totals.c.user_id, product_totals.c.quantity.desc(), product_totals.c.product_id)
+    ).subquery("favorites")
+    totals = (
+        select(
+            Purchase.user_id,
+            func.count().label("purchase_count"),
+            func.sum(Purchase.total_amount_cents).label("total_spent_cents"),
+            func.min(Purchase.timestamp).label("first_purchase_at"),
+            func.max(Purchase.timestamp).label("last_purchase_at"),
+        )
+        .join(new_purchases, new_purchases.c.id == Purchase.id)
+        .group_by(Purchase.user_id)
+    ).cte("totals")
+    stmt = postgresql.insert(UserStats).from_select(
+        [
+            "user_id", "purchase_count", "total_spent_cents", "first_purchase_at", "last_purchase_at",
+            "favorite_product_id", "favorite_product_count",
+        ],
+        select(
+            totals.c.user_id,
+            totals.c.purchase_count,
+            totals.c.total_spent_cents,
+            totals.c.first_purchase_at,
+            totals.c.last_purchase_at,
+            favorites.c.product_id,
+            func.coalesce(favorites.c.quantity, 0),
+        )
+        .outerjoin(favorites, favorites.c.user_id == totals.c.user_id)
+        .order_by(totals.c.user_id)
+    )
+    overtakes = stmt.excluded.favorite_product_count > UserStats.favorite_product_count
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UserStats.user_id],
+        set_={
+            "purchase_count": UserStats.purchase_count + stmt.excluded.purchase_count,
+            "total_spent_cents": UserStats.total_spent_cents + stmt.excluded.total_spent_cents,
+            "first_purchase_at": func.least(UserStats.first_purchase_at, stmt.excluded.first_purchase_at),
+            "last_purchase_at": func.greatest(UserStats.last_purchase_at, stmt.excluded.last_purchase_at),
+            "favorite_product_id": case(
+                (overtakes, stmt.excluded.favorite_product_id),
+                else_=UserStats.favorite_product_id
+            ),
+            "favorite_product_count": func.greatest(
+                UserStats.favorite_product_count, stmt.excluded.favorite_product_count
+            ),
+        },
+    )
+    session.execute(stmt)
+
+
+def main() -> None:
+    """Run the rebuild against the configured database."""
+    session = SessionLocal()
+    try:
+        rebuild_user_stats(session)
+    except Exception as e:
+        session.rollback()
+        logger.error(f"User stats rebuild failed: {e}")
+        raise
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
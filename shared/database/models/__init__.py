@@ -1,8 +1,11 @@
 from shared.database.models.branch import Branch
+from shared.database.models.ingest_watermark import IngestWatermark
 from shared.database.models.product import Product
 from shared.database.models.purchase import Purchase
 from shared.database.models.purchase_item import PurchaseItem
 from shared.database.models.user import User
+from shared.database.models.user_product_stats import UserProductStats
+from shared.database.models.user_stats import UserStats
 
 __all__ = [
     "Branch",
@@ -10,4 +13,7 @@ __all__ = [
     "Product",
     "PurchaseItem",
     "Purchase",
+    "UserStats",
+    "UserProductStats",
+    "IngestWatermark",
 ]
@@ -1,7 +1,8 @@
-from sqlalchemy import Column, String
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, select, func
+from sqlalchemy.orm import relationship, column_property
 
 from shared.database import Base
+from shared.database.models.purchase import Purchase
 
 
 class Branch(Base):
@@ -11,16 +12,21 @@ class Branch(Base):
     Each branch is a physical location where purchases can be made.
     Branches have a unique identifier and can have multiple purchases.
 
+    Aggregates are deferred SQL column properties: accessing one on an instance
+    issues a single aggregate query, and `undefer()` loads them for a whole list
+    of branches in the same SELECT.
+
     Attributes:
         id: Unique identifier for the branch
         purchases: List of purchases made at this branch
+        total_sales_cents: Total sales amount in cents (SQL aggregate, deferred)
+        customer_count: Number of unique customers (SQL aggregate, deferred)
     """
     __tablename__ = "branches"
 
     id = Column(
         String,
         primary_key=True,
-        index=True,
         doc="Unique identifier for the branch"
     )
 
@@ -31,18 +37,36 @@ class Branch(Base):
         doc="List of purchases made at this branch"
     )
 
+    total_sales_cents = column_property(
+        select(func.coalesce(func.sum(Purchase.total_amount_cents), 0))
+        .where(Purchase.supermarket_id == id)
+        .correlate_except(Purchase)
+        .scalar_subquery(),
+        deferred=True,
+        doc="Total sales amount for this branch, in cents"
+    )
+
+    customer_count = column_property(
+        select(func.count(func.distinct(Purchase.user_id)))
+        .where(Purchase.supermarket_id == id)
+        .correlate_except(Purchase)
+        .scalar_subquery(),
+        deferred=True,
+        doc="Number of unique customers who purchased at this branch"
+    )
+
     def __repr__(self) -> str:
         """Return a string representation of the branch."""
-        return f"<Branch id={self.id} purchases={len(self.purchases)}>"
+        return f"<Branch id={self.id}>"
 
-    def get_total_sales(self) -> float:
+    def get_total_sales(self) -> int:
         """
         Calculate and return the total sales amount for this branch.
 
         Returns:
-            float: Total sales amount
+            int: Total sales amount in cents
         """
-        return sum(float(purchase.total_amount) for purchase in self.purchases)
+        return int(self.total_sales_cents)
 
     def get_customer_count(self) -> int:
         """
@@ -51,4 +75,4 @@ class Branch(Base):
         Returns:
             int: Number of unique customers
         """
-        return len({purchase.user_id for purchase in self.purchases})
+        return self.customer_count
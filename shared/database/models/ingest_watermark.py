@@ -0,0 +1,65 @@
+from sqlalchemy import Column, String, BigInteger, DateTime, CheckConstraint, func
+
+from shared.database import Base
+
+
+class IngestWatermark(Base):
+    """
+    Progress of the bulk loader through a source file.
+
+    One row per source (the file name). The loader resumes reading at
+    `byte_offset`, so re-running it over a file that only had rows appended
+    processes just the new rows. `head_sha256` fingerprints the start of the file;
+    if it no longer matches, the file was replaced and is read from the beginning.
+
+    Attributes:
+        source: Name of the source file
+        byte_offset: Offset just past the last committed row
+        rows_processed: Number of data rows read up to byte_offset
+        head_sha256: SHA-256 of the first min(byte_offset, 4096) bytes
+        updated_at: When the watermark last advanced
+    """
+    __tablename__ = "ingest_watermarks"
+
+    source = Column(
+        String,
+        primary_key=True,
+        doc="Name of the source file"
+    )
+
+    byte_offset = Column(
+        BigInteger,
+        nullable=False,
+        default=0,
+        doc="Offset just past the last committed row"
+    )
+
+    rows_processed = Column(
+        BigInteger,
+        nullable=False,
+        default=0,
+        doc="Number of data rows read up to byte_offset"
+    )
+
+    head_sha256 = Column(
+        String(64),
+        nullable=False,
+        doc="SHA-256 of the first min(byte_offset, 4096) bytes"
+    )
+
+    updated_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+        onupdate=func.now(),
+        doc="When the watermark last advanced"
+    )
+
+    __table_args__ = (
+        CheckConstraint('byte_offset >= 0', name='non_negative_byte_offset'),
+        CheckConstraint('rows_processed >= 0', name='non_negative_rows_processed'),
+    )
+
+    def __repr__(self) -> str:
+        """Return a string representation of the watermark."""
+        return f"<IngestWatermark source={self.source} offset={self.byte_offset} rows={self.rows_processed}>"
@@ -1,10 +1,10 @@
-from decimal import Decimal
 from uuid import uuid4
 
-from sqlalchemy import Column, String, NUMERIC, UUID, CheckConstraint
-from sqlalchemy.orm import relationship, validates
+from sqlalchemy import Column, String, BigInteger, UUID, CheckConstraint, select, func
+from sqlalchemy.orm import relationship, validates, column_property
 
 from shared.database import Base
+from shared.database.models.purchase_item import PurchaseItem
 
 
 class Product(Base):
@@ -17,15 +17,16 @@ class Product(Base):
     Attributes:
         id: Unique identifier for the product
         product_name: Name of the product (must be unique)
-        unit_price: Price per unit of the product
+        unit_price_cents: Price per unit of the product, in cents
         purchase_items: List of purchase items for this product
+        total_sold: Total units sold (SQL aggregate, deferred)
+        total_revenue_cents: Total revenue in cents (SQL aggregate, deferred)
     """
     __tablename__ = "products"
 
     id = Column(
         UUID(as_uuid=True),
         primary_key=True,
-        index=True,
         default=uuid4,
         doc="Unique identifier for the product"
     )
@@ -38,10 +39,10 @@ class Product(Base):
         doc="Name of the product"
     )
 
-    unit_price = Column(
-        NUMERIC,
+    unit_price_cents = Column(
+        BigInteger,
         nullable=False,
-        doc="Price per unit of the product"
+        doc="Price per unit of the product, in cents"
     )
 
     purchase_items = relationship(
@@ -50,13 +51,31 @@ class Product(Base):
         doc="List of purchase items for this product"
     )
 
+    total_sold = column_property(
+        select(func.coalesce(func.sum(PurchaseItem.quantity), 0))
+        .where(PurchaseItem.product_id == id)
+        .correlate_except(PurchaseItem)
+        .scalar_subquery(),
+        deferred=True,
+        doc="Total number of units sold for this product"
+    )
+
+    total_revenue_cents = column_property(
+        select(func.coalesce(func.sum(PurchaseItem.unit_price_cents * PurchaseItem.quantity), 0))
+        .where(PurchaseItem.product_id == id)
+        .correlate_except(PurchaseItem)
+        .scalar_subquery(),
+        deferred=True,
+        doc="Total revenue generated by this product, in cents"
+    )
+
     __table_args__ = (
-        CheckConstraint('unit_price >= 0', name='non_negative_unit_price'),
+        CheckConstraint('unit_price_cents >= 0', name='non_negative_unit_price'),
     )
 
     def __repr__(self) -> str:
         """Return a string representation of the product."""
-        return f"<Product id={self.id} name={self.product_name} price={self.unit_price}>"
+        return f"<Product id={self.id} name={self.product_name} price_cents={self.unit_price_cents}>"
 
     def get_total_sold(self) -> int:
         """
@@ -65,39 +84,37 @@ class Product(Base):
         Returns:
             int: Total number of units sold
         """
-        return sum(pi.quantity for pi in self.purchase_items)
+        return self.total_sold
 
-    def get_total_revenue(self) -> float:
+    def get_total_revenue(self) -> int:
         """
         Calculate and return the total revenue generated by this product.
 
         Returns:
-            float: Total revenue
+            int: Total revenue in cents
         """
-        return sum(float(pi.unit_price * pi.quantity) for pi in self.purchase_items)
+        return int(self.total_revenue_cents)
 
-    @validates('unit_price')
-    def validate_unit_price(self, key: str, price: float) -> Decimal:
+    @validates('unit_price_cents')
+    def validate_unit_price_cents(self, key: str, cents: int) -> int:
         """
-        Validate that unit price is positive.
+        Validate that unit price is a non-negative whole number of cents.
 
         Args:
             key: The column name being validated
-            price: The price value to validate
+            cents: The price in cents to validate
 
         Returns:
-            Decimal: The validated price
+            int: The validated price
 
         Raises:
-            ValueError: If the price is negative
+            ValueError: If the price is negative or not an integer
         """
-        if isinstance(price, str):
-            price = Decimal(price)
-        elif isinstance(price, float):
-            price = Decimal(str(price))
-        if price < 0:
+        if isinstance(cents, bool) or not isinstance(cents, int):
+            raise ValueError("Unit price must be a whole number of cents")
+        if cents < 0:
             raise ValueError("Unit price must be non-negative")
-        return price
+        return cents
 
     @validates('product_name')
     def validate_product_name(self, key: str, name: str) -> str:
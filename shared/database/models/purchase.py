@@ -1,10 +1,8 @@
-from uuid import uuid4
-
-from sqlalchemy import Column, ForeignKey, UUID, DateTime, String, func
-from sqlalchemy.dialects.mysql import NUMERIC
+from sqlalchemy import Column, ForeignKey, UUID, DateTime, String, BigInteger, Index, func
 from sqlalchemy.orm import relationship
 
 from shared.database import Base
+from shared.database.ids import uuid7
 
 
 class Purchase(Base):
@@ -16,24 +14,24 @@ class Purchase(Base):
     has a total amount associated with it.
 
     Attributes:
-        id: Unique identifier for the purchase
+        id: Unique identifier for the purchase (time-ordered UUIDv7)
         supermarket_id: ID of the branch where the purchase was made
         user_id: ID of the customer who made the purchase
         timestamp: When the purchase was made
-        total_amount: Total amount of the purchase
+        inserted_at: When the row was written to the database
+        total_amount_cents: Total amount of the purchase, in cents
         branch: Relationship to the Branch model
         user: Relationship to the User model
         purchase_items: List of PurchaseItem objects for this purchase
     """
     __tablename__ = "purchases"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
 
     supermarket_id = Column(
         String,
         ForeignKey("branches.id", ondelete="CASCADE"),
         nullable=False,
-        index=True,
         doc="ID of the branch where the purchase was made"
     )
 
@@ -49,20 +47,29 @@ class Purchase(Base):
         DateTime(timezone=True),
         server_default=func.now(),
         nullable=False,
+        index=True,
         doc="When the purchase was made"
     )
 
+    inserted_at = Column(
+        DateTime(timezone=True),
+        server_default=func.clock_timestamp(),
+        nullable=False,
+        index=True,
+        doc="When the row was written to the database"
+    )
+
     items_list = Column(
         String,
         nullable=False,
         doc="Comma-separated list of items purchased"
     )
 
-    total_amount = Column(
-        NUMERIC,
+    total_amount_cents = Column(
+        BigInteger,
         nullable=False,
         default=0,
-        doc="Total amount of the purchase"
+        doc="Total amount of the purchase, in cents"
     )
 
     branch = relationship(
@@ -84,9 +91,14 @@ class Purchase(Base):
         doc="List of PurchaseItem objects for this purchase"
     )
 
+    __table_args__ = (
+        # Per-branch time ranges; also serves lookups by branch alone
+        Index('ix_purchases_supermarket_id_timestamp', 'supermarket_id', 'timestamp'),
+    )
+
     def __repr__(self) -> str:
         """Return a string representation of the purchase."""
-        return f"<Purchase id={self.id} branch={self.supermarket_id} user={self.user_id} total={self.total_amount}>"
+        return f"<Purchase id={self.id} branch={self.supermarket_id} user={self.user_id} total_cents={self.total_amount_cents}>"
 
     def get_item_count(self) -> int:
         """Return the number of items in this purchase."""
@@ -1,6 +1,6 @@
 from typing import Optional
 
-from sqlalchemy import Column, UUID, ForeignKey, Integer, NUMERIC, CheckConstraint
+from sqlalchemy import Column, UUID, ForeignKey, Integer, BigInteger, CheckConstraint, Index
 from sqlalchemy.orm import relationship, validates
 
 from shared.database import Base
@@ -19,7 +19,7 @@ class PurchaseItem(Base):
         purchase_id: ID of the purchase this item belongs to
         product_id: ID of the product being purchased
         quantity: Number of units purchased (must be 1 or less)
-        unit_price: Price per unit at the time of purchase.
+        unit_price_cents: Price per unit at the time of purchase, in cents
         purchase: Relationship to the Purchase model
         product: Relationship to the Product model
     """
@@ -46,10 +46,10 @@ class PurchaseItem(Base):
         doc="Number of units purchased (must be 1 or less)"
     )
 
-    unit_price = Column(
-        NUMERIC,
+    unit_price_cents = Column(
+        BigInteger,
         nullable=False,
-        doc="Price per unit at the time of purchase"
+        doc="Price per unit at the time of purchase, in cents"
     )
 
     purchase = relationship(
@@ -68,9 +68,9 @@ class PurchaseItem(Base):
         """Return a string representation of the purchase item."""
         return f"<PurchaseItem purchase={self.purchase_id} product={self.product_id} quantity={self.quantity}>"
 
-    def get_total_price(self) -> float:
-        """Calculate and return the total price for this item."""
-        return float(self.unit_price) * self.quantity
+    def get_total_price(self) -> int:
+        """Calculate and return the total price for this item, in cents."""
+        return self.unit_price_cents * self.quantity
 
     @property
     def product_name(self) -> Optional[str]:
@@ -81,7 +81,9 @@ class PurchaseItem(Base):
     __table_args__ = (
         CheckConstraint('quantity > 0', name='positive_quantity'),
         CheckConstraint(f'quantity <= {settings.MAX_QUANTITY_PER_PRODUCT}', name='max_quantity_per_product'),
-        CheckConstraint('unit_price >= 0', name='non_negative_unit_price'),
+        CheckConstraint('unit_price_cents >= 0', name='non_negative_unit_price'),
+        # Product totals and the products.id foreign key check; the primary key leads with purchase_id
+        Index('ix_purchase_items_product_id', 'product_id', postgresql_include=['quantity']),
     )
 
     @validates('quantity')
@@ -93,9 +95,11 @@ class PurchaseItem(Base):
             raise ValueError(f"Quantity cannot exceed {settings.MAX_QUANTITY_PER_PRODUCT} per product")
         return quantity
 
-    @validates('unit_price')
-    def validate_unit_price(self, key, price):
-        """Validate unit price is positive"""
-        if price < 0:
+    @validates('unit_price_cents')
+    def validate_unit_price_cents(self, key, cents):
+        """Validate unit price is a non-negative whole number of cents"""
+        if isinstance(cents, bool) or not isinstance(cents, int):
+            raise ValueError("Unit price must be a whole number of cents")
+        if cents < 0:
             raise ValueError("Unit price must be positive")
-        return price
+        return cents
@@ -1,9 +1,10 @@
-from uuid import uuid4
-
-from sqlalchemy import Column, UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, UUID, select, func
+from sqlalchemy.ext.hybrid import hybrid_method
+from sqlalchemy.orm import relationship, column_property
 
 from shared.database import Base
+from shared.database.ids import uuid7
+from shared.database.models.purchase import Purchase
 
 
 class User(Base):
@@ -14,17 +15,22 @@ class User(Base):
     Users are identified by UUID and can be created automatically when
     they make their first purchase.
 
+    Aggregates are deferred SQL column properties: accessing one on an instance
+    issues a single aggregate query, and `undefer()` loads them for a whole list
+    of users in the same SELECT.
+
     Attributes:
         id: Unique identifier for the user
         purchases: List of purchases made by this user
+        total_spent_cents: Total amount spent in cents (SQL aggregate, deferred)
+        purchase_count: Number of purchases (SQL aggregate, deferred)
     """
     __tablename__ = "users"
 
     id = Column(
         UUID(as_uuid=True),
         primary_key=True,
-        index=True,
-        default=uuid4,
+        default=uuid7,
         doc="Unique identifier for the user"
     )
 
@@ -35,18 +41,36 @@ class User(Base):
         doc="List of purchases made by this user"
     )
 
+    total_spent_cents = column_property(
+        select(func.coalesce(func.sum(Purchase.total_amount_cents), 0))
+        .where(Purchase.user_id == id)
+        .correlate_except(Purchase)
+        .scalar_subquery(),
+        deferred=True,
+        doc="Total amount spent by this user, in cents"
+    )
+
+    purchase_count = column_property(
+        select(func.count(Purchase.id))
+        .where(Purchase.user_id == id)
+        .correlate_except(Purchase)
+        .scalar_subquery(),
+        deferred=True,
+        doc="Number of purchases made by this user"
+    )
+
     def __repr__(self) -> str:
         """Return a string representation of the user."""
-        return f"<User id={self.id} purchases={len(self.purchases)}>"
+        return f"<User id={self.id}>"
 
-    def get_total_spent(self) -> float:
+    def get_total_spent(self) -> int:
         """
         Calculate and return the total amount spent by this user.
 
         Returns:
-            float: Total amount spent
+            int: Total amount spent in cents
         """
-        return sum(float(purchase.total_amount) for purchase in self.purchases)
+        return int(self.total_spent_cents)
 
     def get_purchase_count(self) -> int:
         """
@@ -55,14 +79,16 @@ class User(Base):
         Returns:
             int: Number of purchases
         """
-        return len(self.purchases)
+        return self.purchase_count
 
+    @hybrid_method
     def is_loyal_customer(self, min_purchases: int = 3) -> bool:
         """
         Check if this user is a loyal customer.
 
         A loyal customer is defined as someone who has made at least
-        the specified number of purchases (default: 3).
+        the specified number of purchases (default: 3). Also usable as a
+        SQL filter, e.g. `select(User).where(User.is_loyal_customer(5))`.
 
         Args:
             min_purchases: Minimum number of purchases to be considered loyal
@@ -70,25 +96,4 @@ class User(Base):
         Returns:
             bool: True if the user is a loyal customer, False otherwise
         """
-        return self.get_purchase_count() >= min_purchases
-
-    def get_favorite_product(self) -> str:
-        """
-        Return the product that this user has purchased the most.
-
-        Returns:
-            str: Name of the favorite product
-        """
-        if not self.purchases:
-            return ""
-
-        product_counts = {}
-        for purchase in self.purchases:
-            for item in purchase.items:
-                product_counts[item.product.product_name] = product_counts.get(item.product.product_name,
-                                                                               0) + item.quantity
-
-        if not product_counts:
-            return ""
-
-        return max(product_counts.items(), key=lambda x: x[1])[0]
+        return self.purchase_count >= min_purchases
@@ -0,0 +1,44 @@
+from sqlalchemy import Column, UUID, ForeignKey, Integer
+
+from shared.database import Base
+
+
+class UserProductStats(Base):
+    """
+    Units of each product bought by each customer.
+
+    Backs the incremental favorite-product tracking in UserStats: when a purchase
+    is recorded, only the rows of the purchased products are touched, and the
+    favorite is replaced only if one of them overtakes it.
+
+    Attributes:
+        user_id: ID of the customer
+        product_id: ID of the product
+        quantity: Total units of the product bought by the customer
+    """
+    __tablename__ = "user_product_stats"
+
+    user_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+        doc="ID of the customer"
+    )
+
+    product_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("products.id", ondelete="CASCADE"),
+        primary_key=True,
+        doc="ID of the product"
+    )
+
+    quantity = Column(
+        Integer,
+        nullable=False,
+        default=0,
+        doc="Total units of the product bought by the customer"
+    )
+
+    def __repr__(self) -> str:
+        """Return a string representation of the user product stats."""
+        return f"<UserProductStats user={self.user_id} product={self.product_id} quantity={self.quantity}>"
@@ -0,0 +1,92 @@
+from sqlalchemy import Column, UUID, ForeignKey, Integer, BigInteger, DateTime, CheckConstraint
+from sqlalchemy.orm import relationship
+
+from shared.database import Base
+
+
+class UserStats(Base):
+    """
+    Per-customer purchase summary, maintained incrementally on every purchase.
+
+    One row per customer who made at least one purchase. The row is updated in the
+    same transaction as the purchase itself, so analytics can answer per-customer
+    questions without scanning the purchases table.
+
+    Attributes:
+        user_id: ID of the customer
+        purchase_count: Number of purchases made by the customer
+        total_spent_cents: Total amount spent by the customer, in cents
+        first_purchase_at: Timestamp of the customer's earliest purchase
+        last_purchase_at: Timestamp of the customer's latest purchase
+        favorite_product_id: ID of the product the customer bought the most
+        favorite_product_count: Units bought of the favorite product
+        user: Relationship to the User model
+        favorite_product: Relationship to the Product model
+    """
+    __tablename__ = "user_stats"
+
+    user_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+        doc="ID of the customer"
+    )
+
+    purchase_count = Column(
+        Integer,
+        nullable=False,
+        default=0,
+        index=True,
+        doc="Number of purchases made by the customer"
+    )
+
+    total_spent_cents = Column(
+        BigInteger,
+        nullable=False,
+        default=0,
+        doc="Total amount spent by the customer, in cents"
+    )
+
+    first_purchase_at = Column(
+        DateTime(timezone=True),
+        nullable=True,
+        doc="Timestamp of the customer's earliest purchase"
+    )
+
+    last_purchase_at = Column(
+        DateTime(timezone=True),
+        nullable=True,
+        doc="Timestamp of the customer's latest purchase"
+    )
+
+    favorite_product_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("products.id", ondelete="SET NULL"),
+        nullable=True,
+        doc="ID of the product the customer bought the most"
+    )
+
+    favorite_product_count = Column(
+        Integer,
+        nullable=False,
+        default=0,
+        doc="Units bought of the favorite product"
+    )
+
+    user = relationship(
+        "User",
+        doc="Relationship to the User model"
+    )
+
+    favorite_product = relationship(
+        "Product",
+        doc="Relationship to the Product model"
+    )
+
+    __table_args__ = (
+        CheckConstraint('purchase_count >= 0', name='non_negative_purchase_count'),
+    )
+
+    def __repr__(self) -> str:
+        """Return a string representation of the user stats."""
+        return f"<UserStats user={self.user_id} purchases={self.purchase_count} spent_cents={self.total_spent_cents}>"
@@ -0,0 +1,39 @@
+"""
+Connection pool instrumentation for the shared engine.
+"""
+
+import time
+
+from sqlalchemy import Engine
+from sqlalchemy.pool import QueuePool
+
+from shared.metrics import DB_POOL_WAIT, CallbackGauge
+from shared.tracing import record_span
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waits for a connection, as a metric and a span."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - started
+            DB_POOL_WAIT.observe(waited)
+            record_span("db.pool_wait", started, waited)
+
+
+def register_pool_metrics(engine: Engine) -> None:
+    """
+    Expose the engine's pool state as gauges read at scrape time.
+
+    Args:
+        engine: Engine whose pool is reported
+    """
+    pool = engine.pool
+    CallbackGauge("icash_db_pool_size", "Connections the pool keeps open", pool.size)
+    CallbackGauge("icash_db_pool_checked_out", "Connections currently checked out of the pool", pool.checkedout)
+    # QueuePool.overflow() counts up from -pool_size until the pool is exhausted
+    CallbackGauge("icash_db_pool_overflow", "Connections open beyond pool_size",
+                  lambda: max(0, pool.overflow()))
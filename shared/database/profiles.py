@@ -0,0 +1,151 @@
+"""
+Engine profiles: connection pool and session settings per service.
+
+The cash register runs many short transactions and should fail fast rather than
+hold a connection behind a slow statement; analytics runs few, long scans that
+want a consistent snapshot. DB_PROFILE selects the profile (each service's image
+sets its own); DB_POOL_SIZE, DB_MAX_OVERFLOW and DB_STATEMENT_TIMEOUT_MS override
+the profile's values when they are set.
+
+With DB_PGBOUNCER=true the engine is built for a PgBouncer pool in transaction
+mode, where consecutive transactions may run on different server connections:
+SQLAlchemy keeps no connections of its own (NullPool), the statement timeout is
+set per transaction with SET LOCAL instead of as a connection option, and
+server-side prepared statements are disabled for drivers that would use them.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+from sqlalchemy import Engine, create_engine, event, make_url
+from sqlalchemy.pool import NullPool
+
+from shared.database.core.config import settings
+from shared.database.pool import TimedQueuePool
+
+
+@dataclass(frozen=True)
+class EngineProfile:
+    """
+    Pool and session settings for one kind of workload.
+
+    Attributes:
+        name: Profile name, as given in DB_PROFILE
+        pool_size: Connections kept open
+        max_overflow: Extra connections opened under load
+        statement_timeout_ms: Server-side statement timeout, 0 for none
+        isolation_level: Transaction isolation level, None for the server default
+        application_name: Reported in pg_stat_activity and the server logs
+    """
+    name: str
+    pool_size: int
+    max_overflow: int
+    statement_timeout_ms: int = 0
+    isolation_level: Optional[str] = None
+    application_name: str = "icash"
+
+    @property
+    def capacity(self) -> int:
+        """Most connections the service uses at once."""
+        return self.pool_size + self.max_overflow
+
+
+PROFILES = {
+    "default": EngineProfile("default", pool_size=20, max_overflow=30),
+    "cash_register": EngineProfile(
+        "cash_register",
+        pool_size=10,
+        max_overflow=10,
+        statement_timeout_ms=5_000,
+        isolation_level="READ COMMITTED",
+        application_name="icash-cash-register",
+    ),
+    "store_analytics": EngineProfile(
+        "store_analytics",
+        pool_size=5,
+        max_overflow=5,
+        statement_timeout_ms=60_000,
+        isolation_level="REPEATABLE READ",
+        application_name="icash-store-analytics",
+    ),
+}
+
+
+@lru_cache(maxsize=1)
+def active_profile() -> EngineProfile:
+    """
+    The profile selected by DB_PROFILE, with any DB_* overrides applied.
+
+    Raises:
+        ValueError: If DB_PROFILE names an unknown profile
+    """
+    if settings.DB_PROFILE not in PROFILES:
+        raise ValueError(f"Unknown DB_PROFILE {settings.DB_PROFILE!r}, expected one of {sorted(PROFILES)}")
+    profile = PROFILES[settings.DB_PROFILE]
+
+    overrides = {
+        field: getattr(settings, setting)
+        for field, setting in (
+            ("pool_size", "DB_POOL_SIZE"),
+            ("max_overflow", "DB_MAX_OVERFLOW"),
+            ("statement_timeout_ms", "DB_STATEMENT_TIMEOUT_MS"),
+        )
+        if setting in settings.model_fields_set
+    }
+    return EngineProfile(**{**vars(profile), **overrides})
+
+
+def _set_local_statement_timeout(timeout_ms: int):
+    def on_begin(conn):
+        conn.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
+
+    return on_begin
+
+
+def create_profile_engine(database_url: str, profile: EngineProfile, pgbouncer: bool = False,
+                          echo: bool = False) -> Engine:
+    """
+    Create an engine configured for `profile`.
+
+    Args:
+        database_url: Database (or PgBouncer) URL
+        profile: Pool and session settings
+        pgbouncer: Build for PgBouncer transaction pooling
+        echo: Log every statement
+
+    Returns:
+        Engine: The configured engine
+    """
+    url = make_url(database_url)
+    options = {"echo": echo}
+    connect_args = {}
+
+    if url.get_backend_name() == "postgresql":
+        connect_args["application_name"] = profile.application_name
+        if profile.statement_timeout_ms and not pgbouncer:
+            connect_args["options"] = f"-c statement_timeout={profile.statement_timeout_ms}"
+        if pgbouncer and url.get_driver_name() == "psycopg":
+            # psycopg 3 prepares repeated statements on the server; they would not exist
+            # on the next transaction's connection
+            connect_args["prepare_threshold"] = None
+        if profile.isolation_level:
+            # psycopg sends the level with each BEGIN, so it does not leak through PgBouncer
+            options["isolation_level"] = profile.isolation_level
+
+    if pgbouncer:
+        options["poolclass"] = NullPool
+    else:
+        options.update(
+            poolclass=TimedQueuePool,
+            pool_size=profile.pool_size,
+            max_overflow=profile.max_overflow,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_pre_ping=True,
+        )
+
+    engine = create_engine(url, connect_args=connect_args, **options)
+    if pgbouncer and profile.statement_timeout_ms and url.get_backend_name() == "postgresql":
+        event.listen(engine, "begin", _set_local_statement_timeout(profile.statement_timeout_ms))
+    return engine
@@ -0,0 +1,70 @@
+"""
+Connection warm-up run before a service starts taking traffic.
+
+The first requests after a deploy or scale-out otherwise pay for opening pooled
+connections (TCP, TLS, authentication, backend start-up), configuring the ORM
+mappers and compiling their statements. `warm_up` does that work up front.
+"""
+
+import time
+from typing import Callable, Iterable
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session, configure_mappers
+
+from shared.database import SessionLocal, get_engine
+from shared.database.core.config import settings
+from shared.database.logger import logger
+from shared.database.profiles import active_profile
+
+
+def warm_up(connections: int, queries: Iterable[Callable[[Session], object]] = ()) -> dict[str, float]:
+    """
+    Open pooled connections and run representative queries so their costs are paid before traffic.
+
+    Args:
+        connections: Connections to open and leave in the pool (capped at the profile's pool_size,
+            since overflow connections are closed when returned)
+        queries: Callables run with a fresh session each, e.g. the service's read paths, to compile
+            and cache their statements
+
+    Returns:
+        dict[str, float]: Seconds spent on each step
+    """
+    timings = {}
+
+    started = time.perf_counter()
+    configure_mappers()
+    timings["mappers"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    engine = get_engine()
+    # With PgBouncer (NullPool) connections are not kept, so one round trip is enough
+    count = 1 if settings.DB_PGBOUNCER else max(1, min(connections, active_profile().pool_size))
+    opened = []
+    try:
+        for _ in range(count):
+            conn = engine.connect()
+            opened.append(conn)
+            conn.execute(text("SELECT 1"))
+    finally:
+        for conn in opened:
+            conn.close()
+    timings["connections"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for query in queries:
+        session = SessionLocal()
+        try:
+            query(session)
+        except Exception as e:
+            logger.warning("Warm-up query %s failed: %s", getattr(query, "__name__", query), e)
+        finally:
+            session.close()
+    timings["queries"] = time.perf_counter() - started
+
+    logger.info(
+        "Warmed up %d connection(s) in %.3f s (mappers %.3f s, connections %.3f s, queries %.3f s)",
+        count, sum(timings.values()), timings["mappers"], timings["connections"], timings["queries"],
+    )
+    return timings
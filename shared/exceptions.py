@@ -85,3 +85,16 @@ class DuplicateProductInPurchaseError(BusinessRuleViolationError):
             error_code: str = "DUPLICATE_PRODUCT_IN_PURCHASE"
     ):
         super().__init__(message, error_code)
+
+
+class ServiceOverloadedError(iCashException):
+    """Request rejected by admission control because the service is saturated"""
+
+    def __init__(
+            self,
+            message: str = "Service is overloaded, retry later",
+            retry_after: int = 1,
+            error_code: str = "SERVICE_OVERLOADED"
+    ):
+        super().__init__(message, error_code, status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.retry_after = retry_after
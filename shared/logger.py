@@ -1,8 +1,53 @@
+"""
+Logging setup shared by the iCash services.
+
+Loggers created by `setup_logger` never write to stdout or disk on the calling
+thread. Records pass the level and sampling checks, are put on a bounded queue
+by a QueueHandler and written by a background QueueListener, which drains
+whatever has accumulated and writes it with one call per handler. When the queue
+is full, records are dropped and counted rather than blocking the request.
+
+Pass arguments instead of pre-formatting messages (`logger.info("Created %s", x)`)
+so records filtered out by level or sampling are never formatted. INFO and DEBUG
+records can be sampled per logger with LOG_SAMPLE_RATES, e.g.
+LOG_SAMPLE_RATES='{"iCash.Database": 0.1}'; warnings and errors are always kept.
+Files get one JSON object per line and are only created when the first record
+is written; the console gets coloured text, or JSON with LOG_JSON_CONSOLE=true.
+"""
+
+import atexit
+import copy
+import json
 import logging
+import os
+import queue
+import random
 import sys
+from datetime import datetime, UTC
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 from typing import Optional
 
+from dotenv import load_dotenv
+from pydantic_settings import BaseSettings
+
+load_dotenv()
+
+
+class LoggingSettings(BaseSettings):
+    LOG_JSON_CONSOLE: bool = False
+    LOG_SAMPLE_RATES: dict[str, float] = {}
+    LOG_QUEUE_SIZE: int = 10_000
+    LOG_BATCH_SIZE: int = 500
+
+
+settings = LoggingSettings()
+
+# LogRecord attributes that are not user-supplied `extra` fields
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listeners: dict[str, QueueListener] = {}
+
 
 class ColoredFormatter(logging.Formatter):
     COLORS = {
@@ -17,44 +62,207 @@ class ColoredFormatter(logging.Formatter):
     def format(self, record):
         level = record.levelname
         if level in self.COLORS:
+            # Colour a copy: the same record is passed on to the file handler
+            record = copy.copy(record)
             record.levelname = f"{self.COLORS[level]}{level}{self.COLORS['RESET']}"
         return super().format(record)
 
 
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, including any `extra` fields."""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, UTC).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "function": record.funcName,
+            "line": record.lineno,
+            "thread": record.threadName,
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a random share of records below WARNING; always keep warnings and errors."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno >= logging.WARNING or random.random() < self.rate
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops records when the queue is full instead of blocking or raising."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record):
+        # Merge the arguments now, while they still hold their current values, but keep
+        # the traceback separate for the JSON formatter (QueueHandler would fold it into msg)
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class DeferredFileHandler(logging.FileHandler):
+    """FileHandler that creates the file, and its directory, when the first record is written."""
+
+    def __init__(self, filename: str, encoding: str = "utf-8"):
+        super().__init__(filename, mode="a", encoding=encoding, delay=True)
+
+    def _open(self):
+        Path(self.baseFilename).parent.mkdir(parents=True, exist_ok=True)
+        return super()._open()
+
+
+class BatchingQueueListener(QueueListener):
+    """QueueListener that writes everything queued so far with one write and flush per handler."""
+
+    def _monitor(self):
+        q = self.queue
+        while True:
+            batch = [self.dequeue(True)]
+            while len(batch) < settings.LOG_BATCH_SIZE:
+                try:
+                    batch.append(self.dequeue(False))
+                except queue.Empty:
+                    break
+
+            stop = self._sentinel in batch
+            records = [record for record in batch if record is not self._sentinel]
+            if records:
+                self._write(records)
+            if hasattr(q, "task_done"):
+                for _ in batch:
+                    q.task_done()
+            if stop:
+                break
+
+    def _write(self, records):
+        for handler in self.handlers:
+            kept = [record for record in records if record.levelno >= handler.level and handler.filter(record)]
+            if not kept:
+                continue
+            # Closed streams (e.g. after logging.shutdown) are reopened by the handler's own emit
+            if not isinstance(handler, logging.StreamHandler) or handler.stream is None:
+                for record in kept:
+                    handler.handle(record)
+                continue
+            try:
+                text = "".join(handler.format(record) + handler.terminator for record in kept)
+                with handler.lock:
+                    handler.stream.write(text)
+                    handler.flush()
+            except Exception:
+                # Fall back to per-record emit, which reports its own errors
+                for record in kept:
+                    handler.handle(record)
+
+
+def _stop_listeners():
+    for listener in _listeners.values():
+        listener.stop()
+    _listeners.clear()
+
+
+def _restart_listeners_after_fork():
+    # Only the forking thread survives a fork, so each logger gets a new queue and writer
+    # thread; records still queued in the parent are written by the parent
+    for name, listener in list(_listeners.items()):
+        log_queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+        for handler in logging.getLogger(name).handlers:
+            if isinstance(handler, DroppingQueueHandler):
+                handler.queue = log_queue
+        replacement = BatchingQueueListener(log_queue, *listener.handlers, respect_handler_level=True)
+        replacement.start()
+        _listeners[name] = replacement
+
+
+atexit.register(_stop_listeners)
+os.register_at_fork(after_in_child=_restart_listeners_after_fork)
+
+
 def setup_logger(
         name: str,
         level: str = "INFO",
         log_file: Optional[str] = None,
-        console_output: bool = True
+        console_output: bool = True,
+        sample_rate: Optional[float] = None,
 ) -> logging.Logger:
+    """
+    Configure a logger that hands records to a background writer thread.
+
+    Args:
+        name: Logger name
+        level: Minimum level
+        log_file: JSON Lines file to append to, if any
+        console_output: Also write to stdout
+        sample_rate: Share of INFO/DEBUG records to keep (default: LOG_SAMPLE_RATES[name], else all)
+
+    Returns:
+        logging.Logger: The configured logger
+    """
     logger = logging.getLogger(name)
     lvl = getattr(logging, level.upper(), logging.INFO)
     logger.setLevel(lvl)
 
     logger.handlers.clear()
+    logger.filters.clear()
+    if name in _listeners:
+        _listeners.pop(name).stop()
 
     simple_fmt = '%(asctime)s | %(levelname)s | %(message)s'
-    detailed_fmt = '%(asctime)s | %(name)s | %(levelname)s | %(funcName)s:%(lineno)d | %(message)s'
-    datefmt = '%Y-%m-%d %H:%M:%S'
-
-    simple_formatter = ColoredFormatter(fmt=simple_fmt, datefmt='%H:%M:%S')
-    detailed_formatter = logging.Formatter(fmt=detailed_fmt, datefmt=datefmt)
 
+    handlers = []
     if console_output:
         console_handler = logging.StreamHandler(sys.stdout)
         console_handler.setLevel(lvl)
-        console_handler.setFormatter(simple_formatter)
-        logger.addHandler(console_handler)
+        if settings.LOG_JSON_CONSOLE:
+            console_handler.setFormatter(JsonFormatter())
+        else:
+            console_handler.setFormatter(ColoredFormatter(fmt=simple_fmt, datefmt='%H:%M:%S'))
+        handlers.append(console_handler)
 
     if log_file:
-        log_path = Path(log_file)
-        log_path.parent.mkdir(parents=True, exist_ok=True)
-        file_handler = logging.FileHandler(log_file, mode='a', encoding='utf-8')
+        file_handler = DeferredFileHandler(log_file)
         file_handler.setLevel(lvl)
-        file_handler.setFormatter(detailed_formatter)
-        logger.addHandler(file_handler)
+        file_handler.setFormatter(JsonFormatter())
+        handlers.append(file_handler)
+
+    rate = sample_rate if sample_rate is not None else settings.LOG_SAMPLE_RATES.get(name)
+    if rate is not None and rate < 1:
+        logger.addFilter(SamplingFilter(rate))
 
-        print(f"[Logger] {name}: logging to file {log_path.resolve()}")
+    if handlers:
+        log_queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+        logger.addHandler(DroppingQueueHandler(log_queue))
+        listener = BatchingQueueListener(log_queue, *handlers, respect_handler_level=True)
+        listener.start()
+        _listeners[name] = listener
 
     logger.propagate = False
 
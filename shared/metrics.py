@@ -0,0 +1,298 @@
+"""
+Prometheus-compatible metrics for the iCash services.
+
+Counters, gauges and histograms keep one value table per thread: a thread only
+ever writes to its own table, so recording a sample takes no lock and, after a
+label combination has been seen once, allocates nothing but the label tuple.
+Tables are merged when /metrics is scraped. A lock is taken only the first time
+a thread touches a metric, to add its table to the list of shards. Worker threads
+come and go (AnyIO retires idle ones after a few seconds), so each scrape folds the
+tables of threads that have exited into one retired table and drops them.
+
+Values are per process; when several workers serve one service, each exposes
+its own series and Prometheus aggregates them. A forked child starts from zero.
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+from typing import Callable, Iterable
+
+from shared.routes import UNMATCHED_ROUTE, route_template
+from shared.tracing import span
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Registry:
+    """Set of metrics rendered together by the /metrics endpoint."""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric) -> None:
+        self._metrics.append(metric)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class _ShardedMetric:
+    """Base class holding one {label values: value} table per thread."""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = (),
+                 registry: Registry = REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._reset()
+        registry.register(self)
+
+    def _shard(self) -> dict:
+        try:
+            return self._local.values
+        except AttributeError:
+            values = {}
+            with self._shards_lock:
+                self._shards.append((threading.current_thread(), values))
+            self._local.values = values
+            return values
+
+    def _reset(self) -> None:
+        self._local = threading.local()
+        self._shards: list[tuple[threading.Thread, dict]] = []
+        self._retired = {}
+        self._shards_lock = threading.Lock()
+
+    @staticmethod
+    def _fold(into: dict, shard: dict) -> dict:
+        """Add the values of one table to another and return the latter."""
+        for labels, value in shard.items():
+            into[labels] = into.get(labels, 0.0) + value
+        return into
+
+    def _merged(self) -> dict:
+        with self._shards_lock:
+            live = []
+            for thread, shard in self._shards:
+                if thread.is_alive():
+                    live.append((thread, shard))
+                else:
+                    # The owner has exited, so nothing writes to its table any more
+                    self._fold(self._retired, shard)
+            self._shards = live
+            merged = self._fold({}, self._retired)
+        for _, shard in live:
+            # dict.copy is atomic under the GIL, so the owning thread may keep writing
+            self._fold(merged, shard.copy())
+        return merged
+
+    def samples(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in sorted(self._merged().items())
+        ]
+
+
+class Counter(_ShardedMetric):
+    """Monotonically increasing count; names should end in _total."""
+
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0.0) + amount
+
+
+class Gauge(_ShardedMetric):
+    """Value that goes up and down, e.g. requests in flight."""
+
+    kind = "gauge"
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0.0) + amount
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0.0) - amount
+
+
+class Histogram(_ShardedMetric):
+    """Distribution of observed values over fixed buckets."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = LATENCY_BUCKETS, registry: Registry = REGISTRY):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels: str) -> None:
+        shard = self._shard()
+        row = shard.get(labels)
+        if row is None:
+            # One count per bucket plus the +Inf bucket, then the sum
+            row = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        row[bisect_left(self.buckets, value)] += 1
+        row[-1] += value
+
+    @staticmethod
+    def _fold(into: dict, shard: dict) -> dict:
+        for labels, row in shard.items():
+            total = into.setdefault(labels, [0] * len(row))
+            for i, value in enumerate(list(row)):
+                total[i] += value
+        return into
+
+    def samples(self) -> list[str]:
+        lines = []
+        bucket_names = self.labelnames + ("le",)
+        for labels, row in sorted(self._merged().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), row):
+                cumulative += count
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(bucket_names, labels + (_format_value(bound),))} {cumulative}"
+                )
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(row[-1])}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class CallbackGauge:
+    """Gauge whose values are read from a callback at scrape time, e.g. connection pool state."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, callback: Callable[[], float],
+                 registry: Registry = REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+        registry.register(self)
+
+    def samples(self) -> list[str]:
+        return [f"{self.name} {_format_value(self.callback())}"]
+
+
+def _reset_after_fork() -> None:
+    # The parent's values are the parent's to report
+    for metric in REGISTRY._metrics:
+        if isinstance(metric, _ShardedMetric):
+            metric._reset()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "icash_http_request_duration_seconds",
+    "HTTP request latency by route template and status code",
+    ("method", "route", "status"),
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "icash_http_requests_in_flight",
+    "HTTP requests currently being served",
+)
+REPOSITORY_CALL_DURATION = Histogram(
+    "icash_repository_call_duration_seconds",
+    "Duration of repository method calls, including their queries",
+    ("repository", "method"),
+)
+DB_POOL_WAIT = Histogram(
+    "icash_db_pool_wait_seconds",
+    "Time spent waiting for a connection from the database pool",
+)
+PURCHASES = Counter(
+    "icash_purchases_total",
+    "Purchases recorded by the cash register, by branch",
+    ("supermarket_id",),
+)
+
+
+async def metrics_middleware(request, call_next):
+    """
+    Record latency and in-flight count for every HTTP request.
+
+    Requests are labelled with the route template (e.g. /api/analytics/customers/{user_id})
+    rather than the raw path, so label cardinality stays bounded; unknown paths share one label.
+    """
+    HTTP_REQUESTS_IN_FLIGHT.inc()
+    started = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        HTTP_REQUESTS_IN_FLIGHT.dec()
+        HTTP_REQUEST_DURATION.observe(
+            time.perf_counter() - started,
+            request.method,
+            route_template(request.scope) or UNMATCHED_ROUTE,
+            str(status_code),
+        )
+
+
+def instrument_repository(name: str):
+    """
+    Class decorator timing every public method of a repository, also recorded as
+    a "<name>.<method>" span when the request is traced.
+
+    Args:
+        name: Repository label, e.g. "analytics_repo"
+    """
+    def decorate(cls):
+        for attribute, method in list(vars(cls).items()):
+            if attribute.startswith("_") or not callable(method):
+                continue
+            setattr(cls, attribute, _timed(method, name, attribute))
+        return cls
+
+    return decorate
+
+
+def _timed(method, repository: str, name: str):
+    span_name = f"{repository}.{name}"
+
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            with span(span_name):
+                return method(*args, **kwargs)
+        finally:
+            REPOSITORY_CALL_DURATION.observe(time.perf_counter() - started, repository, name)
+
+    return wrapper
@@ -0,0 +1,45 @@
+"""
+Money as integer cents.
+
+Prices and totals are stored (BIGINT columns), summed and compared as integer
+cents, in SQL as well as in the NumPy analytics engine, so totals are exact and
+aggregates stay on integer arithmetic. Amounts in currency units only exist at
+the edges: `to_cents` converts prices and totals coming in (API requests, CSV
+files), `from_cents` converts them for API responses.
+"""
+
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+CENTS_PER_UNIT = 100
+
+_CENT = Decimal("0.01")
+
+
+def to_cents(amount) -> int:
+    """
+    Convert an amount in currency units to integer cents, rounding half up.
+
+    Args:
+        amount: Amount as a str, int, float or Decimal; floats are read through their
+            shortest repr, so 0.1 is ten cents
+
+    Returns:
+        int: The amount in cents
+
+    Raises:
+        ValueError: If the amount is not a finite number
+    """
+    if isinstance(amount, int) and not isinstance(amount, bool):
+        return amount * CENTS_PER_UNIT
+    try:
+        value = amount if isinstance(amount, Decimal) else Decimal(str(amount).strip())
+    except InvalidOperation:
+        raise ValueError(f"Invalid money amount: {amount!r}")
+    if not value.is_finite():
+        raise ValueError(f"Invalid money amount: {amount!r}")
+    return int(value.quantize(_CENT, rounding=ROUND_HALF_UP) * CENTS_PER_UNIT)
+
+
+def from_cents(cents: int) -> float:
+    """Convert integer cents to currency units for an API response."""
+    return int(cents) / CENTS_PER_UNIT
@@ -0,0 +1,30 @@
+"""
+Helpers for describing HTTP routes in metrics and traces.
+"""
+
+from typing import Optional
+
+UNMATCHED_ROUTE = "unmatched"
+
+
+def route_template(scope: dict) -> Optional[str]:
+    """
+    Full path template of the route that served a request, e.g. /api/analytics/customers/{user_id}.
+
+    FastAPI may resolve included routers lazily, in which case scope["route"] only carries the
+    innermost path ("/customers/{user_id}"). The prefix is then taken from the request path,
+    which has the same number of segments as the template.
+
+    Args:
+        scope: ASGI scope of a request that has been routed
+
+    Returns:
+        Optional[str]: The template, or None if no route matched
+    """
+    route = scope.get("route")
+    if route is None:
+        return None
+    route_segments = route.path.split("/")[1:]
+    path_segments = scope["path"].split("/")[1:]
+    prefix = path_segments[:max(0, len(path_segments) - len(route_segments))]
+    return "/" + "/".join(prefix + route_segments)
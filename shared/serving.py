@@ -0,0 +1,86 @@
+"""
+Production serving for the iCash services.
+
+`serve` runs a service under uvicorn. With reload (DEBUG) it keeps the single
+auto-reloading process used in development; otherwise it starts WEB_CONCURRENCY
+worker processes, defaulting to the number of CPUs this process may run on.
+
+Uvicorn starts workers with the spawn method, so every worker imports the app
+and creates its own engine, connection pool, metrics and log writer threads, and
+runs its own lifespan: warm-up and the in-memory analytics engine are set up
+independently per worker. Each worker's pool follows the engine profile, so a
+service holds up to workers x (pool_size + max_overflow) connections.
+
+Signals to the parent process:
+    SIGTERM / SIGINT  workers stop accepting connections and finish in-flight
+                      requests, for at most GRACEFUL_TIMEOUT seconds
+    SIGHUP            rolling restart: each worker is replaced once its successor
+                      has started, then drains its in-flight requests and exits
+    SIGTTIN / SIGTTOU add or remove a worker
+"""
+
+import logging
+import os
+
+from dotenv import load_dotenv
+from pydantic_settings import BaseSettings
+
+load_dotenv()
+
+
+class ServingSettings(BaseSettings):
+    # 0 means one worker per available CPU
+    WEB_CONCURRENCY: int = 0
+    GRACEFUL_TIMEOUT: int = 30
+    # Time a new worker gets to finish its lifespan (warm-up, analytics engine load)
+    WORKER_STARTUP_TIMEOUT: int = 120
+
+
+settings = ServingSettings()
+
+
+def worker_count() -> int:
+    """WEB_CONCURRENCY, or the number of CPUs this process may run on."""
+    if settings.WEB_CONCURRENCY > 0:
+        return settings.WEB_CONCURRENCY
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def serve(app: str, host: str, port: int, reload: bool, logger: logging.Logger) -> None:
+    """
+    Run `app` until the process is told to stop.
+
+    Args:
+        app: Import string of the ASGI app, e.g. "cash_register.app.main:app"
+        host: Interface to bind
+        port: Port to bind
+        reload: Run a single auto-reloading process (development)
+        logger: Service logger for the startup summary
+    """
+    import uvicorn
+
+    if reload:
+        uvicorn.run(app, host=host, port=port, reload=True, log_level="info", access_log=True)
+        return
+
+    from shared.database.profiles import active_profile
+
+    workers = worker_count()
+    capacity = active_profile().capacity
+    logger.info(
+        "Serving %s on %s:%d with %d worker(s); up to %d database connections (%d per worker)",
+        app, host, port, workers, workers * capacity, capacity,
+    )
+    uvicorn.run(
+        app,
+        host=host,
+        port=port,
+        workers=workers,
+        timeout_graceful_shutdown=settings.GRACEFUL_TIMEOUT,
+        timeout_worker_healthcheck=settings.WORKER_STARTUP_TIMEOUT,
+        log_level="info",
+        access_log=True,
+    )
@@ -0,0 +1,76 @@
+"""
+Cold-start timing for the iCash services.
+
+Measures how long a worker takes from process start until it is ready to serve:
+module imports (everything before the lifespan starts), then each named startup
+step. The breakdown is logged once and exported as the icash_startup_seconds
+gauge, labelled by phase.
+"""
+
+import os
+import time
+
+from shared.metrics import Gauge
+
+STARTUP_SECONDS = Gauge(
+    "icash_startup_seconds",
+    "Time from process start until the service was ready, by startup phase",
+    ("phase",),
+)
+
+
+def _process_age() -> float:
+    """Seconds since this process started, from /proc on Linux; 0 where unavailable."""
+    try:
+        with open("/proc/self/stat") as f:
+            # The command name may contain spaces, so count fields from its closing parenthesis
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, uptime - int(fields[19]) / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError):
+        return 0.0
+
+
+# Wall-clock process start, falling back to the first import of this module
+PROCESS_STARTED = time.time() - _process_age()
+
+
+class StartupTimer:
+    """
+    Records the duration of startup phases.
+
+    Create it at the start of the lifespan (the time since process start is
+    recorded as "imports"), call `mark` after each step and `report` when ready.
+    """
+
+    def __init__(self):
+        self.phases = {"imports": time.time() - PROCESS_STARTED}
+        self._last = time.time()
+
+    def mark(self, phase: str) -> None:
+        """Record the time since the previous mark as `phase`."""
+        now = time.time()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - self._last
+        self._last = now
+
+    @property
+    def total(self) -> float:
+        return sum(self.phases.values())
+
+    def report(self, logger) -> dict[str, float]:
+        """
+        Log the cold-start breakdown and export it as metrics.
+
+        Returns:
+            dict[str, float]: Seconds per phase, plus "total"
+        """
+        for phase, seconds in self.phases.items():
+            STARTUP_SECONDS.inc(phase, amount=seconds)
+        STARTUP_SECONDS.inc("total", amount=self.total)
+        logger.info(
+            "⏱️ Cold start took %.2f s (%s)",
+            self.total,
+            ", ".join(f"{phase} {seconds:.2f} s" for phase, seconds in self.phases.items()),
+        )
+        return {**self.phases, "total": self.total}
@@ -0,0 +1,299 @@
+"""
+Lightweight request tracing for the iCash services.
+
+A sampled request gets a trace whose spans follow the call path: the route
+handler, service and repository methods, pool checkouts, SQL statements and
+commits. Finished traces are kept in an in-memory ring buffer (served at
+/debug/traces with DEBUG) and, when TRACE_EXPORT_PATH is set, appended to a
+JSON Lines file by a background thread. Every response gets a Server-Timing
+header; for sampled requests it breaks the total down by span name.
+
+Outside a sampled request `span()` returns a shared no-op context manager, so
+instrumented code costs one context variable lookup when tracing is off.
+"""
+
+import itertools
+import json
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from contextvars import ContextVar
+from functools import wraps
+from typing import Optional
+
+from dotenv import load_dotenv
+from pydantic_settings import BaseSettings
+
+from shared.routes import route_template
+
+load_dotenv()
+
+
+class TracingSettings(BaseSettings):
+    TRACE_SAMPLE_RATE: float = 0.01
+    TRACE_EXPORT_PATH: str = ""
+    TRACE_BUFFER_SIZE: int = 500
+
+
+settings = TracingSettings()
+
+MAX_SERVER_TIMING_ENTRIES = 20
+MAX_SPAN_STATEMENT = 200
+
+
+class Span:
+    """A timed operation within a trace."""
+
+    __slots__ = ("trace", "span_id", "parent_id", "name", "start", "duration", "attributes", "_token")
+
+    def __init__(self, trace: "Trace", parent_id: Optional[int], name: str, start: float,
+                 attributes: Optional[dict] = None):
+        self.trace = trace
+        self.span_id = trace.next_span_id()
+        self.parent_id = parent_id
+        self.name = name
+        self.start = start
+        self.duration = 0.0
+        self.attributes = attributes
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.duration = time.perf_counter() - self.start
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self.attributes = {**(self.attributes or {}), "error": exc_type.__name__}
+        self.trace.spans.append(self)
+
+
+class Trace:
+    """Spans recorded while serving one sampled request."""
+
+    def __init__(self, name: str):
+        self.trace_id = f"{random.getrandbits(64):016x}"
+        self.name = name
+        self.wall_start = time.time()
+        self.start = time.perf_counter()
+        self.spans = []
+        self._span_ids = itertools.count(1)
+
+    def next_span_id(self) -> int:
+        return next(self._span_ids)
+
+    def as_dict(self, duration: float, status_code: int) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "status": status_code,
+            "start": self.wall_start,
+            "duration_ms": round(duration * 1000, 3),
+            "spans": [
+                {
+                    "id": span.span_id,
+                    "parent_id": span.parent_id,
+                    "name": span.name,
+                    "offset_ms": round((span.start - self.start) * 1000, 3),
+                    "duration_ms": round(span.duration * 1000, 3),
+                    **({"attributes": span.attributes} if span.attributes else {}),
+                }
+                for span in sorted(self.spans, key=lambda span: span.start)
+            ],
+        }
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+_recent_traces = deque(maxlen=settings.TRACE_BUFFER_SIZE)
+_export_queue = queue.SimpleQueue()
+_exporter_lock = threading.Lock()
+_exporter: Optional[threading.Thread] = None
+_NOOP = nullcontext()
+
+
+def span(name: str, attributes: Optional[dict] = None):
+    """
+    Context manager recording a child span of the current span, if the request is sampled.
+
+    Args:
+        name: Span name, e.g. "db.commit"
+        attributes: Optional extra details stored with the span
+    """
+    parent = _current_span.get()
+    if parent is None:
+        return _NOOP
+    return Span(parent.trace, parent.span_id, name, time.perf_counter(), attributes)
+
+
+def tracing_active() -> bool:
+    """Whether the current request is being traced."""
+    return _current_span.get() is not None
+
+
+def record_span(name: str, start: float, duration: float, attributes: Optional[dict] = None) -> None:
+    """
+    Record an already finished operation as a child of the current span, if the request is sampled.
+
+    Args:
+        name: Span name
+        start: time.perf_counter() value at which the operation started
+        duration: Duration in seconds
+        attributes: Optional extra details stored with the span
+    """
+    parent = _current_span.get()
+    if parent is None:
+        return
+    finished = Span(parent.trace, parent.span_id, name, start, attributes)
+    finished.duration = duration
+    parent.trace.spans.append(finished)
+
+
+def traced(name: str):
+    """Decorator recording each call of the function as a span named `name`."""
+    def decorate(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def trace_methods(prefix: str):
+    """
+    Class decorator recording every public method call as a span named "<prefix>.<method>".
+
+    Args:
+        prefix: Span name prefix, e.g. "RegisterService"
+    """
+    def decorate(cls):
+        for attribute, method in list(vars(cls).items()):
+            if attribute.startswith("_") or not callable(method):
+                continue
+            setattr(cls, attribute, traced(f"{prefix}.{attribute}")(method))
+        return cls
+
+    return decorate
+
+
+def _traced_route_class():
+    from fastapi.routing import APIRoute
+
+    class TracedRoute(APIRoute):
+        """
+        APIRoute recording the handler (dependency resolution, validation, endpoint and
+        serialization) as a span named "<router module>.<endpoint>", e.g. "purchase_route.create_purchase".
+        """
+
+        def get_route_handler(self):
+            handler = super().get_route_handler()
+            name = f"{self.endpoint.__module__.rsplit('.', 1)[-1]}.{self.endpoint.__name__}"
+
+            async def traced_handler(request):
+                with span(name):
+                    return await handler(request)
+
+            return traced_handler
+
+    TracedRoute.__module__ = __name__
+    TracedRoute.__qualname__ = "TracedRoute"
+    return TracedRoute
+
+
+def __getattr__(name: str):
+    # TracedRoute is only defined when a router asks for it, so code that reaches tracing
+    # through the database layer (jobs, scripts) does not import FastAPI
+    if name == "TracedRoute":
+        globals()["TracedRoute"] = route_class = _traced_route_class()
+        return route_class
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _export_loop() -> None:
+    with open(settings.TRACE_EXPORT_PATH, "a", encoding="utf-8") as f:
+        while True:
+            lines = [_export_queue.get()]
+            # Drain whatever else is queued so bursts become one write
+            while True:
+                try:
+                    lines.append(_export_queue.get_nowait())
+                except queue.Empty:
+                    break
+            f.write("".join(lines))
+            f.flush()
+
+
+def _reset_after_fork() -> None:
+    global _export_queue, _exporter_lock, _exporter
+    _export_queue = queue.SimpleQueue()
+    _exporter_lock = threading.Lock()
+    _exporter = None
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _export(trace: dict) -> None:
+    global _exporter
+    _recent_traces.append(trace)
+    if not settings.TRACE_EXPORT_PATH:
+        return
+    if _exporter is None:
+        with _exporter_lock:
+            if _exporter is None:
+                os.makedirs(os.path.dirname(os.path.abspath(settings.TRACE_EXPORT_PATH)), exist_ok=True)
+                _exporter = threading.Thread(target=_export_loop, name="trace-exporter", daemon=True)
+                _exporter.start()
+    _export_queue.put(json.dumps(trace) + "\n")
+
+
+def _server_timing(trace: Optional[Trace], total: float) -> str:
+    entries = [f"total;dur={total * 1000:.2f}"]
+    if trace is not None:
+        by_name = {}
+        for finished in trace.spans:
+            if finished.parent_id is None:
+                continue
+            by_name[finished.name] = by_name.get(finished.name, 0.0) + finished.duration
+        slowest = sorted(by_name.items(), key=lambda item: item[1], reverse=True)[:MAX_SERVER_TIMING_ENTRIES]
+        entries.extend(f"{name};dur={seconds * 1000:.2f}" for name, seconds in slowest)
+    return ", ".join(entries)
+
+
+async def tracing_middleware(request, call_next):
+    """Start a trace for a sampled share of requests and add the Server-Timing header."""
+    started = time.perf_counter()
+    trace = None
+    token = None
+    if settings.TRACE_SAMPLE_RATE > 0 and random.random() < settings.TRACE_SAMPLE_RATE:
+        trace = Trace(f"{request.method} {request.url.path}")
+        root = Span(trace, None, trace.name, trace.start)
+        token = _current_span.set(root)
+    try:
+        response = await call_next(request)
+    finally:
+        if token is not None:
+            _current_span.reset(token)
+
+    total = time.perf_counter() - started
+    if trace is not None:
+        template = route_template(request.scope)
+        if template is not None:
+            trace.name = f"{request.method} {template}"
+        root.name, root.duration = trace.name, total
+        trace.spans.append(root)
+        response.headers["X-Trace-Id"] = trace.trace_id
+        _export(trace.as_dict(total, response.status_code))
+    response.headers["Server-Timing"] = _server_timing(trace, total)
+    return response
+
+
+def recent_traces() -> list[dict]:
+    """Most recent sampled traces, newest first."""
+    return list(reversed(_recent_traces))
@@ -1,9 +1,27 @@
+from datetime import timedelta
+
 from fastapi import Depends
 from sqlalchemy.orm import Session
 
+from shared.database import SessionLocal
 from shared.database.dependencies import get_db
+from store_analytics.app.engine.columnar_engine import ColumnarAnalyticsEngine
+from store_analytics.app.engine.snapshot_store import SnapshotStore
 from store_analytics.app.services.analitics_service import AnalyticsService
+from store_analytics.core.config import settings
+
+analytics_engine = ColumnarAnalyticsEngine(
+    session_factory=SessionLocal,
+    lookback=timedelta(seconds=settings.ANALYTICS_ENGINE_LOOKBACK_SECONDS),
+    batch_size=settings.ANALYTICS_ENGINE_BATCH_SIZE,
+)
+
+snapshot_store = (
+    SnapshotStore(settings.ANALYTICS_SNAPSHOT_DIR)
+    if settings.ANALYTICS_ENGINE_ENABLED and settings.ANALYTICS_SNAPSHOT_DIR
+    else None
+)
 
 
 def get_analytics_service(db: Session = Depends(get_db)) -> AnalyticsService:
-    return AnalyticsService(db)
+    return AnalyticsService(db, engine=analytics_engine)
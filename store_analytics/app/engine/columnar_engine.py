@@ -0,0 +1,518 @@
+"""
+Columnar in-memory analytics engine for store analytics.
+
+Purchases are held in NumPy columns and analytics questions are answered with
+vectorized operations instead of SQL round trips. The engine is optional: the
+AnalyticsService falls back to the SQL repository when it is disabled or not
+loaded yet.
+"""
+
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, UTC
+from typing import Callable, Optional
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import select, func
+from sqlalchemy.orm import Session
+
+from shared.database.logger import logger
+from shared.database.models import Branch, Product, Purchase, PurchaseItem
+
+EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+ONE_MICROSECOND = timedelta(microseconds=1)
+
+
+def to_epoch_us(timestamp: datetime) -> int:
+    """Convert a datetime to integer microseconds since the Unix epoch (naive values are UTC)."""
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=UTC)
+    return (timestamp - EPOCH) // ONE_MICROSECOND
+
+
+def _resized(array: np.ndarray, size: int) -> np.ndarray:
+    """Return array if it holds at least size elements, else a zero-padded copy with doubled capacity."""
+    if len(array) >= size:
+        return array
+    grown = np.zeros(max(size, 2 * len(array)), dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+class _GrowableArray:
+    """
+    Append-only NumPy buffer with amortized O(1) appends.
+
+    `view()` returns a slice of the current buffer. Later appends write past the
+    end of every view already handed out, and reallocation leaves old buffers to
+    the views that still reference them, so published views never change.
+    """
+
+    def __init__(self, dtype, capacity: int = 1024):
+        self._buf = np.zeros(capacity, dtype=dtype)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, values: np.ndarray) -> None:
+        needed = self._size + len(values)
+        if needed > len(self._buf):
+            new_buf = np.zeros(max(needed, 2 * len(self._buf)), dtype=self._buf.dtype)
+            new_buf[:self._size] = self._buf[:self._size]
+            self._buf = new_buf
+        self._buf[self._size:needed] = values
+        self._size = needed
+
+    def view(self) -> np.ndarray:
+        return self._buf[:self._size]
+
+
+@dataclass(frozen=True)
+class _Snapshot:
+    """
+    Immutable, consistent view of the engine's columns and aggregates.
+
+    Attributes:
+        branch: Branch code per purchase (index into branch_ids)
+        user: User index per purchase (index into user_ids)
+        timestamp_us: Purchase time in microseconds since the epoch
+        amount_cents: Purchase total in cents
+        item_offsets: CSR offsets into item arrays, length purchases + 1
+        item_product: Product index per purchase item (index into product_names)
+        item_quantity: Quantity per purchase item
+        user_purchase_counts: Number of purchases per user index
+        product_units: Units sold per product index
+        loyal_at_least: loyal_at_least[k] is the number of users with >= k purchases
+        user_ids: User id per user index
+        product_names: Product name per product index
+        branch_index: Branch code per branch id
+    """
+    branch: np.ndarray
+    user: np.ndarray
+    timestamp_us: np.ndarray
+    amount_cents: np.ndarray
+    item_offsets: np.ndarray
+    item_product: np.ndarray
+    item_quantity: np.ndarray
+    user_purchase_counts: np.ndarray
+    product_units: np.ndarray
+    loyal_at_least: np.ndarray = field(repr=False)
+    user_ids: list[UUID] = field(repr=False)
+    product_names: list[str] = field(repr=False)
+    branch_index: dict[str, int] = field(repr=False)
+
+    @property
+    def purchase_count(self) -> int:
+        return len(self.amount_cents)
+
+
+class ColumnarAnalyticsEngine:
+    """
+    In-memory columnar store of purchases.
+
+    `load()` reads every purchase once; `refresh()` tails purchases whose timestamp
+    falls inside a lookback window behind the newest one seen, skipping ids already
+    loaded. Purchases back-dated further than the lookback are picked up by the next
+    full reload. Readers work on an immutable snapshot swapped in atomically after
+    each load or refresh, so queries never block on ingestion.
+
+    Attributes:
+        session_factory: Callable returning a new SQLAlchemy session
+        lookback: How far behind the newest purchase refresh() re-reads
+        batch_size: Rows fetched per round trip while loading
+    """
+
+    def __init__(
+            self,
+            session_factory: Callable[[], Session],
+            lookback: timedelta = timedelta(minutes=5),
+            batch_size: int = 50_000,
+    ):
+        self.session_factory = session_factory
+        self.lookback = lookback
+        self.batch_size = batch_size
+
+        self._lock = threading.Lock()
+        self._snapshot: Optional[_Snapshot] = None
+        self._needs_reload = True
+        self._reset()
+
+    @property
+    def ready(self) -> bool:
+        """Whether the engine has completed its initial load or been given a snapshot."""
+        return self._snapshot is not None
+
+    @property
+    def snapshot(self) -> Optional[_Snapshot]:
+        """The snapshot queries are currently answered from."""
+        return self._snapshot
+
+    def attach(self, snapshot: _Snapshot) -> None:
+        """
+        Answer queries from a snapshot built by another process (see snapshot_store).
+
+        Ingestion state is left alone, so a later load() or refresh() still starts with a full reload.
+        """
+        self._snapshot = snapshot
+
+    def _reset(self) -> None:
+        """Drop all columns and dictionaries (caller holds the lock)."""
+        self.branch_ids: list[str] = []
+        self.user_ids: list[UUID] = []
+        self.product_ids: list[UUID] = []
+        self.product_names: list[str] = []
+        self._branch_index: dict[str, int] = {}
+        self._user_index: dict[UUID, int] = {}
+        self._product_index: dict[UUID, int] = {}
+
+        self._branch = _GrowableArray(np.int16)
+        self._user = _GrowableArray(np.int32)
+        self._timestamp_us = _GrowableArray(np.int64)
+        self._amount_cents = _GrowableArray(np.int64)
+        self._item_offsets = _GrowableArray(np.int64)
+        self._item_offsets.append(np.zeros(1, dtype=np.int64))
+        self._item_product = _GrowableArray(np.int32)
+        self._item_quantity = _GrowableArray(np.int16)
+
+        self._user_purchase_counts = np.zeros(0, dtype=np.int32)
+        self._product_units = np.zeros(0, dtype=np.int64)
+        self._work_counts = self._user_purchase_counts
+        self._work_units = self._product_units
+
+        self._max_timestamp_us: Optional[int] = None
+        self._recent_ids: dict[UUID, int] = {}
+
+    def load(self) -> int:
+        """
+        Load every purchase from the database, replacing the current contents.
+
+        Returns:
+            int: Number of purchases loaded
+        """
+        self._needs_reload = True
+        return self.refresh()
+
+    def refresh(self) -> int:
+        """
+        Append purchases recorded since the last load or refresh.
+
+        Falls back to a full reload on the first call and after a failed refresh,
+        since a failure can leave the columns and aggregates out of step.
+
+        Returns:
+            int: Number of purchases appended
+        """
+        with self._lock:
+            full = self._needs_reload or self._max_timestamp_us is None
+            if full:
+                self._reset()
+                since_us = None
+            else:
+                since_us = self._horizon_us()
+
+            try:
+                added = self._ingest(since_us)
+            except Exception:
+                self._needs_reload = True
+                raise
+            self._needs_reload = False
+
+            if added or full:
+                self._publish()
+
+        if full:
+            logger.info("Analytics engine loaded %s purchases", added)
+        elif added:
+            logger.info("Analytics engine appended %s purchases", added)
+        return added
+
+    def _horizon_us(self) -> int:
+        """
+        Lower bound of the window each refresh re-reads.
+
+        Purchase timestamps come from the registers' clocks, so the newest one may
+        be ahead of this host's; capping it at the current time keeps a purchase
+        dated in the future from moving the window (and the ids remembered for it)
+        past purchases that are still re-read.
+        """
+        now_us = to_epoch_us(datetime.now(UTC))
+        return min(self._max_timestamp_us, now_us) - self.lookback // ONE_MICROSECOND
+
+    def _ingest(self, since_us: Optional[int]) -> int:
+        """Fetch purchases at or after since_us and append the unseen ones (caller holds the lock)."""
+        session = self.session_factory()
+        try:
+            # One snapshot for dimensions and purchases so every purchase references known ids
+            session.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+            self._sync_dimensions(session)
+
+            stmt = (
+                select(
+                    Purchase.id,
+                    Purchase.supermarket_id,
+                    Purchase.user_id,
+                    Purchase.timestamp,
+                    Purchase.total_amount_cents,
+                    func.array_agg(PurchaseItem.product_id),
+                    func.array_agg(PurchaseItem.quantity),
+                )
+                .outerjoin(PurchaseItem, PurchaseItem.purchase_id == Purchase.id)
+                .group_by(Purchase.id)
+                .execution_options(yield_per=self.batch_size)
+            )
+            if since_us is not None:
+                stmt = stmt.where(Purchase.timestamp >= EPOCH + since_us * ONE_MICROSECOND)
+
+            # Aggregates are updated on private copies: the published snapshot still references the old ones
+            self._work_counts = self._user_purchase_counts.copy()
+            self._work_units = self._product_units.copy()
+            dedupe = since_us is not None
+
+            added = 0
+            for batch in session.execute(stmt).partitions():
+                added += self._append_batch(batch, dedupe)
+
+            self._user_purchase_counts = _resized(self._work_counts, len(self.user_ids))[:len(self.user_ids)]
+            self._product_units = _resized(self._work_units, len(self.product_ids))[:len(self.product_ids)]
+
+            if self._max_timestamp_us is not None:
+                # The clock only moves forward, so later refreshes read from at or after this horizon
+                horizon_us = self._horizon_us()
+                if dedupe:
+                    self._recent_ids = {pid: ts for pid, ts in self._recent_ids.items() if ts >= horizon_us}
+                else:
+                    # A full load skips id tracking; seed it with just the lookback window
+                    recent = session.execute(
+                        select(Purchase.id, Purchase.timestamp)
+                        .where(Purchase.timestamp >= EPOCH + horizon_us * ONE_MICROSECOND)
+                    )
+                    self._recent_ids = {pid: to_epoch_us(ts) for pid, ts in recent}
+        finally:
+            session.close()
+
+        return added
+
+    def _sync_dimensions(self, session: Session) -> None:
+        """Register branches and products created since the last ingest."""
+        for (branch_id,) in session.execute(select(Branch.id)):
+            if branch_id not in self._branch_index:
+                self._branch_index[branch_id] = len(self.branch_ids)
+                self.branch_ids.append(branch_id)
+
+        for product_id, product_name in session.execute(select(Product.id, Product.product_name)):
+            if product_id not in self._product_index:
+                self._product_index[product_id] = len(self.product_ids)
+                self.product_ids.append(product_id)
+                self.product_names.append(product_name)
+
+    def _append_batch(self, rows, dedupe: bool) -> int:
+        """Convert a batch of purchase rows to columns and append them."""
+        branch, user, timestamp_us, amount_cents, item_counts, item_product, item_quantity = (
+            [], [], [], [], [], [], []
+        )
+        for purchase_id, supermarket_id, user_id, timestamp, total_cents, product_ids, quantities in rows:
+            ts_us = to_epoch_us(timestamp)
+            if dedupe:
+                if purchase_id in self._recent_ids:
+                    continue
+                self._recent_ids[purchase_id] = ts_us
+
+            user_idx = self._user_index.get(user_id)
+            if user_idx is None:
+                user_idx = self._user_index[user_id] = len(self.user_ids)
+                self.user_ids.append(user_id)
+
+            branch.append(self._branch_index[supermarket_id])
+            user.append(user_idx)
+            timestamp_us.append(ts_us)
+            amount_cents.append(total_cents)
+
+            items = [(self._product_index[p], q) for p, q in zip(product_ids, quantities) if p is not None]
+            item_counts.append(len(items))
+            item_product.extend(p for p, _ in items)
+            item_quantity.extend(q for _, q in items)
+
+        if not branch:
+            return 0
+
+        user = np.asarray(user, dtype=np.int32)
+        timestamp_us = np.asarray(timestamp_us, dtype=np.int64)
+        item_product = np.asarray(item_product, dtype=np.int32)
+        item_quantity = np.asarray(item_quantity, dtype=np.int16)
+
+        self._branch.append(np.asarray(branch, dtype=np.int16))
+        self._user.append(user)
+        self._timestamp_us.append(timestamp_us)
+        self._amount_cents.append(np.asarray(amount_cents, dtype=np.int64))
+        last_offset = self._item_offsets.view()[-1]
+        self._item_offsets.append(last_offset + np.cumsum(item_counts, dtype=np.int64))
+        self._item_product.append(item_product)
+        self._item_quantity.append(item_quantity)
+
+        self._work_counts = _resized(self._work_counts, len(self.user_ids))
+        np.add.at(self._work_counts, user, 1)
+        self._work_units = _resized(self._work_units, len(self.product_ids))
+        np.add.at(self._work_units, item_product, item_quantity)
+
+        batch_max = int(timestamp_us.max())
+        if self._max_timestamp_us is None or batch_max > self._max_timestamp_us:
+            self._max_timestamp_us = batch_max
+        return len(branch)
+
+    def _publish(self) -> None:
+        """Swap in a new snapshot reflecting everything ingested so far (caller holds the lock)."""
+        counts = self._user_purchase_counts
+        # Suffix sums of the purchase-count histogram: loyal_at_least[k] = users with >= k purchases
+        histogram = np.bincount(counts) if len(counts) else np.zeros(1, dtype=np.int64)
+        loyal_at_least = np.cumsum(histogram[::-1])[::-1]
+
+        self._snapshot = _Snapshot(
+            branch=self._branch.view(),
+            user=self._user.view(),
+            timestamp_us=self._timestamp_us.view(),
+            amount_cents=self._amount_cents.view(),
+            item_offsets=self._item_offsets.view(),
+            item_product=self._item_product.view(),
+            item_quantity=self._item_quantity.view(),
+            user_purchase_counts=counts,
+            product_units=self._product_units,
+            loyal_at_least=loyal_at_least,
+            user_ids=self.user_ids,
+            product_names=self.product_names,
+            branch_index=self._branch_index,
+        )
+
+    def _require_snapshot(self) -> _Snapshot:
+        snapshot = self._snapshot
+        if snapshot is None:
+            raise RuntimeError("Analytics engine is not loaded")
+        return snapshot
+
+    def count_unique_buyers(self) -> int:
+        """
+        Count the number of customers with at least one purchase.
+
+        Returns:
+            int: Number of unique buyers
+        """
+        snapshot = self._require_snapshot()
+        return int(snapshot.loyal_at_least[1]) if len(snapshot.loyal_at_least) > 1 else 0
+
+    def get_loyal_customers(self, min_purchases: int = 3) -> list[tuple[UUID, int]]:
+        """
+        Get customers with at least min_purchases purchases, most frequent first.
+
+        Args:
+            min_purchases: Minimum number of purchases to be considered loyal
+
+        Returns:
+            List of tuples containing (user_id, purchase_count) for each loyal customer
+        """
+        snapshot = self._require_snapshot()
+        counts = snapshot.user_purchase_counts
+        loyal = np.flatnonzero(counts >= min_purchases)
+        loyal = loyal[np.argsort(-counts[loyal], kind="stable")]
+        return [(snapshot.user_ids[i], int(counts[i])) for i in loyal]
+
+    def count_loyal_customers(self, min_purchases: int = 3) -> int:
+        """
+        Count customers with at least min_purchases purchases in O(1).
+
+        Args:
+            min_purchases: Minimum number of purchases to be considered loyal
+
+        Returns:
+            int: Number of loyal customers
+        """
+        loyal_at_least = self._require_snapshot().loyal_at_least
+        if min_purchases >= len(loyal_at_least):
+            return 0
+        return int(loyal_at_least[max(min_purchases, 0)])
+
+    def get_top_selling_products(self, limit: int = 3) -> list[tuple[str, int, int]]:
+        """
+        Get products from the top `limit` distinct popularity levels.
+
+        Matches the dense-rank semantics of AnalyticsRepository.get_top_selling_products.
+
+        Args:
+            limit: Number of distinct popularity levels to include
+
+        Returns:
+            List of tuples containing (product_name, total_sold, rank)
+        """
+        snapshot = self._require_snapshot()
+        return self._rank_products(snapshot, snapshot.product_units, limit)
+
+    def get_sales_summary(
+            self,
+            start: Optional[datetime] = None,
+            end: Optional[datetime] = None,
+            supermarket_id: Optional[str] = None,
+            top_products_limit: int = 3,
+    ) -> tuple[int, int, int, list[tuple[str, int, int]]]:
+        """
+        Summarize purchases in a time range, optionally for a single branch.
+
+        Args:
+            start: Inclusive lower bound on purchase time
+            end: Exclusive upper bound on purchase time
+            supermarket_id: Restrict to this branch
+            top_products_limit: Number of distinct popularity levels to include
+
+        Returns:
+            Tuple of (total_revenue_cents, purchase_count, unique_buyers, top_products)
+            where top_products holds (product_name, total_sold, rank) tuples
+        """
+        snapshot = self._require_snapshot()
+        mask = self._range_mask(snapshot, start, end, supermarket_id)
+        if mask is None:
+            return 0, 0, 0, []
+
+        buyers = np.unique(snapshot.user[mask]).size
+        item_mask = np.repeat(mask, np.diff(snapshot.item_offsets))
+        units = np.bincount(
+            snapshot.item_product[item_mask],
+            weights=snapshot.item_quantity[item_mask],
+            minlength=len(snapshot.product_units)
+        ).astype(np.int64)
+        return (
+            int(snapshot.amount_cents[mask].sum()),
+            int(np.count_nonzero(mask)),
+            int(buyers),
+            self._rank_products(snapshot, units, top_products_limit),
+        )
+
+    @staticmethod
+    def _range_mask(
+            snapshot: _Snapshot,
+            start: Optional[datetime],
+            end: Optional[datetime],
+            supermarket_id: Optional[str],
+    ) -> Optional[np.ndarray]:
+        """Boolean purchase mask for the filters, or None if the branch is unknown."""
+        mask = np.ones(snapshot.purchase_count, dtype=bool)
+        if start is not None:
+            mask &= snapshot.timestamp_us >= to_epoch_us(start)
+        if end is not None:
+            mask &= snapshot.timestamp_us < to_epoch_us(end)
+        if supermarket_id is not None:
+            code = snapshot.branch_index.get(supermarket_id)
+            if code is None:
+                return None
+            mask &= snapshot.branch == code
+        return mask
+
+    @staticmethod
+    def _rank_products(snapshot: _Snapshot, units: np.ndarray, limit: int) -> list[tuple[str, int, int]]:
+        """Dense-rank products with sales by units sold and keep the top `limit` levels."""
+        sold = np.flatnonzero(units > 0)
+        if not len(sold):
+            return []
+        levels = np.unique(units[sold])[::-1][:limit]
+        top = sold[units[sold] >= levels[-1]]
+        ranks = {int(level): rank for rank, level in enumerate(levels, start=1)}
+        rows = [(snapshot.product_names[i], int(units[i]), ranks[int(units[i])]) for i in top]
+        return sorted(rows, key=lambda row: (-row[1], row[0]))
@@ -0,0 +1,200 @@
+"""
+Shared, memory-mapped snapshots of the columnar analytics engine.
+
+When store_analytics runs several workers, one of them (the builder, elected
+with an exclusive lock on `<root>/builder.lock`) ingests purchases and
+periodically writes the engine's snapshot to disk. The other workers map the
+files read-only instead of loading purchases themselves, so the operating
+system keeps a single copy of the pages in its cache however many workers there
+are, and a restarted worker is ready as soon as it has mapped the files:
+
+    <root>/CURRENT                         name of the live version
+    <root>/versions/<version>/manifest.json
+    <root>/versions/<version>/<array>.npy   one fixed-layout array per column or aggregate
+
+A version is written to a temporary directory, renamed into place and only then
+published by atomically replacing CURRENT, so readers never see a partial
+snapshot. The previous versions are kept for a while for workers that have just
+read CURRENT; on POSIX, files still mapped by a worker stay readable after they
+are deleted. If the builder dies its lock is released and the next worker to
+poll takes over.
+"""
+
+import fcntl
+import json
+import os
+import shutil
+import time
+from datetime import datetime, UTC
+from pathlib import Path
+from typing import Optional
+from uuid import UUID
+
+import numpy as np
+
+from shared.database.logger import logger
+from store_analytics.app.engine.columnar_engine import _Snapshot
+
+FORMAT_VERSION = 1
+CURRENT_FILE = "CURRENT"
+LOCK_FILE = "builder.lock"
+VERSIONS_DIR = "versions"
+KEEP_VERSIONS = 3
+
+ARRAYS = (
+    "branch",
+    "user",
+    "timestamp_us",
+    "amount_cents",
+    "item_offsets",
+    "item_product",
+    "item_quantity",
+    "user_purchase_counts",
+    "product_units",
+    "loyal_at_least",
+)
+
+
+class UuidColumn:
+    """Read-only sequence of UUIDs over a 16-byte-per-row array, converted on access."""
+
+    def __init__(self, raw: np.ndarray):
+        self._raw = raw
+
+    def __len__(self) -> int:
+        return len(self._raw)
+
+    def __getitem__(self, index: int) -> UUID:
+        return UUID(bytes=self._raw[index].tobytes())
+
+
+def _uuid_array(user_ids) -> np.ndarray:
+    if isinstance(user_ids, UuidColumn):
+        return user_ids._raw
+    return np.frombuffer(b"".join(user_id.bytes for user_id in user_ids), dtype=np.uint8).reshape(-1, 16)
+
+
+class SnapshotStore:
+    """
+    Versioned snapshot directory shared by the workers of one host.
+
+    Attributes:
+        root: Directory holding CURRENT, the lock file and the versions
+        is_builder: Whether this process holds the builder lock
+        version: Version of the snapshot this process last wrote or opened
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        (self.root / VERSIONS_DIR).mkdir(exist_ok=True)
+        self.is_builder = False
+        self.version: Optional[str] = None
+        self._lock_fd: Optional[int] = None
+
+    def try_acquire_builder(self) -> bool:
+        """
+        Become the builder if no other process is.
+
+        Returns:
+            bool: Whether this process is the builder
+        """
+        if self.is_builder:
+            return True
+        fd = os.open(self.root / LOCK_FILE, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        self.is_builder = True
+        logger.info("Analytics snapshot builder elected (pid %s)", os.getpid())
+        return True
+
+    def current_version(self) -> Optional[str]:
+        try:
+            return (self.root / CURRENT_FILE).read_text().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def write(self, snapshot: _Snapshot) -> str:
+        """
+        Write `snapshot` as a new version and publish it.
+
+        Returns:
+            str: The new version
+        """
+        version = f"{time.time_ns()}-{os.getpid()}"
+        versions = self.root / VERSIONS_DIR
+        tmp = versions / f".tmp-{version}"
+        tmp.mkdir()
+
+        manifest = {
+            "format": FORMAT_VERSION,
+            "version": version,
+            "created_at": datetime.now(UTC).isoformat(),
+            "purchase_count": snapshot.purchase_count,
+            "arrays": {},
+            # The builder keeps appending to its dimension lists; take what this snapshot covers
+            "product_names": list(snapshot.product_names[:len(snapshot.product_units)]),
+            "branch_index": dict(snapshot.branch_index),
+        }
+        arrays = {name: np.ascontiguousarray(getattr(snapshot, name)) for name in ARRAYS}
+        arrays["user_ids"] = _uuid_array(snapshot.user_ids)[:len(snapshot.user_purchase_counts)]
+        for name, array in arrays.items():
+            np.save(tmp / f"{name}.npy", array, allow_pickle=False)
+            manifest["arrays"][name] = {"dtype": array.dtype.str, "shape": list(array.shape)}
+        (tmp / "manifest.json").write_text(json.dumps(manifest))
+
+        os.rename(tmp, versions / version)
+        pointer = self.root / f"{CURRENT_FILE}.tmp"
+        pointer.write_text(version)
+        os.replace(pointer, self.root / CURRENT_FILE)
+        self.version = version
+        self._remove_old_versions()
+        return version
+
+    def open(self, version: Optional[str] = None) -> Optional[_Snapshot]:
+        """
+        Map a version (default: the current one) read-only.
+
+        Returns:
+            Optional[_Snapshot]: The snapshot, or None if there is none yet or it was just removed
+        """
+        version = version or self.current_version()
+        if version is None:
+            return None
+        directory = self.root / VERSIONS_DIR / version
+        try:
+            manifest = json.loads((directory / "manifest.json").read_text())
+            if manifest["format"] != FORMAT_VERSION:
+                logger.warning("Ignoring analytics snapshot %s in format %s", version, manifest["format"])
+                return None
+            arrays = {
+                name: np.load(directory / f"{name}.npy", mmap_mode="r", allow_pickle=False)
+                for name in manifest["arrays"]
+            }
+        except FileNotFoundError:
+            return None
+
+        self.version = version
+        return _Snapshot(
+            **{name: arrays[name] for name in ARRAYS},
+            user_ids=UuidColumn(arrays["user_ids"]),
+            product_names=manifest["product_names"],
+            branch_index=manifest["branch_index"],
+        )
+
+    def _remove_old_versions(self) -> None:
+        versions = self.root / VERSIONS_DIR
+        names = sorted(
+            (path.name for path in versions.iterdir() if not path.name.startswith(".")),
+            key=lambda name: int(name.split("-", 1)[0]),
+        )
+        for name in names[:-KEEP_VERSIONS]:
+            shutil.rmtree(versions / name, ignore_errors=True)
+        # Leftovers of a builder that died mid-write
+        for path in versions.glob(".tmp-*"):
+            if not path.name.endswith(f"-{os.getpid()}"):
+                shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,25 @@
+from fastapi import status
+
+from shared.exceptions import iCashException
+
+
+class CustomerNotFoundError(iCashException):
+    """Customer has no recorded purchases"""
+
+    def __init__(
+            self,
+            message: str = "Customer not found",
+            error_code: str = "CUSTOMER_NOT_FOUND"
+    ):
+        super().__init__(message, error_code, status_code=status.HTTP_404_NOT_FOUND)
+
+
+class AnalyticsEngineUnavailableError(iCashException):
+    """In-memory analytics engine was requested but is disabled or not loaded yet"""
+
+    def __init__(
+            self,
+            message: str = "In-memory analytics engine is not available",
+            error_code: str = "ANALYTICS_ENGINE_UNAVAILABLE"
+    ):
+        super().__init__(message, error_code, status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
@@ -4,21 +4,93 @@ Main application file for the iCash store analytics service.
 This module contains the FastAPI application setup and configuration.
 """
 
-from contextlib import asynccontextmanager
+import asyncio
+import time
+from contextlib import asynccontextmanager, suppress
 from datetime import datetime, UTC
 from typing import AsyncGenerator
 
 from fastapi import FastAPI, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
 
 from shared.database import SessionLocal
+from shared.database.core.config import settings as db_settings
+from shared.database.instrumentation import query_stats_middleware, recent_request_stats
+from shared.database.warmup import warm_up
+from shared.metrics import CONTENT_TYPE, REGISTRY, metrics_middleware
+from shared.startup import StartupTimer
+from shared.tracing import recent_traces, tracing_middleware
+from store_analytics.app.dependencies import analytics_engine, snapshot_store
 from store_analytics.app.logger import logger
 from store_analytics.app.routers.api import api_router
+from store_analytics.app.schemas.analytics import AnalyticsSource
+from store_analytics.app.services.analitics_service import AnalyticsService
 from store_analytics.core.config import settings
 
+# Read paths run by the opt-in warm-up (DB_WARMUP_CONNECTIONS); the SQL paths are
+# the fallback whenever the in-memory engine is not loaded
+WARMUP_QUERIES = (
+    lambda db: AnalyticsService(db).get_unique_buyers_count(AnalyticsSource.SQL),
+    lambda db: AnalyticsService(db).count_loyal_customers(source=AnalyticsSource.SQL),
+)
+
+
+def follow_snapshot() -> None:
+    """Map the builder's latest shared snapshot if it is newer than the one in use."""
+    version = snapshot_store.current_version()
+    if version is None or version == snapshot_store.version:
+        return
+    snapshot = snapshot_store.open(version)
+    if snapshot is not None:
+        analytics_engine.attach(snapshot)
+        logger.info("Mapped analytics snapshot %s (%s purchases)", version, snapshot.purchase_count)
+
+
+def publish_snapshot() -> None:
+    """Write the engine's current snapshot for the other workers."""
+    version = snapshot_store.write(analytics_engine.snapshot)
+    logger.info("Published analytics snapshot %s (%s purchases)", version, analytics_engine.snapshot.purchase_count)
+
+
+async def refresh_analytics_engine() -> None:
+    """
+    Keep the in-memory analytics engine up to date.
+
+    Tails new purchases every ANALYTICS_ENGINE_REFRESH_SECONDS and performs a full
+    reload every ANALYTICS_ENGINE_FULL_RELOAD_SECONDS to pick up back-dated purchases.
+    Refreshes run in a worker thread; queries keep using the previous snapshot meanwhile.
+
+    With ANALYTICS_SNAPSHOT_DIR only the builder worker does this, publishing a shared
+    snapshot at most every ANALYTICS_SNAPSHOT_SECONDS; the other workers map the latest
+    one, and take over as builder if it goes away.
+    """
+    last_full_load = time.monotonic()
+    last_published = time.monotonic()
+    unpublished = 0
+    while True:
+        await asyncio.sleep(settings.ANALYTICS_ENGINE_REFRESH_SECONDS)
+        try:
+            if snapshot_store is not None and not snapshot_store.try_acquire_builder():
+                await asyncio.to_thread(follow_snapshot)
+                continue
+
+            if time.monotonic() - last_full_load >= settings.ANALYTICS_ENGINE_FULL_RELOAD_SECONDS:
+                unpublished += await asyncio.to_thread(analytics_engine.load) or 1
+                last_full_load = time.monotonic()
+            else:
+                unpublished += await asyncio.to_thread(analytics_engine.refresh)
+
+            if (snapshot_store is not None and unpublished
+                    and time.monotonic() - last_published >= settings.ANALYTICS_SNAPSHOT_SECONDS):
+                await asyncio.to_thread(publish_snapshot)
+                last_published = time.monotonic()
+                unpublished = 0
+        except Exception as e:
+            logger.error("❌ Analytics engine refresh failed: %s", e)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
@@ -33,6 +105,7 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     Yields:
         None: Application context
     """
+    startup = StartupTimer()
     logger.info("🚀 Starting iCash store_analytics...")
 
     try:
@@ -41,19 +114,48 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
             db.execute(text("SELECT 1"))
             logger.info("✅ Database connection established")
         except Exception as e:
-            logger.error(f"❌ Database connection failed: {str(e)}")
+            logger.error("❌ Database connection failed: %s", e)
             raise
         finally:
             db.close()
+        startup.mark("database")
+
+        if settings.ANALYTICS_ENGINE_ENABLED:
+            try:
+                if snapshot_store is not None and not snapshot_store.try_acquire_builder():
+                    # Serves from SQL until the builder has published a snapshot
+                    await asyncio.to_thread(follow_snapshot)
+                else:
+                    await asyncio.to_thread(analytics_engine.load)
+                    logger.info("✅ In-memory analytics engine loaded")
+                    if snapshot_store is not None:
+                        await asyncio.to_thread(publish_snapshot)
+            except Exception as e:
+                logger.error("❌ In-memory analytics engine failed to load, serving from SQL: %s", e)
+            startup.mark("analytics_engine")
+
+        if db_settings.DB_WARMUP_CONNECTIONS:
+            await asyncio.to_thread(warm_up, db_settings.DB_WARMUP_CONNECTIONS, WARMUP_QUERIES)
+            startup.mark("warmup")
 
         logger.info("🎮 iCash store_analytics started successfully!")
+        startup.report(logger)
 
     except Exception as e:
-        logger.error(f"❌ Failed to start application: {str(e)}")
+        logger.error("❌ Failed to start application: %s", e)
         raise
 
+    refresh_task = None
+    if settings.ANALYTICS_ENGINE_ENABLED:
+        refresh_task = asyncio.create_task(refresh_analytics_engine())
+
     yield
 
+    if refresh_task is not None:
+        refresh_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await refresh_task
+
     logger.info("🛑 Shutting down iCash Analytics...")
     logger.info("👋 Application shutdown complete")
 
@@ -73,6 +175,9 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.middleware("http")(metrics_middleware)
+app.middleware("http")(query_stats_middleware)
+app.middleware("http")(tracing_middleware)
 
 
 @app.exception_handler(SQLAlchemyError)
@@ -87,7 +192,7 @@ async def sqlalchemy_exception_handler(request, exc):
     Returns:
         JSONResponse: Error response
     """
-    logger.error(f"Database error: {str(exc)}")
+    logger.error("Database error: %s", exc)
     return JSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         content={"message": "Database error occurred"}
@@ -106,10 +211,11 @@ async def http_exception_handler(request, exc):
     Returns:
         JSONResponse: Error response
     """
-    logger.error(f"HTTP error: {str(exc)}")
+    logger.error("HTTP error: %s", exc)
     return JSONResponse(
         status_code=exc.status_code,
-        content={"message": exc.detail}
+        content={"message": exc.detail},
+        headers=exc.headers
     )
 
 
@@ -125,7 +231,7 @@ async def general_exception_handler(request, exc):
     Returns:
         JSONResponse: Error response
     """
-    logger.error(f"Unexpected error: {str(exc)}")
+    logger.error("Unexpected error: %s", exc)
     return JSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         content={"message": "Internal server error"}
@@ -149,7 +255,7 @@ async def health_check():
             db.execute(text("SELECT 1"))
             db_status = "healthy"
         except Exception as e:
-            logger.error(f"Database health check failed: {str(e)}")
+            logger.error("Database health check failed: %s", e)
             db_status = "unhealthy"
         finally:
             db.close()
@@ -165,7 +271,7 @@ async def health_check():
         }
 
     except Exception as e:
-        logger.error(f"Health check failed: {str(e)}")
+        logger.error("Health check failed: %s", e)
         return JSONResponse(
             status_code=503,
             content={
@@ -176,6 +282,43 @@ async def health_check():
         )
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Prometheus metrics for this process.
+
+    Returns:
+        PlainTextResponse: Metrics in the Prometheus text exposition format
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
+@app.get("/debug/queries", include_in_schema=False)
+async def debug_queries():
+    """
+    Query count and database time of recent requests; only available with DEBUG.
+
+    Returns:
+        dict: Recent requests, newest first
+    """
+    if not settings.DEBUG:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    return {"requests": recent_request_stats()}
+
+
+@app.get("/debug/traces", include_in_schema=False)
+async def debug_traces():
+    """
+    Recently sampled request traces; only available with DEBUG.
+
+    Returns:
+        dict: Recent traces, newest first
+    """
+    if not settings.DEBUG:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    return {"traces": recent_traces()}
+
+
 @app.get("/")
 async def root():
     """
@@ -191,6 +334,7 @@ async def root():
         "documentation": "/docs",
         "endpoints": {
             "health": "/health",
+            "metrics": "/metrics",
             "docs": "/docs" if settings.DEBUG else "disabled",
             "api": "/api/analytics"
         },
@@ -211,13 +355,13 @@ async def log_requests(request, call_next):
     start_time = __import__('time').time()
 
     logger.info(
-        f"📨 {request.method} {request.url.path} - Client: {request.client.host if request.client else 'unknown'}")
+        "📨 %s %s - Client: %s", request.method, request.url.path, request.client.host if request.client else 'unknown')
 
     try:
         response = await call_next(request)
         process_time = __import__('time').time() - start_time
         logger.info(
-            f"📤 {request.method} {request.url.path} - Status: {response.status_code} - Time: {process_time:.3f}s")
+            "📤 %s %s - Status: %s - Time: %.3fs", request.method, request.url.path, response.status_code, process_time)
 
         response.headers["X-Process-Time"] = str(process_time)
 
@@ -225,20 +369,19 @@ async def log_requests(request, call_next):
 
     except Exception as e:
         process_time = __import__('time').time() - start_time
-        logger.error(f"💥 {request.method} {request.url.path} - Error: {str(e)} - Time: {process_time:.3f}s")
+        logger.error("💥 %s %s - Error: %s - Time: %.3fs", request.method, request.url.path, e, process_time)
         raise
 
 
 if __name__ == "__main__":
-    import uvicorn
+    from shared.serving import serve
 
     logger.info("🚀 Starting store-analytics application...")
 
-    uvicorn.run(
+    serve(
         settings.STORE_ANALYTICS_PATH,
         host=settings.STORE_ANALYTICS_HOST,
         port=settings.STORE_ANALYTICS_PORT,
         reload=settings.DEBUG,
-        log_level="info",
-        access_log=True,
+        logger=logger,
     )
@@ -3,14 +3,20 @@ Analytics repository for store analytics.
 
 This module provides database operations for analytics data.
 """
+from datetime import datetime
+from typing import Optional
 from uuid import UUID
 
-from sqlalchemy import func, select
+from sqlalchemy import func, select, Row, and_
 from sqlalchemy.orm import Session
 
-from shared.database.models import User, Purchase, Product, PurchaseItem
+from shared.database.models import (
+    User, Branch, Purchase, Product, PurchaseItem, UserStats
+)
+from shared.metrics import instrument_repository
 
 
+@instrument_repository("analytics_repo")
 class AnalyticsRepository:
     """
     Repository obj to access analytics data.
@@ -39,9 +45,8 @@ class AnalyticsRepository:
         """
         Get list of loyal customers based on purchase count.
 
-        This method performs a database query to find users who have made at least
-        the specified number of purchases. It uses database-level aggregation to
-        efficiently calculate purchase counts and filter loyal customers.
+        Reads the incrementally maintained user_stats table, so this is an index
+        range scan on purchase_count rather than an aggregation over all purchases.
 
         Args:
             min_purchases: Minimum number of purchases to be considered loyal
@@ -50,14 +55,60 @@ class AnalyticsRepository:
             List of tuples containing (user_id, purchase_count) for each loyal customer
         """
         stmt = (
-            select(Purchase.user_id, func.count().label('purchase_count'))
-            .group_by(Purchase.user_id)
-            .having(func.count() >= min_purchases)
-            .order_by(func.count().desc())
+            select(UserStats.user_id, UserStats.purchase_count)
+            .where(UserStats.purchase_count >= min_purchases)
+            .order_by(UserStats.purchase_count.desc())
         )
         result = self.db.execute(stmt)
         return result.all()
 
+    def count_loyal_customers(self, min_purchases: int = 3) -> int:
+        """
+        Count loyal customers from the customer summaries.
+
+        Runs as an index-only scan of ix_user_stats_purchase_count, so the cost
+        depends on the number of loyal customers rather than on purchases.
+
+        Args:
+            min_purchases: Minimum number of purchases to be considered loyal
+
+        Returns:
+            int: Number of customers with at least min_purchases purchases
+        """
+        stmt = (
+            select(func.count())
+            .select_from(UserStats)
+            .where(UserStats.purchase_count >= min_purchases)
+        )
+        result = self.db.execute(stmt)
+        return result.scalar_one()
+
+    def get_customer_profile(self, user_id: UUID) -> Optional[Row]:
+        """
+        Get the purchase summary of a single customer.
+
+        Args:
+            user_id: ID of the customer
+
+        Returns:
+            Row with the customer's stats and favorite product name, or None if the
+            customer has no recorded purchases
+        """
+        stmt = (
+            select(
+                UserStats.user_id,
+                UserStats.purchase_count,
+                UserStats.total_spent_cents,
+                UserStats.first_purchase_at,
+                UserStats.last_purchase_at,
+                Product.product_name.label('favorite_product'),
+            )
+            .outerjoin(Product, Product.id == UserStats.favorite_product_id)
+            .where(UserStats.user_id == user_id)
+        )
+        result = self.db.execute(stmt)
+        return result.first()
+
     def get_top_selling_products(self, limit: int = 3):
         """
         Get top selling products by quantity, including all products with tied popularity levels.
@@ -96,3 +147,137 @@ class AnalyticsRepository:
 
         result = self.db.execute(stmt)
         return result.all()
+
+    def get_branch_analytics(self, top_products_limit: int = 3) -> list[Row]:
+        """
+        Get sales figures and top products for every branch in a single query.
+
+        Per-branch totals and per-branch product rankings are computed as two grouped
+        CTEs and joined onto the branches table, so the cost does not grow with the
+        number of branches. Branches without purchases are included with zeros.
+
+        The result is flat: one row per (branch, top product), or a single row with
+        NULL product columns for a branch without sales. Product ranking uses the same
+        dense-rank semantics as get_top_selling_products.
+
+        Args:
+            top_products_limit: Number of distinct popularity levels to include per branch
+
+        Returns:
+            List of rows with supermarket_id, total_revenue_cents, purchase_count,
+            unique_customers, product_name, total_sold, rank
+        """
+        branch_totals = (
+            select(
+                Purchase.supermarket_id,
+                func.sum(Purchase.total_amount_cents).label('total_revenue_cents'),
+                func.count().label('purchase_count'),
+                func.count(func.distinct(Purchase.user_id)).label('unique_customers')
+            )
+            .group_by(Purchase.supermarket_id)
+        ).cte('branch_totals')
+
+        product_sales = (
+            select(
+                Purchase.supermarket_id,
+                PurchaseItem.product_id,
+                func.sum(PurchaseItem.quantity).label('total_sold'),
+                func.dense_rank().over(
+                    partition_by=Purchase.supermarket_id,
+                    order_by=func.sum(PurchaseItem.quantity).desc()
+                ).label('popularity_rank')
+            )
+            .join(PurchaseItem, PurchaseItem.purchase_id == Purchase.id)
+            .group_by(Purchase.supermarket_id, PurchaseItem.product_id)
+        ).cte('product_sales')
+
+        stmt = (
+            select(
+                Branch.id.label('supermarket_id'),
+                func.coalesce(branch_totals.c.total_revenue_cents, 0).label('total_revenue_cents'),
+                func.coalesce(branch_totals.c.purchase_count, 0).label('purchase_count'),
+                func.coalesce(branch_totals.c.unique_customers, 0).label('unique_customers'),
+                Product.product_name,
+                product_sales.c.total_sold,
+                product_sales.c.popularity_rank.label('rank')
+            )
+            .select_from(Branch)
+            .outerjoin(branch_totals, branch_totals.c.supermarket_id == Branch.id)
+            .outerjoin(
+                product_sales,
+                and_(
+                    product_sales.c.supermarket_id == Branch.id,
+                    product_sales.c.popularity_rank <= top_products_limit
+                )
+            )
+            .outerjoin(Product, Product.id == product_sales.c.product_id)
+            .order_by(Branch.id, product_sales.c.total_sold.desc(), Product.product_name)
+        )
+
+        result = self.db.execute(stmt)
+        return result.all()
+
+    def get_sales_summary(
+            self,
+            start: Optional[datetime] = None,
+            end: Optional[datetime] = None,
+            supermarket_id: Optional[str] = None,
+            top_products_limit: int = 3
+    ) -> tuple[Row, list[Row]]:
+        """
+        Summarize purchases in a time range, optionally for a single branch.
+
+        Args:
+            start: Inclusive lower bound on purchase time
+            end: Exclusive upper bound on purchase time
+            supermarket_id: Restrict to this branch
+            top_products_limit: Number of distinct popularity levels to include
+
+        Returns:
+            Tuple of a totals row (total_revenue_cents, purchase_count, unique_buyers) and a list
+            of (product_name, total_sold, rank) rows
+        """
+        filters = []
+        if start is not None:
+            filters.append(Purchase.timestamp >= start)
+        if end is not None:
+            filters.append(Purchase.timestamp < end)
+        if supermarket_id is not None:
+            filters.append(Purchase.supermarket_id == supermarket_id)
+
+        totals_stmt = (
+            select(
+                func.coalesce(func.sum(Purchase.total_amount_cents), 0).label('total_revenue_cents'),
+                func.count().label('purchase_count'),
+                func.count(func.distinct(Purchase.user_id)).label('unique_buyers')
+            )
+            .where(*filters)
+        )
+        totals = self.db.execute(totals_stmt).one()
+
+        subquery = (
+            select(
+                Product.product_name,
+                func.sum(PurchaseItem.quantity).label('total_sold'),
+                func.dense_rank().over(
+                    order_by=func.sum(PurchaseItem.quantity).desc()
+                ).label('popularity_rank')
+            )
+            .join(PurchaseItem, Product.id == PurchaseItem.product_id)
+            .join(Purchase, Purchase.id == PurchaseItem.purchase_id)
+            .where(*filters)
+            .group_by(Product.id, Product.product_name)
+        ).subquery()
+
+        products_stmt = (
+            select(
+                subquery.c.product_name,
+                subquery.c.total_sold,
+                subquery.c.popularity_rank
+            )
+            .where(subquery.c.popularity_rank <= top_products_limit)
+            .order_by(subquery.c.total_sold.desc(), subquery.c.product_name)
+        )
+        products = self.db.execute(products_stmt).all()
+
+        return totals, products
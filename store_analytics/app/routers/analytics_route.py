@@ -4,16 +4,30 @@ Analytics routes for the store analytics service.
 This module contains FastAPI routes for accessing store analytics data.
 """
 
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 
+from shared.admission import Priority, admit
 from shared.database.exceptions import DatabaseError
+from shared.money import from_cents
+from shared.tracing import TracedRoute
 from store_analytics.app.dependencies import get_analytics_service
+from store_analytics.app.exceptions import CustomerNotFoundError, AnalyticsEngineUnavailableError
 from store_analytics.app.schemas.analytics import UniqueBuyersResponse, LoyalCustomersResponse, \
     TopSellingProductsResponse, \
-    LoyalCustomer, TopSellingProduct
+    LoyalCustomer, TopSellingProduct, CustomerProfileResponse, BranchAnalytics, BranchesAnalyticsResponse, \
+    AnalyticsSource, SalesSummaryResponse
 from store_analytics.app.services.analitics_service import AnalyticsService
 
-router = APIRouter()
+router = APIRouter(route_class=TracedRoute, dependencies=[Depends(admit(Priority.LOW))])
+
+SOURCE_QUERY = Query(
+    default=AnalyticsSource.AUTO,
+    description="Answer from the SQL database, the in-memory engine, or whichever is available (auto)"
+)
 
 
 @router.get(
@@ -21,12 +35,17 @@ router = APIRouter()
     response_model=UniqueBuyersResponse,
     summary="Get unique buyers count"
 )
-async def get_unique_buyers_count(
+def get_unique_buyers_count(
+        source: AnalyticsSource = SOURCE_QUERY,
         analytics_service: AnalyticsService = Depends(get_analytics_service)
 ) -> UniqueBuyersResponse:
     """
     Get the total number of unique buyers across all branches.
 
+    Args:
+        source: Data source to answer from
+        analytics_service: AnalyticsService instance
+
     Returns:
         UniqueBuyersResponse: Response containing the unique buyers count
 
@@ -34,8 +53,13 @@ async def get_unique_buyers_count(
         HTTPException: If there's an error retrieving the count
     """
     try:
-        count = analytics_service.get_unique_buyers_count()
+        count = analytics_service.get_unique_buyers_count(source)
         return UniqueBuyersResponse(unique_buyers_count=count)
+    except AnalyticsEngineUnavailableError as err:
+        raise HTTPException(
+            status_code=err.status_code,
+            detail=err.message
+        )
     except DatabaseError as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -48,13 +72,14 @@ async def get_unique_buyers_count(
     response_model=LoyalCustomersResponse,
     summary="Get loyal customers"
 )
-async def get_loyal_customers(
+def get_loyal_customers(
         min_purchases: int = Query(
             default=3,
             ge=1,
             le=100,
             description="Minimum number of purchases to be considered a loyal customer"
         ),
+        source: AnalyticsSource = SOURCE_QUERY,
         analytics_service: AnalyticsService = Depends(get_analytics_service)
 ) -> LoyalCustomersResponse:
     """
@@ -62,6 +87,7 @@ async def get_loyal_customers(
 
     Args:
         min_purchases: Minimum number of purchases to be considered loyal
+        source: Data source to answer from
         analytics_service: AnalyticsService instance
 
     Returns:
@@ -71,7 +97,8 @@ async def get_loyal_customers(
         HTTPException: If there's an error retrieving loyal customers
     """
     try:
-        customers_data = analytics_service.get_loyal_customers(min_purchases)
+        customers_data = analytics_service.get_loyal_customers(min_purchases, source)
+        total_loyal_customers = analytics_service.count_loyal_customers(min_purchases, source)
 
         # Convert to proper schema objects
         loyal_customers = [
@@ -82,7 +109,12 @@ async def get_loyal_customers(
         return LoyalCustomersResponse(
             loyal_customers=loyal_customers,
             criteria=f"At least {min_purchases} purchases",
-            total_loyal_customers=len(loyal_customers)
+            total_loyal_customers=total_loyal_customers
+        )
+    except AnalyticsEngineUnavailableError as err:
+        raise HTTPException(
+            status_code=err.status_code,
+            detail=err.message
         )
     except DatabaseError as e:
         raise HTTPException(
@@ -96,13 +128,14 @@ async def get_loyal_customers(
     response_model=TopSellingProductsResponse,
     summary="Get top-selling products of all time"
 )
-async def get_top_selling_products(
+def get_top_selling_products(
         limit: int = Query(
             default=3,
             ge=1,
             le=50,
             description="Maximum number of top products to return"
         ),
+        source: AnalyticsSource = SOURCE_QUERY,
         analytics_service: AnalyticsService = Depends(get_analytics_service)
 ) -> TopSellingProductsResponse:
     """
@@ -110,6 +143,7 @@ async def get_top_selling_products(
 
     Args:
         limit: Maximum number of products to return
+        source: Data source to answer from
         analytics_service: AnalyticsService instance
 
     Returns:
@@ -119,7 +153,7 @@ async def get_top_selling_products(
         HTTPException: If there's an error retrieving top products
     """
     try:
-        products_data = analytics_service.get_top_selling_products(limit)
+        products_data = analytics_service.get_top_selling_products(limit, source)
 
         top_products = [
             TopSellingProduct(
@@ -135,8 +169,187 @@ async def get_top_selling_products(
             limit=limit,
             total_products_found=len(top_products)
         )
+    except AnalyticsEngineUnavailableError as err:
+        raise HTTPException(
+            status_code=err.status_code,
+            detail=err.message
+        )
     except DatabaseError as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to retrieve top selling products: {str(e)}"
         )
+
+
+@router.get(
+    "/customers/{user_id}",
+    response_model=CustomerProfileResponse,
+    summary="Get a customer's purchase profile"
+)
+def get_customer_profile(
+        user_id: UUID,
+        analytics_service: AnalyticsService = Depends(get_analytics_service)
+) -> CustomerProfileResponse:
+    """
+    Get the purchase profile of a single customer.
+
+    Args:
+        user_id: ID of the customer
+        analytics_service: AnalyticsService instance
+
+    Returns:
+        CustomerProfileResponse: Purchase count, total spent, first/last purchase and favorite product
+
+    Raises:
+        HTTPException: If the customer is unknown or there's an error retrieving the profile
+    """
+    try:
+        profile = analytics_service.get_customer_profile(user_id)
+
+        return CustomerProfileResponse(
+            user_id=profile.user_id,
+            purchase_count=profile.purchase_count,
+            total_spent=from_cents(profile.total_spent_cents),
+            first_purchase_at=profile.first_purchase_at,
+            last_purchase_at=profile.last_purchase_at,
+            favorite_product=profile.favorite_product
+        )
+    except CustomerNotFoundError as err:
+        raise HTTPException(
+            status_code=err.status_code,
+            detail=err.message
+        )
+    except DatabaseError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve customer profile: {str(e)}"
+        )
+
+
+@router.get(
+    "/branches",
+    response_model=BranchesAnalyticsResponse,
+    summary="Get sales figures for every branch"
+)
+def get_branch_analytics(
+        top_products: int = Query(
+            default=3,
+            ge=1,
+            le=50,
+            description="Maximum number of top products to return per branch"
+        ),
+        analytics_service: AnalyticsService = Depends(get_analytics_service)
+) -> BranchesAnalyticsResponse:
+    """
+    Get revenue, purchase count, distinct customers, average basket value and
+    top products for every branch.
+
+    Args:
+        top_products: Maximum number of top products to return per branch
+        analytics_service: AnalyticsService instance
+
+    Returns:
+        BranchesAnalyticsResponse: Response containing per-branch analytics
+
+    Raises:
+        HTTPException: If there's an error retrieving branch analytics
+    """
+    try:
+        rows = analytics_service.get_branch_analytics(top_products)
+
+        branches = {}
+        for row in rows:
+            branch = branches.get(row.supermarket_id)
+            if branch is None:
+                branch = branches[row.supermarket_id] = BranchAnalytics(
+                    supermarket_id=row.supermarket_id,
+                    total_revenue=from_cents(row.total_revenue_cents),
+                    purchase_count=row.purchase_count,
+                    unique_customers=row.unique_customers,
+                    average_basket_value=(
+                        from_cents(row.total_revenue_cents) / row.purchase_count if row.purchase_count else 0.0
+                    ),
+                    top_products=[]
+                )
+            if row.product_name is not None:
+                branch.top_products.append(
+                    TopSellingProduct(
+                        product_name=row.product_name,
+                        total_sold=row.total_sold,
+                        rank=row.rank
+                    )
+                )
+
+        return BranchesAnalyticsResponse(
+            branches=list(branches.values()),
+            total_branches=len(branches)
+        )
+    except DatabaseError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve branch analytics: {str(e)}"
+        )
+
+
+@router.get(
+    "/sales-summary",
+    response_model=SalesSummaryResponse,
+    summary="Get a sales summary for a time range"
+)
+def get_sales_summary(
+        start: Optional[datetime] = Query(default=None, description="Inclusive lower bound on purchase time"),
+        end: Optional[datetime] = Query(default=None, description="Exclusive upper bound on purchase time"),
+        supermarket_id: Optional[str] = Query(default=None, description="Restrict the summary to this branch"),
+        top_products: int = Query(
+            default=3,
+            ge=1,
+            le=50,
+            description="Maximum number of top products to return"
+        ),
+        source: AnalyticsSource = SOURCE_QUERY,
+        analytics_service: AnalyticsService = Depends(get_analytics_service)
+) -> SalesSummaryResponse:
+    """
+    Get revenue, purchase count, distinct buyers and top products for a time range.
+
+    Args:
+        start: Inclusive lower bound on purchase time
+        end: Exclusive upper bound on purchase time
+        supermarket_id: Restrict the summary to this branch
+        top_products: Maximum number of top products to return
+        source: Data source to answer from
+        analytics_service: AnalyticsService instance
+
+    Returns:
+        SalesSummaryResponse: Response containing the sales summary
+
+    Raises:
+        HTTPException: If there's an error retrieving the summary
+    """
+    try:
+        revenue_cents, purchase_count, unique_buyers, products_data = analytics_service.get_sales_summary(
+            start, end, supermarket_id, top_products, source
+        )
+
+        return SalesSummaryResponse(
+            start=start,
+            end=end,
+            supermarket_id=supermarket_id,
+            total_revenue=from_cents(revenue_cents),
+            purchase_count=purchase_count,
+            unique_buyers=unique_buyers,
+            top_products=[
+                TopSellingProduct(product_name=name, total_sold=sold, rank=rank)
+                for name, sold, rank in products_data
+            ]
+        )
+    except AnalyticsEngineUnavailableError as err:
+        raise HTTPException(
+            status_code=err.status_code,
+            detail=err.message
+        )
+    except DatabaseError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve sales summary: {str(e)}"
+        )
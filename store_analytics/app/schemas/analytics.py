@@ -4,12 +4,25 @@ Analytics schemas for the store analytics service.
 These schemas define the data structures for analytics-related requests and responses.
 """
 
-from typing import List
+from datetime import datetime
+from enum import Enum
+from typing import List, Optional
 from uuid import UUID
 
 from pydantic import BaseModel, ConfigDict
 
 
+class AnalyticsSource(str, Enum):
+    """
+    Data source used to answer an analytics query.
+
+    AUTO uses the in-memory engine when it is enabled and loaded, SQL otherwise.
+    """
+    AUTO = "auto"
+    SQL = "sql"
+    MEMORY = "memory"
+
+
 class UniqueBuyersResponse(BaseModel):
     """
     Response schema for unique buyers count.
@@ -82,3 +95,85 @@ class TopSellingProductsResponse(BaseModel):
     total_products_found: int
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class CustomerProfileResponse(BaseModel):
+    """
+    Response schema for a single customer's purchase profile.
+
+    Attributes:
+        user_id: Unique identifier for the customer
+        purchase_count: Total number of purchases made by this customer
+        total_spent: Total amount spent by this customer
+        first_purchase_at: Timestamp of the customer's earliest purchase
+        last_purchase_at: Timestamp of the customer's latest purchase
+        favorite_product: Name of the product this customer bought the most
+    """
+    user_id: UUID
+    purchase_count: int
+    total_spent: float
+    first_purchase_at: Optional[datetime]
+    last_purchase_at: Optional[datetime]
+    favorite_product: Optional[str]
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class BranchAnalytics(BaseModel):
+    """
+    Schema for a single branch's sales figures.
+
+    Attributes:
+        supermarket_id: ID of the branch
+        total_revenue: Total sales amount at this branch
+        purchase_count: Number of purchases made at this branch
+        unique_customers: Number of distinct customers who purchased at this branch
+        average_basket_value: Average purchase amount at this branch
+        top_products: Top-selling products at this branch
+    """
+    supermarket_id: str
+    total_revenue: float
+    purchase_count: int
+    unique_customers: int
+    average_basket_value: float
+    top_products: List[TopSellingProduct]
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class BranchesAnalyticsResponse(BaseModel):
+    """
+    Response schema for per-branch analytics.
+
+    Attributes:
+        branches: Sales figures for every branch
+        total_branches: Number of branches returned
+    """
+    branches: List[BranchAnalytics]
+    total_branches: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class SalesSummaryResponse(BaseModel):
+    """
+    Response schema for a sales summary over a time range.
+
+    Attributes:
+        start: Inclusive lower bound on purchase time (unbounded if omitted)
+        end: Exclusive upper bound on purchase time (unbounded if omitted)
+        supermarket_id: Branch the summary is restricted to (all branches if omitted)
+        total_revenue: Total sales amount in the range
+        purchase_count: Number of purchases in the range
+        unique_buyers: Number of distinct customers in the range
+        top_products: Top-selling products in the range
+    """
+    start: Optional[datetime]
+    end: Optional[datetime]
+    supermarket_id: Optional[str]
+    total_revenue: float
+    purchase_count: int
+    unique_buyers: int
+    top_products: List[TopSellingProduct]
+
+    model_config = ConfigDict(from_attributes=True)
@@ -4,33 +4,63 @@ Analytics service for store analytics.
 This module provides business logic for analytics operations.
 """
 
+from datetime import datetime
+from typing import Optional, Union
+from uuid import UUID
+
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
 from shared.database.exceptions import DatabaseError
 from shared.database.logger import logger
+from shared.tracing import trace_methods
+from store_analytics.app.engine.columnar_engine import ColumnarAnalyticsEngine
+from store_analytics.app.exceptions import CustomerNotFoundError, AnalyticsEngineUnavailableError
 from store_analytics.app.repositories.analytics_repo import AnalyticsRepository
+from store_analytics.app.schemas.analytics import AnalyticsSource
 
 
+@trace_methods("AnalyticsService")
 class AnalyticsService:
     """
     Service for store analytics.
 
-    Provides business logic for analytics operations.
+    Provides business logic for analytics operations. Queries that the in-memory
+    engine supports take a `source` argument selecting the SQL repository or the
+    engine; both expose the same query methods.
 
     Attributes:
         db: SQLAlchemy session for database operations
         repo: Repository for analytics data
+        engine: Optional in-memory columnar analytics engine
     """
 
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, engine: Optional[ColumnarAnalyticsEngine] = None):
         self.db = db
         self.repo = AnalyticsRepository(db)
+        self.engine = engine
+
+    def _backend(self, source: AnalyticsSource) -> Union[AnalyticsRepository, ColumnarAnalyticsEngine]:
+        """
+        Resolve the data source for a query.
 
-    def get_unique_buyers_count(self) -> int:
+        Raises:
+            AnalyticsEngineUnavailableError: If the engine is requested explicitly but not loaded
+        """
+        engine_ready = self.engine is not None and self.engine.ready
+        if source == AnalyticsSource.SQL:
+            return self.repo
+        if source == AnalyticsSource.MEMORY and not engine_ready:
+            raise AnalyticsEngineUnavailableError()
+        return self.engine if engine_ready else self.repo
+
+    def get_unique_buyers_count(self, source: AnalyticsSource = AnalyticsSource.AUTO) -> int:
         """
         Get count of unique buyers across all branches.
 
+        Args:
+            source: Data source to answer from
+
         Returns:
             int: Number of unique buyers
 
@@ -38,19 +68,20 @@ class AnalyticsService:
             DatabaseError: If there's an error retrieving the count
         """
         try:
-            count = self.repo.count_unique_buyers()
-            logger.info(f"Retrieved unique buyers count: {count}")
+            count = self._backend(source).count_unique_buyers()
+            logger.info("Retrieved unique buyers count: %s", count)
             return count
         except SQLAlchemyError as e:
-            logger.error(f"Error getting unique buyers count: {e}")
+            logger.error("Error getting unique buyers count: %s", e)
             raise DatabaseError(f"Failed to get unique buyers count: {e}")
 
-    def get_loyal_customers(self, min_purchases: int = 3):
+    def get_loyal_customers(self, min_purchases: int = 3, source: AnalyticsSource = AnalyticsSource.AUTO):
         """
         Get list of loyal customers.
 
         Args:
             min_purchases: Minimum number of purchases to be considered loyal
+            source: Data source to answer from
 
         Returns:
             List of loyal customers with their purchase counts
@@ -59,19 +90,68 @@ class AnalyticsService:
             DatabaseError: If there's an error retrieving loyal customers
         """
         try:
-            customers = self.repo.get_loyal_customers(min_purchases)
-            logger.info(f"Retrieved {len(customers)} loyal customers")
+            customers = self._backend(source).get_loyal_customers(min_purchases)
+            logger.info("Retrieved %s loyal customers", len(customers))
             return customers
         except SQLAlchemyError as e:
-            logger.error(f"Error getting loyal customers: {e}")
+            logger.error("Error getting loyal customers: %s", e)
             raise DatabaseError(f"Failed to get loyal customers: {e}")
 
-    def get_top_selling_products(self, limit: int = 3):
+    def count_loyal_customers(self, min_purchases: int = 3, source: AnalyticsSource = AnalyticsSource.AUTO) -> int:
+        """
+        Count loyal customers.
+
+        Args:
+            min_purchases: Minimum number of purchases to be considered loyal
+            source: Data source to answer from
+
+        Returns:
+            int: Number of loyal customers
+
+        Raises:
+            DatabaseError: If there's an error counting loyal customers
+        """
+        try:
+            count = self._backend(source).count_loyal_customers(min_purchases)
+            logger.info("Counted %s loyal customers", count)
+            return count
+        except SQLAlchemyError as e:
+            logger.error("Error counting loyal customers: %s", e)
+            raise DatabaseError(f"Failed to count loyal customers: {e}")
+
+    def get_customer_profile(self, user_id: UUID):
+        """
+        Get the purchase profile of a single customer.
+
+        Args:
+            user_id: ID of the customer
+
+        Returns:
+            Row with the customer's purchase summary
+
+        Raises:
+            CustomerNotFoundError: If the customer has no recorded purchases
+            DatabaseError: If there's an error retrieving the profile
+        """
+        try:
+            profile = self.repo.get_customer_profile(user_id)
+        except SQLAlchemyError as e:
+            logger.error("Error getting profile for customer %s: %s", user_id, e)
+            raise DatabaseError(f"Failed to get customer profile: {e}")
+
+        if not profile:
+            raise CustomerNotFoundError(f"Customer '{user_id}' not found")
+
+        logger.info("Retrieved profile for customer %s", user_id)
+        return profile
+
+    def get_top_selling_products(self, limit: int = 3, source: AnalyticsSource = AnalyticsSource.AUTO):
         """
         Get top selling products by quantity.
 
         Args:
             limit: Maximum number of products to return
+            source: Data source to answer from
 
         Returns:
             List of top-selling products with their quantities
@@ -80,9 +160,71 @@ class AnalyticsService:
             DatabaseError: If there's an error retrieving top products
         """
         try:
-            products = self.repo.get_top_selling_products(limit)
-            logger.info(f"Retrieved top {len(products)} selling products")
+            products = self._backend(source).get_top_selling_products(limit)
+            logger.info("Retrieved top %s selling products", len(products))
             return products
         except SQLAlchemyError as e:
-            logger.error(f"Error getting top selling products: {e}")
+            logger.error("Error getting top selling products: %s", e)
             raise DatabaseError(f"Failed to get top selling products: {e}")
+
+    def get_branch_analytics(self, top_products_limit: int = 3):
+        """
+        Get sales figures and top products for every branch.
+
+        Args:
+            top_products_limit: Number of distinct popularity levels to include per branch
+
+        Returns:
+            Flat list of (branch, top product) rows ordered by branch
+
+        Raises:
+            DatabaseError: If there's an error retrieving branch analytics
+        """
+        try:
+            rows = self.repo.get_branch_analytics(top_products_limit)
+            logger.info("Retrieved branch analytics (%s rows)", len(rows))
+            return rows
+        except SQLAlchemyError as e:
+            logger.error("Error getting branch analytics: %s", e)
+            raise DatabaseError(f"Failed to get branch analytics: {e}")
+
+    def get_sales_summary(
+            self,
+            start: Optional[datetime] = None,
+            end: Optional[datetime] = None,
+            supermarket_id: Optional[str] = None,
+            top_products_limit: int = 3,
+            source: AnalyticsSource = AnalyticsSource.AUTO
+    ) -> tuple[int, int, int, list]:
+        """
+        Summarize purchases in a time range, optionally for a single branch.
+
+        Args:
+            start: Inclusive lower bound on purchase time
+            end: Exclusive upper bound on purchase time
+            supermarket_id: Restrict to this branch
+            top_products_limit: Number of distinct popularity levels to include
+            source: Data source to answer from
+
+        Returns:
+            Tuple of (total_revenue_cents, purchase_count, unique_buyers, top_products) where
+            top_products holds (product_name, total_sold, rank) tuples
+
+        Raises:
+            DatabaseError: If there's an error retrieving the summary
+        """
+        try:
+            backend = self._backend(source)
+            if backend is self.engine:
+                revenue_cents, purchase_count, unique_buyers, products = self.engine.get_sales_summary(
+                    start, end, supermarket_id, top_products_limit
+                )
+            else:
+                totals, products = self.repo.get_sales_summary(start, end, supermarket_id, top_products_limit)
+                revenue_cents = int(totals.total_revenue_cents)
+                purchase_count, unique_buyers = totals.purchase_count, totals.unique_buyers
+            logger.info("Retrieved sales summary (%s purchases)", purchase_count)
+            return revenue_cents, purchase_count, unique_buyers, products
+        except SQLAlchemyError as e:
+            logger.error("Error getting sales summary: %s", e)
+            raise DatabaseError(f"Failed to get sales summary: {e}")
@@ -16,5 +16,14 @@ class Settings(BaseSettings):
 
     ALLOWED_ORIGINS: List[str]
 
+    ANALYTICS_ENGINE_ENABLED: bool = False
+    ANALYTICS_ENGINE_REFRESH_SECONDS: float = 5.0
+    ANALYTICS_ENGINE_LOOKBACK_SECONDS: int = 300
+    ANALYTICS_ENGINE_FULL_RELOAD_SECONDS: int = 3600
+    ANALYTICS_ENGINE_BATCH_SIZE: int = 50_000
+    # Share one memory-mapped engine snapshot between workers; empty keeps a private copy per worker
+    ANALYTICS_SNAPSHOT_DIR: str = ""
+    ANALYTICS_SNAPSHOT_SECONDS: float = 30.0
+
 
 settings = Settings()
@@ -0,0 +1,120 @@
+import asyncio
+
+import pytest
+
+from shared.admission import AdaptiveConcurrencyLimiter, Priority
+from shared.exceptions import ServiceOverloadedError
+
+
+def make_limiter(max_limit: int = 4, max_queue: int = 10) -> AdaptiveConcurrencyLimiter:
+    return AdaptiveConcurrencyLimiter(min_limit=1, max_limit=max_limit, tolerance=2.0, max_queue=max_queue)
+
+
+@pytest.mark.asyncio
+async def test_lower_priorities_leave_headroom():
+    limiter = make_limiter(max_limit=4)
+    for _ in range(3):
+        await limiter.acquire(Priority.LOW)
+
+    with pytest.raises(ServiceOverloadedError):
+        await limiter.acquire(Priority.LOW)
+    await asyncio.wait_for(limiter.acquire(Priority.CRITICAL), 0.1)
+    assert limiter.in_flight == 4
+
+
+@pytest.mark.asyncio
+async def test_release_admits_waiters_by_priority():
+    limiter = make_limiter(max_limit=1)
+    await limiter.acquire(Priority.CRITICAL)
+    admitted = []
+
+    async def wait(priority: Priority):
+        await limiter.acquire(priority)
+        admitted.append(priority)
+
+    waiters = [asyncio.create_task(wait(Priority.NORMAL)), asyncio.create_task(wait(Priority.CRITICAL))]
+    await asyncio.sleep(0)
+    assert admitted == []
+
+    limiter.release(0.01)
+    await asyncio.sleep(0.01)
+    assert admitted == [Priority.CRITICAL]
+    limiter.release(0.01)
+    await asyncio.gather(*waiters)
+    assert admitted == [Priority.CRITICAL, Priority.NORMAL]
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_immediately():
+    limiter = make_limiter(max_limit=1, max_queue=1)
+    await limiter.acquire(Priority.CRITICAL)
+    waiter = asyncio.create_task(limiter.acquire(Priority.CRITICAL))
+    await asyncio.sleep(0)
+
+    with pytest.raises(ServiceOverloadedError) as rejected:
+        await limiter.acquire(Priority.CRITICAL)
+    assert rejected.value.retry_after >= 1
+
+    limiter.release(0.01)
+    await waiter
+
+
+def test_failures_shrink_the_limit_down_to_the_minimum():
+    limiter = make_limiter(max_limit=8)
+    for _ in range(50):
+        limiter.in_flight += 1
+        limiter.release(0.01, failed=True)
+
+    assert limiter.limit == limiter.min_limit
+
+
+def test_rising_latency_shrinks_the_limit_and_recovery_restores_it():
+    limiter = make_limiter(max_limit=8)
+
+    def run(latency: float, requests: int) -> None:
+        for _ in range(requests):
+            limiter.in_flight = int(limiter.limit)
+            limiter.release(latency)
+
+    run(0.01, 100)
+    assert limiter.limit == 8
+    run(0.2, 100)
+    shrunk = limiter.limit
+    assert shrunk < 8
+    run(0.01, 200)
+    assert limiter.limit > shrunk
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_leak_a_slot():
+    limiter = make_limiter(max_limit=1)
+    await limiter.acquire(Priority.CRITICAL)
+    waiter = asyncio.create_task(limiter.acquire(Priority.CRITICAL))
+    await asyncio.sleep(0)
+
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    limiter.release(0.01)
+    assert limiter.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_abandoned_waiters_do_not_fill_the_queue():
+    limiter = make_limiter(max_limit=1, max_queue=2)
+    await limiter.acquire(Priority.CRITICAL)
+    ahead = asyncio.create_task(limiter.acquire(Priority.CRITICAL))
+    abandoned = asyncio.create_task(limiter.acquire(Priority.NORMAL))
+    await asyncio.sleep(0)
+    abandoned.cancel()
+    await asyncio.gather(abandoned, return_exceptions=True)
+
+    queued = asyncio.create_task(limiter.acquire(Priority.NORMAL))
+    await asyncio.sleep(0)
+    assert not queued.done()
+
+    limiter.release(0.01)
+    await ahead
+    limiter.release(0.01)
+    await queued
+    assert limiter.in_flight == 1
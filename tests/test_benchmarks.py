@@ -0,0 +1,59 @@
+"""
+The repository and service benchmarks of perf/benchmarks.py under pytest-benchmark.
+
+They time the calls built by `build_benchmarks` against the seeded test database,
+one dataset size only; `python -m perf.benchmarks` remains the tool for comparing
+sizes and commits. Run them alone with `python -m pytest tests/test_benchmarks.py`,
+or leave them out with `--benchmark-skip`.
+"""
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from perf.benchmarks import build_benchmarks  # noqa: E402
+
+ROUNDS = 20
+WARMUP_ROUNDS = 2
+
+NAMES = (
+    "product_repo.get_products_by_names",
+    "purchase_repo.create_purchase",
+    "register_service.create_purchase",
+    "analytics_repo.count_unique_buyers",
+    "analytics_repo.get_loyal_customers",
+    "analytics_repo.count_loyal_customers",
+    "analytics_repo.get_customer_profile",
+    "analytics_repo.get_top_selling_products",
+    "analytics_repo.get_branch_analytics",
+    "analytics_repo.get_sales_summary",
+)
+
+
+@pytest.fixture(scope="module")
+def benchmarks(database) -> dict:
+    return build_benchmarks(seed=1)
+
+
+def test_every_benchmark_is_run(benchmarks):
+    assert set(benchmarks) == set(NAMES)
+
+
+@pytest.mark.parametrize("name", NAMES)
+def test_benchmark(benchmark, benchmarks, name):
+    from shared.database import SessionLocal
+
+    benchmark.group = name.split(".")[0]
+
+    # Like perf.benchmarks.time_benchmark: a fresh session per round, only the call is timed
+    def setup():
+        session = SessionLocal()
+        return (setup_call(session), session), {}
+
+    def teardown(call, session):
+        session.rollback()
+        session.close()
+
+    setup_call = benchmarks[name]
+    benchmark.pedantic(lambda call, session: call(), setup=setup, teardown=teardown,
+                       rounds=ROUNDS, warmup_rounds=WARMUP_ROUNDS)
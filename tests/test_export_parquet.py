@@ -0,0 +1,37 @@
+from datetime import datetime, timedelta, UTC
+
+import pyarrow.dataset as ds
+from sqlalchemy import delete, select
+
+from shared.database.jobs.export_parquet import export_purchases
+from shared.database.models import Purchase
+
+
+def exported_ids(root) -> set[str]:
+    dataset = ds.dataset(root / "purchases", format="parquet", partitioning="hive")
+    return set(dataset.to_table(columns=["id"]).column("id").to_pylist())
+
+
+def test_export_picks_up_late_purchases_with_old_timestamps(db_session, tmp_path):
+    exported = export_purchases(db_session, tmp_path, settle=timedelta(0))
+    assert len(exported_ids(tmp_path)) == exported
+
+    branch_id, user_id = db_session.execute(select(Purchase.supermarket_id, Purchase.user_id).limit(1)).one()
+    late = Purchase(
+        supermarket_id=branch_id,
+        user_id=user_id,
+        timestamp=datetime(2020, 1, 1, tzinfo=UTC),
+        items_list="milk",
+        total_amount_cents=100,
+    )
+    db_session.add(late)
+    db_session.flush()
+    late_id = late.id
+    db_session.commit()
+    try:
+        assert export_purchases(db_session, tmp_path, settle=timedelta(0)) == 1
+        assert str(late_id) in exported_ids(tmp_path)
+        assert export_purchases(db_session, tmp_path, settle=timedelta(0)) == 0
+    finally:
+        db_session.execute(delete(Purchase).where(Purchase.id == late_id))
+        db_session.commit()
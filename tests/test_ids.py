@@ -0,0 +1,41 @@
+import time
+import uuid
+from datetime import datetime, timedelta, UTC
+
+import pytest
+
+from shared.database import ids
+from shared.database.ids import uuid7, uuid7_time
+
+
+def test_uuid7_layout():
+    value = uuid7()
+
+    assert value.version == 7
+    assert value.variant == uuid.RFC_4122
+    assert abs(uuid7_time(value) - datetime.now(UTC)) < timedelta(seconds=1)
+
+
+def test_uuid7_is_strictly_increasing():
+    values = [uuid7() for _ in range(10_000)]
+
+    assert values == sorted(values)
+    assert len(set(values)) == len(values)
+
+
+def test_uuid7_counter_overflow_moves_to_next_millisecond(monkeypatch):
+    frozen_ns = time.time_ns() + 10 ** 9
+    monkeypatch.setattr(ids.time, "time_ns", lambda: frozen_ns)
+    # Restored afterwards, so later ids are not generated ahead of the clock
+    monkeypatch.setattr(ids, "_last_ms", ids._last_ms)
+
+    values = [uuid7() for _ in range(5_000)]
+
+    # 12 counter bits, started in the lower half, cannot hold 5,000 ids in one millisecond
+    assert values == sorted(values)
+    assert uuid7_time(values[-1]) > uuid7_time(values[0])
+
+
+def test_uuid7_time_rejects_other_versions():
+    with pytest.raises(ValueError):
+        uuid7_time(uuid.uuid4())
@@ -0,0 +1,20 @@
+import os
+
+import pytest
+
+from perf.import_budget import BUDGETS, measure
+
+RUNS = 3
+# Multiplies every budget, for slower machines (CI runners, laptops on battery)
+SCALE = float(os.environ.get("IMPORT_BUDGET_SCALE", "1.0"))
+
+
+@pytest.mark.parametrize("module", BUDGETS)
+def test_import_budget(module, service_env):
+    budget_ms, forbidden = BUDGETS[module]
+    runs = [measure(module, service_env) for _ in range(RUNS)]
+    best_ms = min(ms for ms, _ in runs)
+    imported = runs[0][1]
+
+    assert not [name for name in forbidden if name in imported]
+    assert best_ms <= budget_ms * SCALE
@@ -0,0 +1,31 @@
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+from shared.database.instrumentation import query_stats_middleware, recent_request_stats
+
+
+def make_client() -> TestClient:
+    router = APIRouter()
+
+    @router.get("/customers/{user_id}")
+    def customer(user_id: str):
+        return {"user_id": user_id}
+
+    app = FastAPI()
+    app.include_router(router, prefix="/api/analytics")
+    app.middleware("http")(query_stats_middleware)
+    return TestClient(app)
+
+
+def test_requests_are_labelled_by_route_template():
+    client = make_client()
+    client.get("/api/analytics/customers/1")
+    client.get("/api/analytics/customers/2")
+    client.get("/missing")
+
+    labels = [entry["request"] for entry in recent_request_stats()[:3]]
+    assert labels == [
+        "GET unmatched",
+        "GET /api/analytics/customers/{user_id}",
+        "GET /api/analytics/customers/{user_id}",
+    ]
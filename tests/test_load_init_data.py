@@ -0,0 +1,81 @@
+import uuid
+
+import pandas as pd
+import pytest
+
+from database.init.load_init_data import prepare_purchases
+from shared.database.ids import uuid7_time
+
+USER = "01E1E159-8045-43C2-88DD-5682B18BD680"
+
+
+@pytest.fixture
+def products() -> pd.DataFrame:
+    return pd.DataFrame(
+        {"id": [str(uuid.uuid4()) for _ in range(3)], "unit_price_cents": [150, 200, 300]},
+        index=pd.Index(["milk", "bread", "eggs"], name="product_name"),
+    )
+
+
+def purchase_rows(*rows: dict) -> pd.DataFrame:
+    defaults = {
+        "supermarket_id": "SMKT001",
+        "timestamp": "2025-05-26T19:51:00.539354",
+        "user_id": USER,
+        "items_list": "eggs,milk",
+        "total_amount": "4.5",
+    }
+    return pd.DataFrame([{**defaults, **row} for row in rows], dtype=str)
+
+
+def test_prepare_purchases_explodes_items(products):
+    purchases, items = prepare_purchases(purchase_rows({"items_list": " eggs , milk,,"}), products)
+
+    assert len(purchases) == 1
+    row = purchases.iloc[0]
+    assert row["user_id"] == USER.lower()
+    assert row["items_list"] == "eggs, milk"
+    assert row["total_amount_cents"] == 450
+    assert list(items["product_id"]) == [products.loc["eggs", "id"], products.loc["milk", "id"]]
+    assert list(items["unit_price_cents"]) == [300, 150]
+    assert set(items["purchase_id"]) == {row["id"]}
+
+
+def test_prepare_purchases_rejects_invalid_rows(products):
+    purchases, items = prepare_purchases(purchase_rows(
+        {},
+        {"supermarket_id": " "},
+        {"user_id": "not-a-uuid"},
+        {"timestamp": "yesterday"},
+        {"total_amount": "-1"},
+        {"total_amount": "lots"},
+        {"items_list": "eggs,caviar"},
+        {"items_list": "eggs,eggs"},
+        {"items_list": ""},
+    ), products)
+
+    assert list(purchases.index) == [0]
+    assert set(items.index) == {0}
+
+
+def test_purchase_ids_are_time_ordered_and_deterministic(products):
+    rows = purchase_rows(
+        {"timestamp": "2025-05-26T19:51:00"},
+        {"timestamp": "2025-05-26T21:51:00+02:00", "items_list": "bread"},
+        {"timestamp": "2025-05-27T08:00:00"},
+    )
+    ids = [uuid.UUID(value) for value in prepare_purchases(rows, products)[0]["id"]]
+
+    assert all(value.version == 7 for value in ids)
+    # Naive timestamps are UTC, so the second row is at the same instant as the first
+    assert uuid7_time(ids[0]) == uuid7_time(ids[1]) == pd.Timestamp("2025-05-26T19:51:00Z")
+    assert ids[0] != ids[1]
+    assert ids[2] > ids[0]
+    assert [uuid.UUID(value) for value in prepare_purchases(rows, products)[0]["id"]] == ids
+
+
+def test_purchase_id_is_pinned(products):
+    # Derived ids are persisted: if this changes, re-running the loader duplicates every purchase
+    purchases, _ = prepare_purchases(purchase_rows({}), products)
+
+    assert purchases.iloc[0]["id"] == "01970e25febb779da0a252b7e6134210"
@@ -0,0 +1,40 @@
+import argparse
+import asyncio
+
+from perf.loadgen import LoadRunner, Workload
+
+
+def make_args(**overrides) -> argparse.Namespace:
+    defaults = {
+        "seed": 42,
+        "customers": 100,
+        "analytics_share": 0.2,
+        "cash_register_url": "http://cash-register",
+        "analytics_url": "http://analytics",
+    }
+    return argparse.Namespace(**{**defaults, **overrides})
+
+
+def requests(args: argparse.Namespace, count: int = 50) -> list[tuple]:
+    workload = Workload(args, ["milk", "bread", "eggs", "apples", "butter", "cheese"], ["SMKT001", "SMKT002"])
+    return [(request.name, request.path, request.body) for request in (workload.next() for _ in range(count))]
+
+
+def test_workload_is_reproducible_from_the_seed():
+    assert requests(make_args()) == requests(make_args())
+    assert requests(make_args()) != requests(make_args(seed=7))
+
+
+def test_poisson_arrivals_are_reproducible_from_the_seed():
+    def arrivals(args: argparse.Namespace) -> list[float]:
+        runner = LoadRunner(args, client=None)
+        scheduled = []
+        runner.launch = lambda request, at: scheduled.append(at - runner.started)
+        asyncio.run(runner.open_loop(lambda: None))
+        return scheduled
+
+    args = make_args(rate=1000.0, duration=0.05, poisson=True)
+    first = arrivals(args)
+
+    assert len(first) > 1
+    assert first == arrivals(args)
@@ -0,0 +1,50 @@
+import threading
+
+from shared.metrics import Counter, Histogram, Registry
+
+
+def run_in_thread(target) -> None:
+    thread = threading.Thread(target=target)
+    thread.start()
+    thread.join()
+
+
+def test_counter_merges_thread_shards():
+    counter = Counter("test_total", "Test counter", ("label",), registry=Registry())
+    counter.inc("a")
+    run_in_thread(lambda: counter.inc("a", amount=2))
+    run_in_thread(lambda: counter.inc("b"))
+
+    assert counter.samples() == ['test_total{label="a"} 3', 'test_total{label="b"} 1']
+
+
+def test_exited_threads_are_folded_into_retired_values():
+    counter = Counter("test_total", "Test counter", registry=Registry())
+    for _ in range(5):
+        run_in_thread(counter.inc)
+    assert len(counter._shards) == 5
+
+    assert counter.samples() == ["test_total 5"]
+    assert counter._shards == []
+
+    counter.inc()
+    run_in_thread(counter.inc)
+    assert counter.samples() == ["test_total 7"]
+    assert [thread for thread, _ in counter._shards] == [threading.current_thread()]
+
+
+def test_histogram_keeps_observations_of_exited_threads():
+    histogram = Histogram("test_seconds", "Test histogram", buckets=(0.1, 1.0), registry=Registry())
+    histogram.observe(0.05)
+    run_in_thread(lambda: histogram.observe(0.5))
+    histogram.samples()
+    run_in_thread(lambda: histogram.observe(5.0))
+
+    assert histogram.samples() == [
+        'test_seconds_bucket{le="0.1"} 1',
+        'test_seconds_bucket{le="1"} 2',
+        'test_seconds_bucket{le="+Inf"} 3',
+        "test_seconds_sum 5.55",
+        "test_seconds_count 3",
+    ]
+    assert len(histogram._shards) == 1
@@ -0,0 +1,34 @@
+from decimal import Decimal
+
+import pytest
+
+from shared.money import from_cents, to_cents
+
+
+@pytest.mark.parametrize("amount, cents", [
+    (12, 1200),
+    ("12", 1200),
+    ("4.5", 450),
+    (" 7.30 ", 730),
+    (0.1, 10),
+    (Decimal("19.99"), 1999),
+    # Half a cent rounds away from zero, also where the binary float would round down
+    ("0.005", 1),
+    (2.675, 268),
+    ("-0.005", -1),
+    ("0", 0),
+])
+def test_to_cents(amount, cents):
+    assert to_cents(amount) == cents
+
+
+@pytest.mark.parametrize("amount", ["", "abc", "1,50", "nan", "inf", float("nan"), Decimal("Infinity")])
+def test_to_cents_rejects_non_numbers(amount):
+    with pytest.raises(ValueError):
+        to_cents(amount)
+
+
+def test_from_cents():
+    assert from_cents(1999) == 19.99
+    assert from_cents(0) == 0.0
+    assert to_cents(from_cents(123456789)) == 123456789
@@ -0,0 +1,81 @@
+"""
+Query budgets of the service endpoints, checked against the seeded test database.
+
+Each budget is the number of statements the endpoint runs today. A change that
+needs more (e.g. a relationship loaded lazily per row) should raise the budget
+on purpose, in review.
+"""
+
+import pytest
+
+from cash_register.app.schemas.purchase import PurchaseCreate
+from cash_register.app.services.register_service import RegisterService
+from shared.database.instrumentation import assert_endpoint_query_budget, assert_max_queries
+from shared.database.models import UserStats
+
+# Branch and product lookups, a new walk-in customer, the summary upserts and the response reload
+PURCHASE_QUERIES = 13
+
+ANALYTICS_BUDGETS = {
+    "/api/analytics/unique-buyers": 1,
+    "/api/analytics/loyal-customers": 2,
+    "/api/analytics/top-selling-products": 1,
+    "/api/analytics/branches": 1,
+    "/api/analytics/sales-summary": 2,
+}
+
+
+@pytest.fixture(scope="module")
+def catalog(cash_register_client) -> tuple[str, list[str]]:
+    """A branch id and the names of every product."""
+    branches = cash_register_client.get("/api/cash-register/branch/").json()
+    products = cash_register_client.get("/api/cash-register/product/").json()
+    return branches[0]["id"], [product["product_name"] for product in products]
+
+
+@pytest.mark.parametrize("path", ["/api/cash-register/branch/", "/api/cash-register/product/"])
+def test_catalog_query_budget(cash_register_client, path):
+    response = assert_endpoint_query_budget(cash_register_client, "GET", path, 1)
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize("item_count", [1, 10])
+def test_purchase_query_budget_does_not_grow_with_items(cash_register_client, catalog, item_count):
+    branch_id, product_names = catalog
+    body = {
+        "supermarket_id": branch_id,
+        "items": [{"product_name": name} for name in product_names[:item_count]],
+    }
+
+    response = assert_endpoint_query_budget(
+        cash_register_client, "POST", "/api/cash-register/purchase/", PURCHASE_QUERIES, json=body
+    )
+    assert response.status_code == 201
+    assert len(response.json()["items"]) == item_count
+
+
+def test_register_service_query_budget(db_session, catalog):
+    branch_id, product_names = catalog
+    customer_id = db_session.query(UserStats.user_id).limit(1).scalar()
+    purchase = PurchaseCreate(
+        supermarket_id=branch_id,
+        user_id=customer_id,
+        items=[{"product_name": name} for name in product_names[:3]],
+    )
+
+    # A known customer is not inserted, so nothing is reloaded after that commit
+    with assert_max_queries(PURCHASE_QUERIES - 2, "create_purchase"):
+        RegisterService(db_session).create_purchase(purchase)
+
+
+@pytest.mark.parametrize("path, max_queries", ANALYTICS_BUDGETS.items())
+def test_analytics_query_budget(analytics_client, path, max_queries):
+    response = assert_endpoint_query_budget(analytics_client, "GET", path, max_queries, params={"source": "sql"})
+    assert response.status_code == 200
+
+
+def test_customer_summary_query_budget(analytics_client, db_session):
+    customer_id = db_session.query(UserStats.user_id).limit(1).scalar()
+
+    response = assert_endpoint_query_budget(analytics_client, "GET", f"/api/analytics/customers/{customer_id}", 1)
+    assert response.status_code == 200